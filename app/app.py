@@ -15,7 +15,8 @@ app = dash.Dash(
     suppress_callback_exceptions=True
 )
 
-app.layout = create_layout()
+# Built per page load instead of at import time
+app.layout = create_layout
 
 # Add theme toggle clientside callback
 app.clientside_callback(
@@ -30,4 +31,15 @@ app.clientside_callback(
     """,
     Output("theme-toggle", "children"),
     Input("theme-store", "data")
-)
\ No newline at end of file
+)
+
+# Graph point budget follows the browser window width
+app.clientside_callback(
+    """
+    function(n) {
+        return window.innerWidth;
+    }
+    """,
+    Output("graph-width", "data"),
+    Input("metrics-update-interval", "n_intervals")
+)
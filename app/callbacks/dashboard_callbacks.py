@@ -1,38 +1,58 @@
 # app/callbacks/dashboard_callbacks.py
-from datetime import datetime
-from venv import logger
+from datetime import datetime, timedelta
 from dash import Input, Output, State, html, dcc, callback
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 
-from collector import get_network_speeds
-from ..data.data_handler import DataHandler
-from ..utils.alerts import AlertSystem
-import pandas as pd
+from ..data import get_data_handler
+from ..utils.alerts import get_alert_system
+from ..utils.config import config
+from ..utils.logger import logger
 
-# Initialize data handler
-data_handler = DataHandler()
+# Hours covered by each time-range preset in the layout
+TIME_RANGE_HOURS = {'1h': 1, '6h': 6, '24h': 24, '7d': 24 * 7, '30d': 24 * 30}
 
-def bytes_to_mbps(bytes, time_diff):
-    return (bytes / time_diff) / (1024 * 1024)
+def selected_range(preset, start_date, end_date):
+    """(start, end) of the time-range picker; end is None for ranges up to now."""
+    if preset == 'custom' and start_date:
+        start = datetime.fromisoformat(start_date)
+        # The end date is inclusive: query up to the end of that day
+        end = datetime.fromisoformat(end_date) + timedelta(days=1) if end_date else None
+        return start, end
+    return datetime.now() - timedelta(hours=TIME_RANGE_HOURS.get(preset, 1)), None
+
+def point_budget(width):
+    """Points to draw per graph: about one per pixel of the window width, within the configured cap."""
+    cap = config.get('monitoring.max_graph_points', 1000)
+    return min(int(width), cap) if width else cap
+
+@callback(
+  Output("data-version", "data"),
+  Input("metrics-update-interval", "n_intervals"),
+  State("data-version", "data")
+)
+def poll_data_version(n, version):
+  """Publish the data version, so the callbacks below only run when data changed."""
+  data_handler = get_data_handler()
+  if not data_handler.changed_since(version):
+      raise PreventUpdate
+  return data_handler.data_version()
+
+@callback(
+  Output("time-range-dates", "style"),
+  Input("time-range-preset", "value")
+)
+def toggle_custom_range(preset):
+  return {'display': 'block'} if preset == 'custom' else {'display': 'none'}
 
 @callback(
   Output("computer-selector", "options"),
-  Input("metrics-update-interval", "n_intervals")
+  Input("data-version", "data")
 )
 def update_computer_list(n):
-  df = data_handler.read_data()
-  
-  # Debugging output
-  print("DataFrame columns:", df.columns.tolist())  # Print the column names
-  print("DataFrame head:\n", df.head())  # Print the first few rows of the DataFrame
-  
-  # Check if 'computer_name' exists in the DataFrame
-  if 'computer_name' not in df.columns:
-      print("Error: 'computer_name' column not found in DataFrame.")
-      return []  # Return an empty list if the column is not found
-  
-  computers = df['computer_name'].unique()  # Use the correct column name
+  data_handler = get_data_handler()
+  computers = data_handler.get_computer_names()
   return [{"label": comp, "value": comp} for comp in computers]
 
 @callback(
@@ -41,9 +61,14 @@ def update_computer_list(n):
    Output("disk-usage-value", "children"),
    Output("system-metrics-graph", "figure")],
   [Input("computer-selector", "value"),
-   Input("metrics-update-interval", "n_intervals")]
+   Input("data-version", "data"),
+   Input("time-range-preset", "value"),
+   Input("time-range-dates", "start_date"),
+   Input("time-range-dates", "end_date")],
+  State("graph-width", "data")
 )
-def update_system_metrics(computer_name, n):
+def update_system_metrics(computer_name, n, preset, start_date, end_date, width):
+    data_handler = get_data_handler()
     if not computer_name:
         return "N/A", "N/A", "N/A", go.Figure()
     
@@ -52,9 +77,12 @@ def update_system_metrics(computer_name, n):
         if not metrics:
             return "N/A", "N/A", "N/A", go.Figure()
             
-        historical = data_handler.get_historical_data(
+        start, end = selected_range(preset, start_date, end_date)
+        historical = data_handler.get_range(
             computer_name, 
-            ['cpu_usage', 'memory_usage', 'disk_usage']
+            ['cpu_usage', 'memory_usage', 'disk_usage'],
+            start, end,
+            max_points=point_budget(width)
         )
         
         if historical.empty:
@@ -110,17 +138,25 @@ def update_system_metrics(computer_name, n):
    Output("download-speed-value", "children"),
    Output("network-metrics-graph", "figure")],
   [Input("computer-selector", "value"),
-   Input("metrics-update-interval", "n_intervals")]
+   Input("data-version", "data"),
+   Input("time-range-preset", "value"),
+   Input("time-range-dates", "start_date"),
+   Input("time-range-dates", "end_date")],
+  State("graph-width", "data")
 )
-def update_network_metrics(computer_name, n):
+def update_network_metrics(computer_name, n, preset, start_date, end_date, width):
+    data_handler = get_data_handler()
     if not computer_name:
         return "N/A", "N/A", go.Figure()
 
     try:
         # Get historical network data including speed test results
-        historical = data_handler.get_historical_data(
+        start, end = selected_range(preset, start_date, end_date)
+        historical = data_handler.get_range(
             computer_name, 
-            ['internet_upload_speed', 'internet_download_speed']
+            ['internet_upload_speed', 'internet_download_speed'],
+            start, end,
+            max_points=point_budget(width)
         )
         
         if historical.empty:
@@ -168,9 +204,10 @@ def update_network_metrics(computer_name, n):
 @callback(
   Output("services-status-container", "children"),
   [Input("computer-selector", "value"),
-   Input("metrics-update-interval", "n_intervals")]
+   Input("data-version", "data")]
 )
 def update_services_status(computer_name, n):
+  data_handler = get_data_handler()
   if not computer_name:
       return "No computer selected"
   
@@ -198,18 +235,17 @@ def update_services_status(computer_name, n):
 @callback(
   Output("alerts-container", "children"),
   [Input("computer-selector", "value"),
-   Input("metrics-update-interval", "n_intervals")]
+   Input("data-version", "data")]
 )
 def update_alerts(computer_name, n):
+  data_handler = get_data_handler()
   if not computer_name:
       return []
   
-  alert_system = AlertSystem()
-  metrics = data_handler.get_latest_metrics(computer_name)
-  services = data_handler.get_service_status(computer_name)
-  
-  # Collect all alerts
-  alerts = alert_system.check_metrics(metrics) + alert_system.check_services(services)
+  # Samples already seen are skipped, so only new rows advance the rules
+  alert_system = get_alert_system()
+  history = data_handler.get_historical_data(computer_name, alert_system.metrics, hours=alert_system.lookback_hours)
+  alerts = alert_system.update(computer_name, history)
   
   # Create alert components
   alert_components = []
@@ -226,66 +262,99 @@ def update_alerts(computer_name, n):
   return alert_components
 
 @callback(
-    [
-        Output('network-graph', 'figure'),
-        Output('internet-speed-graph', 'figure')
-    ],
-    [Input('interval-component', 'n_intervals')]
+  Output("network-usage-graph", "figure"),
+  [Input("computer-selector", "value"),
+   Input("data-version", "data"),
+   Input("time-range-preset", "value"),
+   Input("time-range-dates", "start_date"),
+   Input("time-range-dates", "end_date")],
+  State("graph-width", "data")
 )
-def update_network_graphs(n):
-    try:
-        df = data_handler.get_historical_data()
-        if df.empty:
-            raise ValueError("No data available")
+def update_network_usage(computer_name, n, preset, start_date, end_date, width):
+    """Upload/download throughput, derived from the byte counters by get_range."""
+    data_handler = get_data_handler()
+    if not computer_name:
+        return go.Figure()
 
-        # Network Usage Graph
-        network_fig = go.Figure()
-        network_fig.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['upload_speed_mbps'],
-            name='Upload (Usage)',
-            line=dict(color='blue')
-        ))
-        network_fig.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['download_speed_mbps'],
-            name='Download (Usage)',
-            line=dict(color='green')
-        ))
-        
-        network_fig.update_layout(
-            title='Network Usage Over Time',
-            xaxis_title='Time',
-            yaxis_title='Speed (Mbps)',
-            template='plotly_dark'
+    try:
+        start, end = selected_range(preset, start_date, end_date)
+        historical = data_handler.get_range(
+            computer_name,
+            ['upload_speed_mbps', 'download_speed_mbps'],
+            start, end,
+            max_points=point_budget(width)
         )
+        if historical.empty:
+            return go.Figure()
 
-        # Internet Speed Test Graph
-        speed_fig = go.Figure()
-        speed_fig.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['internet_upload_speed'],
-            name='Upload (Speed Test)',
-            line=dict(color='orange')
-        ))
-        speed_fig.add_trace(go.Scatter(
-            x=df['timestamp'],
-            y=df['internet_download_speed'],
-            name='Download (Speed Test)',
-            line=dict(color='red')
-        ))
-        
-        speed_fig.update_layout(
-            title='Internet Speed Test Results',
-            xaxis_title='Time',
-            yaxis_title='Speed (Mbps)',
-            template='plotly_dark'
+        fig = go.Figure()
+        traces = {'upload_speed_mbps': ('Upload (Usage)', '#E67E22'),
+                  'download_speed_mbps': ('Download (Usage)', '#9B59B6')}
+        for metric, (name, color) in traces.items():
+            if metric in historical.columns:
+                fig.add_trace(go.Scatter(
+                    x=historical['timestamp'],
+                    y=historical[metric],
+                    name=name,
+                    mode='lines',
+                    # Resets and collector outages are holes, not zeros
+                    connectgaps=False,
+                    line=dict(color=color)
+                ))
+
+        fig.update_layout(
+            title="Network Usage History",
+            xaxis_title="Time",
+            yaxis_title="Throughput (Mbps)",
+            hovermode='x unified'
         )
+        return fig
 
-        return network_fig, speed_fig
     except Exception as e:
-        logger.error(f"Error updating network graphs: {e}")
-        return {}, {}
+        logger.exception("Error updating network usage")
+        return go.Figure()
+
+@callback(
+    [Output("fleet-table", "data"),
+     Output("fleet-summary", "children")],
+    [Input("data-version", "data"),
+     Input("metrics-update-interval", "n_intervals"),
+     Input("metrics-tabs", "active_tab")]
+)
+def update_fleet_overview(version, n, active_tab):
+    """Every computer's latest state; the interval keeps staleness current."""
+    if active_tab != "fleet-overview-tab":
+        raise PreventUpdate
+    data_handler = get_data_handler()
+    overview = data_handler.get_fleet_overview()
+    if overview.empty:
+        return [], "No computers have reported data"
+
+    # The cached overview is shared: derive display columns on a copy
+    now = datetime.now()
+    stale_minutes = ((now - overview['last_seen']).dt.total_seconds() // 60).astype('Int64')
+    table = overview.assign(
+        cpu_usage=overview['cpu_usage'].round(1),
+        memory_usage=overview['memory_usage'].round(1),
+        disk_usage=overview['disk_usage'].round(1),
+        last_seen=overview['last_seen'].dt.strftime('%Y-%m-%d %H:%M:%S'),
+        stale_minutes=stale_minutes,
+        id=overview['computer_name']
+    )
+    unhealthy = int((overview['services_down'] != '').sum())
+    summary = f"{len(overview)} computers, {unhealthy} with services down, updated {now:%H:%M:%S}"
+    return table.to_dict('records'), summary
+
+@callback(
+    Output("computer-selector", "value"),
+    Input("fleet-table", "active_cell"),
+    prevent_initial_call=True
+)
+def select_from_fleet(active_cell):
+    """Clicking a row of the fleet grid selects that computer."""
+    if not active_cell or not active_cell.get('row_id'):
+        raise PreventUpdate
+    return active_cell['row_id']
 
 @callback(
     [Output("local-ip-display", "children"),
@@ -293,10 +362,11 @@ def update_network_graphs(n):
      Output("ip-change-alert", "is_open"),
      Output("ip-change-alert", "children")],
     [Input("computer-selector", "value"),
-     Input("metrics-update-interval", "n_intervals")]
+     Input("data-version", "data")]
 )
 def update_ip_addresses(computer_name, n):
     """Update IP address displays and check for IP changes."""
+    data_handler = get_data_handler()
     if not computer_name:
         return "N/A", "N/A", False, ""
     
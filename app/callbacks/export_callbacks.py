@@ -1,11 +1,7 @@
 from dash import callback, Input, Output, State, dcc
-import pandas as pd
 from io import BytesIO
 import json
-from ..data.data_handler import DataHandler
-
-# Initialize data handler
-data_handler = DataHandler()
+from ..data import get_data_handler
 
 @callback(
     Output("download-data", "data"),
@@ -17,6 +13,10 @@ def export_data(n_clicks, computer_name):
     if not n_clicks or not computer_name:
         return None
     
+    # pandas (and xlsxwriter) are only needed once someone exports
+    import pandas as pd
+    data_handler = get_data_handler()
+    
     # Get all relevant data
     metrics = data_handler.get_latest_metrics(computer_name)
     services = data_handler.get_service_status(computer_name)
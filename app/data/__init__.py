@@ -0,0 +1,19 @@
+# app/data/__init__.py
+import threading
+
+_data_handler = None
+_lock = threading.Lock()
+
+def get_data_handler():
+    """The data handler shared by every callback module.
+
+    Created on first use, so pandas is only imported once the dashboard
+    serves its first request rather than when the app is imported.
+    """
+    global _data_handler
+    if _data_handler is None:
+        with _lock:
+            if _data_handler is None:
+                from .data_handler import create_data_handler
+                _data_handler = create_data_handler()
+    return _data_handler
@@ -2,122 +2,299 @@
 import pandas as pd
 from datetime import datetime, timedelta
 import os
+from monitoring.rollups import RollupStore, choose_tier, load_settings, tiers_from_config
+from monitoring.storage import SqliteSampleStore
+from .downsample import downsample
+from .fleet import fleet_overview
+from .partitions import HostPartitions
+from .rates import DEFAULT_MAX_GAP, RATE_COLUMNS, counter_rates, latest_rates, with_rates
+from .schema import apply_schema
+from .store import DataStore
+from ..utils.config import config
 from ..utils.logger import logger
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SERVICE_COLUMNS = {
+  'smartcare': 'smartcare_status',
+  'sql_server': 'sql_server_status',
+  'smartlink': 'smartlink_status',
+  'etims': 'etims_status',
+  'tims': 'tims_status'
+}
+
 class DataHandler:
-  def __init__(self):
-      # Use absolute path for the CSV file
-      self.csv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'server_data.csv')
-      self._cache = None
-      self._last_read = None
-      self.cache_duration = timedelta(seconds=5)  # Refresh every 5 seconds
-
-  def _should_refresh_cache(self) -> bool:
-      """Check if the cache should be refreshed based on the time elapsed."""
-      if self._cache is None or self._last_read is None:
-          return True
-      return datetime.now() - self._last_read > self.cache_duration
+  def __init__(self, csv_path: str = None):
+      self.csv_path = csv_path or os.path.join(PROJECT_ROOT, 'server_data.csv')
+      # Versioned snapshots of per-computer partitions, shared by every callback
+      self.data_store = DataStore(self.csv_path, min_interval=config.get('monitoring.min_reload_interval', 1.0))
+      self._init_queries()
 
-  def read_data(self) -> pd.DataFrame:
-      """Read and cache the monitoring data."""
+  def _init_queries(self):
+      """State every backend's queries share: rollup tiers, rate gap and fleet cache."""
+      # Rollup tiers written by the collector (config.json 'rollups'), used for long ranges
+      self.rollup_settings = load_settings(os.path.join(PROJECT_ROOT, 'config.json'))
+      self.tiers, self.raw_retention = tiers_from_config(self.rollup_settings)
+      self.rollups = self._create_rollup_store() if self.rollup_settings.get('enabled') else None
+      # Counter readings further apart than this yield no throughput value
+      self.max_rate_gap = config.get('monitoring.max_rate_gap', DEFAULT_MAX_GAP)
+      # (data version, fleet overview); replaced whole, so readers need no lock
+      self._fleet_cache = None
+
+  def _create_rollup_store(self) -> RollupStore:
+      return RollupStore(os.path.join(PROJECT_ROOT, self.rollup_settings.get('path', 'server_data_rollups.db')), self.tiers)
+
+  def _rollup_history(self, computer_name: str, metrics: list, start: datetime, end: datetime, max_points: int):
+      """History from the coarsest rollup tier that fits, or None to use raw samples.
+
+      A tier is used when every metric is rolled up and the range reaches
+      past raw retention or max_points leaves room for at least one bucket
+      per point.
+      """
+      if self.rollups is None or not metrics or not all(metric in self.rollups.metrics for metric in metrics):
+          return None
+      now = datetime.now()
+      span = ((end or now) - start).total_seconds()
+      tier = choose_tier((now - start).total_seconds(), span / max_points if max_points else 0, self.tiers, self.raw_retention)
+      if tier is None:
+          return None
+      rates = [metric for metric in metrics if metric in RATE_COLUMNS and RATE_COLUMNS[metric] in self.rollups.metrics]
+      # With rates, one bucket earlier too, so the first bucket has one
+      first = start - timedelta(seconds=tier.seconds) if rates else start
       try:
-          if self._should_refresh_cache():
-              if os.path.exists(self.csv_path):
-                  df = pd.read_csv(self.csv_path)
-                  df['timestamp'] = pd.to_datetime(df['timestamp'])
-                  self._cache = df.sort_values('timestamp')  # Sort by timestamp
-                  self._last_read = datetime.now()
-                  logger.info(f"Data read from {self.csv_path}")
-              else:
-                  logger.error(f"Data file not found: {self.csv_path}")
-                  return pd.DataFrame()
-          return self._cache
+          sql, params = self.rollups.history_query(
+              tier, computer_name, metrics, first.isoformat(), end.isoformat() if end is not None else None,
+              counters=[RATE_COLUMNS[metric] for metric in rates])
+          result = pd.read_sql_query(sql, self.rollups.connection(readonly=True), params=params)
       except Exception as e:
-          logger.error(f"Error reading data: {str(e)}")
-          return pd.DataFrame()
+          logger.warning(f"Rollup tier {tier.name} unavailable, using raw samples: {str(e)}")
+          return None
+      if result.empty:
+          # Not rolled up (yet): raw samples may still hold the range
+          return None
+      result['timestamp'] = pd.to_datetime(result['timestamp'], format='ISO8601')
+      if rates:
+          # Throughput between the last readings of consecutive buckets; buckets
+          # rolled up before counters were kept fall back to the stored mean
+          last_seen = pd.to_datetime(result['last_timestamp'], format='ISO8601')
+          gap = max(self.max_rate_gap, 2 * tier.seconds)
+          for metric in rates:
+              derived = pd.Series(counter_rates(last_seen, result[RATE_COLUMNS[metric]], max_gap=gap))
+              result[metric] = derived.fillna(result[metric])
+          result = result.drop(columns=['last_timestamp'] + [RATE_COLUMNS[metric] for metric in rates])
+          result = result.iloc[result['timestamp'].searchsorted(pd.Timestamp(start)):].reset_index(drop=True)
+          if result.empty:
+              return None
+      result = apply_schema(result)
+      logger.info(f"Retrieved historical data from the {tier.name} tier: {len(result)} rows")
+      return downsample(result, metrics, max_points)
+
+  def _raw_range(self, computer_name: str, metrics: list, start: datetime, end: datetime) -> pd.DataFrame:
+      """Raw samples with start <= timestamp <= end, holding at least the available metrics.
+
+      Binary search on the computer's sorted partition: the result is a
+      zero-copy slice of it, with every column; get_range() projects the
+      metrics only after downsampling, so a wide range is never copied.
+      """
+      return self.refresh().between(computer_name, start=start, end=end)
+
+  def refresh(self) -> HostPartitions:
+      """The partitions of the current snapshot, brought up to date with the CSV file."""
+      return self.data_store.refresh().partitions
+
+  def data_version(self) -> int:
+      """Version of the data after a refresh; it changes whenever the data does."""
+      return self.data_store.refresh().version
+
+  def changed_since(self, version) -> bool:
+      """Whether the data changed after version (None: always)."""
+      return version is None or self.data_version() != version
+
+  def read_data(self) -> pd.DataFrame:
+      """Read the monitoring data for every computer, sorted by timestamp.
+
+      Prefer the per-computer accessors below; this concatenates all partitions.
+      """
+      return self.refresh().frame()
 
   def get_latest_metrics(self, computer_name: str) -> dict:
-      """Get the latest metrics for a specific computer."""
-      # Always read fresh data
-      self._cache = None
-      df = self.read_data()
-      
-      if df.empty:
-          return {}
-      
-      try:
-          # Get the latest row for this computer
-          computer_data = df[df['computer_name'] == computer_name]
-          if computer_data.empty:
-              return {}
-          
-          # Convert the entire row to a dictionary
-          latest = computer_data.iloc[-1]
-          return latest.to_dict()
-          
-      except Exception as e:
-          logger.error(f"Error getting latest metrics: {str(e)}")
+      """Get the latest metrics for a specific computer.
+
+      Throughput is derived from the byte counters of the latest and
+      previous rows, as get_range() does for history.
+      """
+      partitions = self.refresh()
+      return self._with_latest_rates(partitions.latest(computer_name), partitions.previous(computer_name))
+
+  def _with_latest_rates(self, latest: dict, previous: dict) -> dict:
+      if not latest:
           return {}
+      return {**latest, **latest_rates(latest, previous, self.max_rate_gap)}
 
-  def get_historical_data(self, computer_name: str, metrics: list, hours: int = 1) -> pd.DataFrame:
-      """Get historical data for specific metrics."""
-      df = self.read_data()
-      if df.empty:
-          return pd.DataFrame()
+  def get_range(self, computer_name: str, metrics: list, start: datetime, end: datetime = None,
+                resolution: float = None, max_points: int = None) -> pd.DataFrame:
+      """Get the metrics of one computer between start and end (open-ended if None).
 
+      resolution (seconds per point) and max_points bound the number of
+      rows; the rows are then downsampled (LTTB per metric), so graph
+      payloads stay the same size for any range. Ranges older than raw
+      retention, or coarse enough, are answered from a rollup tier with
+      the bucket mean of each metric at the bucket's start time.
+
+      upload_speed_mbps and download_speed_mbps are derived from the byte
+      counters at query time (see rates.counter_rates), so resets and
+      gaps leave holes instead of spikes.
+      """
       try:
-          cutoff_time = datetime.now() - timedelta(hours=hours)
-          filtered_df = df[
-              (df['computer_name'] == computer_name) & 
-              (df['timestamp'] >= cutoff_time)
-          ]
-          
-          # Ensure the requested metrics are in the DataFrame
-          available_metrics = [metric for metric in metrics if metric in filtered_df.columns]
+          if resolution:
+              span = ((end or datetime.now()) - start).total_seconds()
+              points = max(int(span / resolution), 1)
+              max_points = min(max_points, points) if max_points else points
+          rolled_up = self._rollup_history(computer_name, metrics, start, end, max_points)
+          if rolled_up is not None:
+              return rolled_up
+          rates = [metric for metric in metrics if metric in RATE_COLUMNS]
+          if rates:
+              # Read the counters instead, from one gap earlier so the first row has a rate
+              columns = [metric for metric in metrics if metric not in RATE_COLUMNS] + [RATE_COLUMNS[metric] for metric in rates]
+              rows = self._raw_range(computer_name, columns, start - timedelta(seconds=self.max_rate_gap), end)
+              if not rows.empty:
+                  rows = with_rates(rows, rates, self.max_rate_gap)
+                  rows = rows.iloc[rows['timestamp'].searchsorted(pd.Timestamp(start)):]
+          else:
+              rows = self._raw_range(computer_name, metrics, start, end)
+          if rows.empty:
+              return pd.DataFrame()
+          available_metrics = [metric for metric in metrics if metric in rows.columns]
           if not available_metrics:
               logger.warning(f"No requested metrics found in data: {metrics}")
               return pd.DataFrame()
-              
-          # Sort by timestamp and get required columns
-          result = filtered_df[['timestamp'] + available_metrics].sort_values('timestamp')
+          result = downsample(rows, available_metrics, max_points)[['timestamp'] + available_metrics]
           logger.info(f"Retrieved historical data: {len(result)} rows")
           return result
-            
       except Exception as e:
           logger.error(f"Error getting historical data: {str(e)}")
           return pd.DataFrame()
 
+  def get_historical_data(self, computer_name: str, metrics: list, hours: float = 1, max_points: int = None) -> pd.DataFrame:
+      """Get the last hours of historical data for specific metrics (see get_range)."""
+      return self.get_range(computer_name, metrics, datetime.now() - timedelta(hours=hours), max_points=max_points)
+
+  def _latest_rows(self) -> pd.DataFrame:
+      """The latest row of every computer."""
+      return self.data_store.snapshot().partitions.latest_frame()
+
+  def get_fleet_overview(self) -> pd.DataFrame:
+      """Latest usage, service health and last-seen time of every computer.
+
+      Computed from one latest row per computer and cached per data
+      version, so repeated renders between data changes cost nothing.
+      """
+      version = self.data_version()
+      cached = self._fleet_cache
+      if cached is not None and cached[0] == version:
+          return cached[1]
+      try:
+          overview = fleet_overview(self._latest_rows())
+      except Exception as e:
+          logger.error(f"Error building fleet overview: {str(e)}")
+          return pd.DataFrame()
+      self._fleet_cache = (version, overview)
+      return overview
+
   def get_service_status(self, computer_name: str) -> dict:
       """Get the status of services for a specific computer."""
-      df = self.read_data()
-      if df.empty:
+      latest = self.refresh().latest(computer_name)
+      if not latest:
           return {}
-      
-      latest = df[df['computer_name'] == computer_name].iloc[-1]
-      return {
-          'smartcare': latest['smartcare_status'],
-          'sql_server': latest['sql_server_status'],
-          'smartlink': latest['smartlink_status'],
-          'etims': latest['etims_status'],
-          'tims': latest['tims_status']
-      }
+      return {service: latest.get(column) for service, column in SERVICE_COLUMNS.items()}
+
+  def get_computer_names(self) -> list:
+      """Get the names of all computers that have reported data."""
+      return self.refresh().hosts()
 
   def get_previous_metrics(self, computer_name: str) -> dict:
       """Get the second-to-last metrics for a specific computer."""
-      df = self.read_data()
-      if df.empty:
+      return dict(self.refresh().previous(computer_name))
+
+
+class SqliteDataHandler(DataHandler):
+  """DataHandler that answers every query from the indexed SQLite sample store."""
+
+  def __init__(self, db_path: str):
+      # No CSV reader or partitions: every query goes to the database
+      self.db_path = db_path
+      self.store = SqliteSampleStore(db_path)
+      self._init_queries()
+
+  def _create_rollup_store(self) -> RollupStore:
+      # The collector and ingest service keep rollups in the sample database
+      return RollupStore(self.db_path, self.tiers)
+
+  def data_version(self) -> int:
+      try:
+          return self.store.last_id()
+      except Exception as e:
+          logger.error(f"Error reading data version: {str(e)}")
+          return 0
+
+  def read_data(self) -> pd.DataFrame:
+      """Read the full sample table (prefer the targeted accessors below)."""
+      try:
+          df = pd.read_sql_query("SELECT * FROM samples ORDER BY timestamp", self.store.connection())
+          df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+          return apply_schema(df.drop(columns=['id']))
+      except Exception as e:
+          logger.error(f"Error reading data: {str(e)}")
+          return pd.DataFrame()
+
+  def get_computer_names(self) -> list:
+      try:
+          return self.store.computer_names()
+      except Exception as e:
+          logger.error(f"Error listing computers: {str(e)}")
+          return []
+
+  def get_latest_metrics(self, computer_name: str) -> dict:
+      try:
+          return self._with_latest_rates(self.store.latest(computer_name), self.store.latest(computer_name, offset=1))
+      except Exception as e:
+          logger.error(f"Error getting latest metrics: {str(e)}")
           return {}
-      
+
+  def get_previous_metrics(self, computer_name: str) -> dict:
       try:
-          # Get data for this computer
-          computer_data = df[df['computer_name'] == computer_name]
-          if len(computer_data) < 2:  # Need at least 2 rows for previous metrics
-              return {}
-          
-          # Get the second-to-last row
-          previous = computer_data.iloc[-2]
-          return previous.to_dict()
-          
+          return self.store.latest(computer_name, offset=1)
       except Exception as e:
           logger.error(f"Error getting previous metrics: {str(e)}")
-          return {}
\ No newline at end of file
+          return {}
+
+  def get_service_status(self, computer_name: str) -> dict:
+      latest = self.get_latest_metrics(computer_name)
+      if not latest:
+          return {}
+      return {service: latest[column] for service, column in SERVICE_COLUMNS.items()}
+
+  def _latest_rows(self) -> pd.DataFrame:
+      return pd.DataFrame.from_records(self.store.latest_rows())
+
+  def _raw_range(self, computer_name: str, metrics: list, start: datetime, end: datetime) -> pd.DataFrame:
+      available_metrics = [metric for metric in metrics if metric in self.store.columns()]
+      if not available_metrics:
+          return pd.DataFrame()
+      sql, params = self.store.history_query(
+          computer_name, available_metrics, start.isoformat(), end.isoformat() if end is not None else None)
+      result = pd.read_sql_query(sql, self.store.connection(), params=params)
+      result['timestamp'] = pd.to_datetime(result['timestamp'], format='ISO8601')
+      return apply_schema(result)
+
+
+def create_data_handler() -> DataHandler:
+  """Build the DataHandler for the storage backend selected in config.yaml."""
+  backend = config.get('storage.backend', 'csv')
+  if backend == 'sqlite':
+      db_path = os.path.join(PROJECT_ROOT, config.get('storage.sqlite_path', 'server_data.db'))
+      return SqliteDataHandler(db_path)
+  if backend != 'csv':
+      logger.error(f"Unknown storage backend '{backend}', falling back to csv")
+  return DataHandler()
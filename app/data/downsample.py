@@ -0,0 +1,86 @@
+# app/data/downsample.py
+import numpy as np
+import pandas as pd
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+  """Start offsets of buckets evenly splitting n points, plus n."""
+  return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+  """Positions picked by Largest-Triangle-Three-Buckets.
+
+  The first and last points are kept; the points between are split into
+  threshold - 2 buckets and from each the point forming the largest
+  triangle with the previously kept point and the next bucket's average is
+  kept. Bucket averages are computed for all buckets at once; only the
+  choice of the previous point is sequential.
+  """
+  n = len(y)
+  if threshold >= n or threshold < 3:
+      return np.arange(n)
+  x = x.astype(np.float64)
+  y = y.astype(np.float64)
+
+  edges = 1 + _bucket_edges(n - 2, threshold - 2)
+  # Average of every bucket; the one after the last bucket is the last point
+  sums_x = np.add.reduceat(x[1:-1], edges[:-1] - 1)
+  sums_y = np.add.reduceat(y[1:-1], edges[:-1] - 1)
+  counts = np.diff(edges)
+  avg_x = np.append(sums_x / counts, x[-1])
+  avg_y = np.append(sums_y / counts, y[-1])
+
+  picked = np.empty(threshold, dtype=np.int64)
+  picked[0], picked[-1] = 0, n - 1
+  a = 0
+  for bucket in range(threshold - 2):
+      lo, hi = edges[bucket], edges[bucket + 1]
+      # Twice the triangle area; the constant factor does not change the argmax
+      area = np.abs(
+          (x[a] - avg_x[bucket + 1]) * (y[lo:hi] - y[a])
+          - (x[a] - x[lo:hi]) * (avg_y[bucket + 1] - y[a])
+      )
+      a = lo + int(np.argmax(area))
+      picked[bucket + 1] = a
+  return picked
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+  """Positions of the minimum and maximum of each of threshold // 2 buckets, in order."""
+  n = len(y)
+  buckets = threshold // 2
+  if threshold >= n or buckets < 1:
+      return np.arange(n)
+  edges = _bucket_edges(n, buckets)
+  size = int(np.diff(edges).max())
+  # Pad the buckets into one (buckets, size) matrix so argmin/argmax run once
+  positions = edges[:-1, None] + np.arange(size)
+  valid = positions < edges[1:, None]
+  values = y.astype(np.float64)[np.minimum(positions, n - 1)]
+  lows = positions[np.arange(buckets), np.where(valid, values, np.inf).argmin(axis=1)]
+  highs = positions[np.arange(buckets), np.where(valid, values, -np.inf).argmax(axis=1)]
+  return np.unique(np.concatenate([lows, highs]))
+
+METHODS = {
+  'lttb': lttb_indices,
+  'minmax': lambda x, y, threshold: minmax_indices(y, threshold),
+}
+
+def downsample(frame: pd.DataFrame, metrics: list, max_points: int, method: str = 'lttb') -> pd.DataFrame:
+  """At most about max_points rows of a timestamp-sorted frame, keeping each metric's shape.
+
+  The budget is split between the metrics; every metric is downsampled over
+  its non-missing values and the union of the kept rows is returned.
+  """
+  if not max_points or len(frame) <= max_points or not metrics:
+      return frame
+  pick = METHODS[method]
+  budget = max(max_points // len(metrics), 3)
+  x = frame['timestamp'].to_numpy().astype('datetime64[ns]').astype(np.int64)
+  kept = []
+  for metric in metrics:
+      y = pd.to_numeric(frame[metric], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+      present = np.flatnonzero(~np.isnan(y))
+      if len(present):
+          kept.append(present[pick(x[present], y[present], budget)])
+  if not kept:
+      return frame.iloc[:0]
+  return frame.iloc[np.unique(np.concatenate(kept))]
@@ -0,0 +1,32 @@
+# app/data/fleet.py
+import numpy as np
+import pandas as pd
+
+from monitoring.samples import FIELDNAMES
+
+STATUS_COLUMNS = [name for name in FIELDNAMES if name.endswith('_status')]
+USAGE_COLUMNS = ['cpu_usage', 'memory_usage', 'disk_usage']
+
+def fleet_overview(latest: pd.DataFrame) -> pd.DataFrame:
+  """Summarize one latest row per computer into the fleet overview grid.
+
+  Every column is computed for all computers at once, so the cost grows
+  with the number of status columns rather than with the fleet size in
+  Python code.
+  """
+  if latest.empty:
+      return pd.DataFrame(columns=['computer_name'] + USAGE_COLUMNS + ['services_running', 'services_down', 'last_seen'])
+  overview = pd.DataFrame({'computer_name': latest['computer_name'].astype(str).to_numpy()})
+  for column in USAGE_COLUMNS:
+      overview[column] = pd.to_numeric(latest[column], errors='coerce').to_numpy() if column in latest.columns else np.nan
+
+  statuses = [column for column in STATUS_COLUMNS if column in latest.columns]
+  running = np.column_stack([latest[column].astype(str).to_numpy() == 'Running' for column in statuses]) \
+      if statuses else np.zeros((len(latest), 0), dtype=bool)
+  overview['services_running'] = running.sum(axis=1)
+  down = np.full(len(latest), '', dtype=object)
+  for index, column in enumerate(statuses):
+      down = down + np.where(running[:, index], '', column.removesuffix('_status') + ' ')
+  overview['services_down'] = pd.Series(down, dtype=str).str.strip().str.replace(' ', ', ').to_numpy()
+  overview['last_seen'] = pd.to_datetime(latest['timestamp']).to_numpy()
+  return overview.sort_values('computer_name', ignore_index=True)
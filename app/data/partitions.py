@@ -0,0 +1,187 @@
+# app/data/partitions.py
+import numpy as np
+import pandas as pd
+
+from .schema import concat_frames, records
+
+# How many of the newest chunks extended() merges at once (size-tiered)
+MERGE_FANIN = 4
+
+class HostPartition:
+  """Time-sorted rows of one host plus its latest and previous row.
+
+  New rows are kept as chunks and only fully concatenated (and sorted, if a
+  chunk arrived out of order) when the history is read. So that hosts whose
+  history is never read do not pile up one chunk per poll, extended() merges
+  the newest MERGE_FANIN chunks once the oldest of them is no larger than
+  the rest together. A host then holds O(log n) chunks, each row is copied
+  O(log n) times, and an append never merges more history than was appended
+  since, however large the host's history is. A partition is never changed
+  once built: extended() returns a new one. Consolidating chunks in frame() only
+  caches an equivalent frame, so concurrent readers need no lock.
+  """
+
+  __slots__ = ('_chunks', '_sorted', '_max_timestamp', '_tail', '_rows')
+
+  def __init__(self):
+      self._chunks = []
+      self._sorted = True
+      self._max_timestamp = None
+      # Up to two (timestamp, row dict) pairs, newest last
+      self._tail = []
+      self._rows = 0
+
+  def __len__(self):
+      return self._rows
+
+  def extended(self, chunk: pd.DataFrame, first, last, in_order: bool, newest: list) -> 'HostPartition':
+      """A new partition with a chunk of this host's rows added.
+
+      first/last are the chunk's smallest and largest timestamps, in_order
+      whether it is sorted, and newest its last (timestamp, row) pairs.
+      """
+      chunks = self._chunks + [chunk]
+      while len(chunks) >= MERGE_FANIN and len(chunks[-MERGE_FANIN]) <= sum(map(len, chunks[1 - MERGE_FANIN:])):
+          chunks[-MERGE_FANIN:] = [concat_frames(chunks[-MERGE_FANIN:])]
+      partition = HostPartition()
+      partition._chunks = chunks
+      partition._sorted = self._sorted and in_order and (self._max_timestamp is None or first >= self._max_timestamp)
+      partition._max_timestamp = last if self._max_timestamp is None else max(last, self._max_timestamp)
+      partition._rows = self._rows + len(chunk)
+
+      # Stable: of equal timestamps, the row appended later wins
+      candidates = self._tail + newest
+      candidates.sort(key=lambda pair: pair[0])
+      partition._tail = candidates[-2:]
+      return partition
+
+  @property
+  def latest(self) -> dict:
+      return self._tail[-1][1] if self._tail else {}
+
+  @property
+  def previous(self) -> dict:
+      return self._tail[-2][1] if len(self._tail) == 2 else {}
+
+  def frame(self) -> pd.DataFrame:
+      """All rows of the host in timestamp order (shared; do not modify)."""
+      chunks = self._chunks
+      if len(chunks) > 1 or not self._sorted:
+          frame = concat_frames(chunks)
+          if not self._sorted:
+              frame = frame.sort_values('timestamp', kind='stable', ignore_index=True)
+          # Same rows, just consolidated; a racing reader builds an equal frame
+          self._chunks = chunks = [frame]
+          self._sorted = True
+      return chunks[0] if chunks else pd.DataFrame()
+
+  def between(self, start=None, end=None) -> pd.DataFrame:
+      """Rows with start <= timestamp <= end, found by binary search."""
+      frame = self.frame()
+      if frame.empty:
+          return frame
+      timestamps = frame['timestamp']
+      lo = timestamps.searchsorted(start, side='left') if start is not None else 0
+      hi = timestamps.searchsorted(end, side='right') if end is not None else len(frame)
+      return frame.iloc[lo:hi]
+
+
+class HostPartitions:
+  """Sample rows partitioned by computer_name, with O(1) latest/previous lookups.
+
+  Immutable: with_rows() returns a new HostPartitions that shares every
+  partition the new rows did not touch.
+  """
+
+  def __init__(self, hosts=None):
+      self._hosts = hosts or {}
+      self._combined = None
+      self._latest = None
+
+  def with_rows(self, rows: pd.DataFrame) -> 'HostPartitions':
+      """A copy with rows routed to their host partitions.
+
+      The rows are split in one vectorized pass: grouped by host with a
+      stable sort (keeping file order within a host), then sliced, so the
+      cost depends on the number of new rows rather than on per-host work
+      in pandas.
+      """
+      if rows is None or rows.empty or 'computer_name' not in rows.columns:
+          return self
+      codes, hosts = pd.factorize(rows['computer_name'])
+      order = np.argsort(codes, kind='stable')
+      order = order[codes[order] >= 0]  # rows without a computer_name
+      if not len(order):
+          return self
+      grouped = rows.take(order).reset_index(drop=True)
+      codes = codes[order]
+      counts = np.bincount(codes, minlength=len(hosts))
+      ends = np.cumsum(counts)
+      starts = ends - counts
+
+      timestamps = grouped['timestamp'].to_numpy()
+      firsts = np.minimum.reduceat(timestamps, starts)
+      lasts = np.maximum.reduceat(timestamps, starts)
+      # A host is out of order if its timestamps ever decrease within its group
+      unsorted = np.zeros(len(hosts), dtype=bool)
+      drops = np.nonzero(timestamps[1:] < timestamps[:-1])[0] + 1
+      drops = drops[codes[drops] == codes[drops - 1]]
+      unsorted[codes[drops]] = True
+
+      # Last two rows of every in-order host, converted to dicts in one call
+      tail_positions = np.concatenate([ends - 2, ends - 1])
+      tail_positions = tail_positions[tail_positions >= np.concatenate([starts, starts])]
+      tail_positions.sort()
+      tails = {}
+      for position, record in zip(tail_positions, records(grouped.take(tail_positions))):
+          tails.setdefault(codes[position], []).append((record['timestamp'], record))
+
+      partitions = dict(self._hosts)
+      for code, host in enumerate(hosts):
+          chunk = grouped.iloc[starts[code]:ends[code]]
+          if unsorted[code]:
+              ordered = chunk.sort_values('timestamp', kind='stable').iloc[-2:]
+              newest = [(record['timestamp'], record) for record in records(ordered)]
+          else:
+              newest = tails[code]
+          partition = partitions.get(host) or HostPartition()
+          partitions[host] = partition.extended(
+              chunk, pd.Timestamp(firsts[code]), pd.Timestamp(lasts[code]), not unsorted[code], newest)
+      return HostPartitions(partitions)
+
+  def hosts(self) -> list:
+      return list(self._hosts)
+
+  def get(self, host):
+      return self._hosts.get(host)
+
+  def latest(self, host) -> dict:
+      partition = self._hosts.get(host)
+      return partition.latest if partition is not None else {}
+
+  def previous(self, host) -> dict:
+      partition = self._hosts.get(host)
+      return partition.previous if partition is not None else {}
+
+  def latest_frame(self) -> pd.DataFrame:
+      """The latest row of every host, one per row, built once per instance."""
+      latest = self._latest
+      if latest is None:
+          latest = self._latest = pd.DataFrame.from_records(
+              [partition.latest for partition in self._hosts.values() if partition.latest])
+      return latest
+
+  def between(self, host, start=None, end=None) -> pd.DataFrame:
+      partition = self._hosts.get(host)
+      return partition.between(start, end) if partition is not None else pd.DataFrame()
+
+  def frame(self) -> pd.DataFrame:
+      """Every host's rows in one timestamp-sorted frame, built once per instance."""
+      combined = self._combined
+      if combined is None:
+          frames = [partition.frame() for partition in self._hosts.values()]
+          combined = self._combined = (
+              concat_frames(frames).sort_values('timestamp', kind='stable', ignore_index=True)
+              if frames else pd.DataFrame()
+          )
+      return combined
@@ -0,0 +1,73 @@
+# app/data/rates.py
+import numpy as np
+import pandas as pd
+
+# Throughput column derived from each cumulative byte counter
+RATE_COLUMNS = {
+  'upload_speed_mbps': 'network_bytes_sent',
+  'download_speed_mbps': 'network_bytes_recv'
+}
+
+# Readings further apart than this (seconds) span a collector outage, not one interval
+DEFAULT_MAX_GAP = 300
+
+def _rates(times: np.ndarray, values: np.ndarray, codes: np.ndarray, max_gap: float) -> np.ndarray:
+  seconds = np.diff(times) / np.timedelta64(1, 's')
+  delta = np.diff(values)
+  # NaN readings compare False, so they drop out with the rest
+  valid = (delta >= 0) & (seconds > 0) & (seconds <= max_gap)
+  if codes is not None:
+      valid &= codes[1:] == codes[:-1]
+  rates = np.full(len(values), np.nan)
+  rates[1:] = np.where(valid, delta * 8 / 1_000_000 / np.where(valid, seconds, 1), np.nan)
+  return rates
+
+def counter_rates(timestamps, counters, hosts=None, max_gap: float = DEFAULT_MAX_GAP) -> np.ndarray:
+  """Decimal megabits per second between consecutive readings of a byte counter.
+
+  Each row's rate covers the interval since the previous reading of the
+  same host (rows must be in time order per host; hosts may interleave).
+  It is NaN for a host's first reading, across a gap longer than max_gap
+  seconds, next to a missing reading, and where the counter went down:
+  a reboot, a restarted collector or a wrapped 32-bit counter reset it,
+  so the bytes moved in that interval are unknown rather than negative.
+  """
+  times = np.asarray(timestamps, dtype='datetime64[ns]')
+  values = pd.Series(counters).to_numpy(dtype='float64', na_value=np.nan)
+  if hosts is None:
+      return _rates(times, values, None, max_gap)
+  codes = pd.factorize(pd.Series(hosts))[0]
+  # Group each host's readings together, keeping their order, and scatter the rates back
+  order = np.argsort(codes, kind='stable')
+  rates = np.empty(len(values))
+  rates[order] = _rates(times[order], values[order], codes[order], max_gap)
+  return rates
+
+def with_rates(frame: pd.DataFrame, metrics: list, max_gap: float = DEFAULT_MAX_GAP) -> pd.DataFrame:
+  """frame with the rate columns among metrics derived from its byte counters.
+
+  Derived values replace any stored in the frame. Per host when the
+  frame has a computer_name column.
+  """
+  hosts = frame['computer_name'] if 'computer_name' in frame.columns else None
+  derived = {
+      metric: counter_rates(frame['timestamp'], frame[counter], hosts, max_gap)
+      for metric, counter in RATE_COLUMNS.items()
+      if metric in metrics and counter in frame.columns
+  }
+  return frame.assign(**derived) if derived else frame
+
+def latest_rates(latest: dict, previous: dict, max_gap: float = DEFAULT_MAX_GAP) -> dict:
+  """The rate columns of a host's latest reading, from its previous reading.
+
+  None where counter_rates would give NaN (no previous reading, a reset
+  or a gap), so the values serialize as blanks rather than NaN.
+  """
+  timestamps = [previous.get('timestamp'), latest.get('timestamp')]
+  rates = {}
+  for metric, counter in RATE_COLUMNS.items():
+      if counter not in latest:
+          continue
+      rate = counter_rates(timestamps, [previous.get(counter), latest.get(counter)], max_gap=max_gap)[1]
+      rates[metric] = None if np.isnan(rate) else float(rate)
+  return rates
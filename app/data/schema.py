@@ -0,0 +1,77 @@
+# app/data/schema.py
+import importlib.util
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from monitoring.samples import FIELDNAMES, SUMMARY_FIELDNAMES
+
+# Values repeated on every row of a host are stored once per frame
+CATEGORY_COLUMNS = ['computer_name', 'local_ip', 'public_ip'] + [name for name in FIELDNAMES if name.endswith('_status')]
+# Monotonic byte counters; nullable because older rows may lack them
+COUNTER_COLUMNS = ['network_bytes_sent', 'network_bytes_recv']
+
+SAMPLE_DTYPES = {
+  **{name: 'category' for name in CATEGORY_COLUMNS},
+  **{name: 'UInt64' for name in COUNTER_COLUMNS},
+  # Percentages and speeds: float32 keeps ~7 significant digits, plenty for a gauge
+  **{name: 'float32' for name in FIELDNAMES + SUMMARY_FIELDNAMES
+     if name not in CATEGORY_COLUMNS + COUNTER_COLUMNS + ['timestamp']},
+}
+
+# The multithreaded pyarrow parser when it is installed, pandas' C parser otherwise
+CSV_ENGINE = 'pyarrow' if importlib.util.find_spec('pyarrow') is not None else 'c'
+
+# The parsers are slow at nullable integers; counters are parsed as int64/float64 and cast after
+PARSE_DTYPES = {name: dtype for name, dtype in SAMPLE_DTYPES.items() if name not in COUNTER_COLUMNS}
+
+def read_samples(source) -> pd.DataFrame:
+  """Parse sample CSV data with the explicit column types."""
+  df = pd.read_csv(source, dtype=PARSE_DTYPES, engine=CSV_ENGINE)
+  df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+  return apply_schema(df)
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+  """Cast the known columns of a frame from another source (e.g. SQLite) to the sample types."""
+  dtypes = {name: dtype for name, dtype in SAMPLE_DTYPES.items() if name in df.columns and df[name].dtype != dtype}
+  return df.astype(dtypes) if dtypes else df
+
+def concat_frames(frames: list) -> pd.DataFrame:
+  """Concatenate sample frames, keeping categorical columns categorical.
+
+  Chunks parsed separately have different categories, which pd.concat
+  would turn back into object columns; union_categoricals joins them
+  instead, recoding each chunk once.
+  """
+  if len(frames) == 1:
+      return frames[0]
+  columns = pd.concat([frame.iloc[:0] for frame in frames]).columns
+  categorical = {
+      name: union_categoricals([frame[name] for frame in frames], ignore_order=True)
+      for name in columns
+      if all(name in frame.columns and isinstance(frame[name].dtype, pd.CategoricalDtype) for frame in frames)
+  }
+  result = pd.concat([frame.drop(columns=list(categorical)) for frame in frames], ignore_index=True)
+  for name, values in categorical.items():
+      result[name] = values
+  return result[columns]
+
+def records(df: pd.DataFrame) -> list:
+  """to_dict('records') with plain Python values.
+
+  float32 values are rounded to what was parsed (9.8, not
+  9.800000190734863) and missing counters become None.
+  """
+  result = df.to_dict('records')
+  narrow = [name for name, dtype in df.dtypes.items() if dtype == np.float32]
+  nullable = [name for name in COUNTER_COLUMNS if name in df.columns]
+  for record in result:
+      for name in narrow:
+          value = record[name]
+          if value == value:
+              record[name] = float(f"{value:.7g}")
+      for name in nullable:
+          if record[name] is pd.NA:
+              record[name] = None
+  return result
@@ -0,0 +1,87 @@
+# app/data/store.py
+import threading
+import time
+from typing import NamedTuple
+
+from .csv_reader import IncrementalCsvReader
+from .partitions import HostPartitions
+from ..utils.logger import logger
+
+class Snapshot(NamedTuple):
+  """One immutable version of the sample data."""
+  version: int
+  partitions: HostPartitions
+
+
+class DataStore:
+  """Process-wide sample data behind a monotonically increasing version.
+
+  Readers take the current Snapshot with a plain attribute read and never
+  lock. refresh() is single-flight: one caller polls the CSV while any
+  concurrent callers wait for that load instead of starting their own.
+  Polls closer together than min_interval seconds return the current
+  snapshot, so the callbacks fired by one dashboard tick share one poll.
+  """
+
+  def __init__(self, csv_path: str, min_interval: float = 1.0):
+      self.csv_path = csv_path
+      self.min_interval = min_interval
+      self._reader = IncrementalCsvReader(csv_path)
+      self._snapshot = Snapshot(0, HostPartitions())
+      self._checked_at = None
+      self._loading = False
+      self._condition = threading.Condition()
+
+  def snapshot(self) -> Snapshot:
+      """The current snapshot, without polling the file."""
+      return self._snapshot
+
+  @property
+  def version(self) -> int:
+      return self._snapshot.version
+
+  def changed_since(self, version) -> bool:
+      """Whether the data moved past version (None: never seen)."""
+      return version is None or self._snapshot.version > version
+
+  def refresh(self) -> Snapshot:
+      """Poll the CSV unless it was polled recently and return the current snapshot."""
+      with self._condition:
+          if self._loading:
+              while self._loading:
+                  self._condition.wait()
+              return self._snapshot
+          if self._checked_at is not None and time.monotonic() - self._checked_at < self.min_interval:
+              return self._snapshot
+          self._loading = True
+      try:
+          self._load()
+      finally:
+          with self._condition:
+              self._checked_at = time.monotonic()
+              self._loading = False
+              self._condition.notify_all()
+      return self._snapshot
+
+  def _load(self):
+      # Only the single-flight owner gets here, so the reader needs no lock
+      current = self._snapshot
+      try:
+          reset, rows = self._reader.poll()
+      except FileNotFoundError:
+          logger.error(f"Data file not found: {self.csv_path}")
+          if current.partitions.hosts():
+              self._publish(HostPartitions())
+          return
+      except Exception as e:
+          logger.error(f"Error reading data: {str(e)}")
+          return
+      if reset:
+          self._publish(HostPartitions().with_rows(rows))
+      elif rows is not None and not rows.empty:
+          self._publish(current.partitions.with_rows(rows))
+
+  def _publish(self, partitions: HostPartitions):
+      # A single reference assignment: readers see the old or the new snapshot
+      self._snapshot = Snapshot(self._snapshot.version + 1, partitions)
+      logger.debug(f"Data version {self._snapshot.version}")
@@ -2,7 +2,7 @@
 import dash_bootstrap_components as dbc
 from dash import html, dcc
 from .header import create_header
-from .metrics_dashboard import create_system_metrics, create_services_status, create_network_metrics
+from .metrics_dashboard import create_system_metrics, create_services_status, create_network_metrics, create_fleet_overview
 
 def create_layout():
   return html.Div([
@@ -18,7 +18,27 @@ def create_layout():
                               placeholder="Select a computer...",
                               className="mb-2"
                           ),
-                          html.Div(id="last-update-time", className="text-muted small")
+                          html.Div(id="last-update-time", className="text-muted small"),
+                          html.Label("Time range", className="text-muted small mt-2"),
+                          dcc.Dropdown(
+                              id='time-range-preset',
+                              options=[
+                                  {'label': 'Last hour', 'value': '1h'},
+                                  {'label': 'Last 6 hours', 'value': '6h'},
+                                  {'label': 'Last 24 hours', 'value': '24h'},
+                                  {'label': 'Last 7 days', 'value': '7d'},
+                                  {'label': 'Last 30 days', 'value': '30d'},
+                                  {'label': 'Custom dates', 'value': 'custom'}
+                              ],
+                              value='1h',
+                              clearable=False,
+                              className="mb-2"
+                          ),
+                          dcc.DatePickerRange(
+                              id='time-range-dates',
+                              display_format='YYYY-MM-DD',
+                              style={'display': 'none'}
+                          )
                       ])
                   ], className="mb-3"),
                   html.Div(id="alerts-container")  # Container for alerts
@@ -47,11 +67,20 @@ def create_layout():
                           label="Network Metrics",
                           tab_id="network-metrics-tab"
                       ),
+                      dbc.Tab(
+                          dbc.Row([
+                              dbc.Col(create_fleet_overview(), width=12)
+                          ]),
+                          label="Fleet Overview",
+                          tab_id="fleet-overview-tab"
+                      ),
                   ], id="metrics-tabs", active_tab="system-metrics-tab")
               ], width=12, lg=9)
           ])
       ], fluid=True),
       dcc.Interval(id='metrics-update-interval', interval=60000),  # 60 seconds
+      dcc.Store(id='data-version'),  # bumped only when the data changes
+      dcc.Store(id='graph-width'),  # window width in pixels, sets the graph point budget
       dcc.Store(id='theme-store'),
       dcc.Download(id="download-data")
   ])
\ No newline at end of file
@@ -1,7 +1,8 @@
 # app/layouts/metrics_dashboard.py
 import dash_bootstrap_components as dbc
-from dash import html, dcc
+from dash import html, dcc, dash_table
 from app.components.cards import create_metric_card
+from app.utils.alerts import get_alert_system
 
 def create_system_metrics(computer_name):
     return dbc.Card([
@@ -89,6 +90,59 @@ def create_network_metrics():
                 dbc.Col([
                     dcc.Graph(id="network-metrics-graph")
                 ])
+            ]),
+            dbc.Row([
+                dbc.Col([
+                    dcc.Graph(id="network-usage-graph")
+                ])
             ])
         ])
     ], className="mb-4")
+
+FLEET_COLUMNS = [
+    {"name": "Computer", "id": "computer_name"},
+    {"name": "CPU %", "id": "cpu_usage", "type": "numeric"},
+    {"name": "Memory %", "id": "memory_usage", "type": "numeric"},
+    {"name": "Disk %", "id": "disk_usage", "type": "numeric"},
+    {"name": "Services up", "id": "services_running", "type": "numeric"},
+    {"name": "Down", "id": "services_down"},
+    {"name": "Last seen", "id": "last_seen"},
+    {"name": "Minutes stale", "id": "stale_minutes", "type": "numeric"},
+]
+
+LEVEL_COLORS = {'danger': '#f8d7da', 'warning': '#fff3cd'}
+
+def fleet_highlights():
+    """Cell colors for the fleet grid, from the threshold alert rules in config.json."""
+    styles = [{'if': {'filter_query': '{services_down} != ""', 'column_id': 'services_down'},
+               'backgroundColor': LEVEL_COLORS['danger']}]
+    columns = {column['id'] for column in FLEET_COLUMNS if column.get('type') == 'numeric'}
+    for rule in get_alert_system().engine.rules:
+        op = rule.params.get('op')
+        if rule.kind != 'threshold' or rule.metric not in columns or op not in ('>', '>=', '<', '<='):
+            continue
+        styles.append({
+            'if': {'filter_query': f"{{{rule.metric}}} {op} {rule.params['value']}", 'column_id': rule.metric},
+            'backgroundColor': LEVEL_COLORS.get(rule.level, LEVEL_COLORS['warning'])
+        })
+    return styles
+
+def create_fleet_overview():
+    return dbc.Card([
+        dbc.CardHeader(html.H4("Fleet Overview", className="mb-0")),
+        dbc.CardBody([
+            html.Div(id="fleet-summary", className="text-muted small mb-2"),
+            dash_table.DataTable(
+                id="fleet-table",
+                columns=FLEET_COLUMNS,
+                sort_action="native",
+                filter_action="native",
+                sort_by=[{"column_id": "stale_minutes", "direction": "desc"}],
+                page_size=50,
+                style_table={'overflowX': 'auto'},
+                style_cell={'textAlign': 'left', 'padding': '5px'},
+                style_header={'fontWeight': 'bold'},
+                style_data_conditional=fleet_highlights()
+            )
+        ])
+    ], className="mb-4")
@@ -1,64 +1,53 @@
 # app/utils/alerts.py
+import os
+import threading
 from typing import List, Dict
-from ..utils.config import config
+
+from monitoring.rules import RuleEngine, load_rules
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 class AlertSystem:
-    def __init__(self):
-        self.cpu_threshold = config.get('monitoring.thresholds.cpu', 90)
-        self.memory_threshold = config.get('monitoring.thresholds.memory', 85)
-        self.disk_threshold = config.get('monitoring.thresholds.disk', 85)
-    
-    def check_metrics(self, metrics: Dict) -> List[Dict]:
-        alerts = []
-        
-        # Check CPU Usage
-        if metrics['cpu_usage'] > self.cpu_threshold:
-            alerts.append({
-                'level': 'danger',
-                'message': f"CPU usage is critical: {metrics['cpu_usage']}%"
-            })
-        elif metrics['cpu_usage'] > self.cpu_threshold * 0.8:
-            alerts.append({
-                'level': 'warning',
-                'message': f"CPU usage is high: {metrics['cpu_usage']}%"
-            })
-        
-        # Check Memory Usage
-        if metrics['memory_usage'] > self.memory_threshold:
-            alerts.append({
-                'level': 'danger',
-                'message': f"Memory usage is critical: {metrics['memory_usage']}%"
-            })
-        elif metrics['memory_usage'] > self.memory_threshold * 0.8:
-            alerts.append({
-                'level': 'warning',
-                'message': f"Memory usage is high: {metrics['memory_usage']}%"
-            })
-        
-        # Check Disk Usage
-        if metrics['disk_usage'] > self.disk_threshold:
-            alerts.append({
-                'level': 'danger',
-                'message': f"Disk usage is critical: {metrics['disk_usage']}%"
-            })
-        elif metrics['disk_usage'] > self.disk_threshold * 0.8:
-            alerts.append({
-                'level': 'warning',
-                'message': f"Disk usage is high: {metrics['disk_usage']}%"
-            })
-        
-        return alerts
-    
-    def check_services(self, services: Dict) -> List[Dict]:
-        alerts = []
-        
-        for service_name, status in services.items():
-            if status != "Running":
-                alerts.append({
-                    'level': 'danger',
-                    'message': f"{service_name} is not running"
-                })
-        
-        return alerts
+    """Dashboard side of the shared alert rules in config.json.
+
+    The engine is compiled once and fed each host's new samples in order,
+    so the dashboard fires on the same sustained conditions as the collector.
+    """
+
+    def __init__(self, rules=None):
+        if rules is None:
+            rules = load_rules(os.path.join(PROJECT_ROOT, 'config.json'))
+        self.engine = RuleEngine.from_config(rules)
+        # Callbacks can run concurrently; rule state must advance in order
+        self._lock = threading.Lock()
+
+    @property
+    def metrics(self) -> List[str]:
+        """Columns the rules read."""
+        return self.engine.metrics
+
+    @property
+    def lookback_hours(self) -> float:
+        """History needed to evaluate every rule from scratch."""
+        return max(self.engine.lookback / 3600, 1 / 60)
+
+    def update(self, computer_name: str, history) -> List[Dict]:
+        """Feed samples (a DataFrame of timestamp plus metric columns) and return the active alerts."""
+        with self._lock:
+            if not history.empty:
+                for record in history.to_dict('records'):
+                    self.engine.evaluate(computer_name, record.pop('timestamp').timestamp(), record)
+            active = self.engine.active(computer_name)
+        return [{'level': alert.level, 'message': alert.message} for alert in active]
 
+_alert_system = None
+_alert_system_lock = threading.Lock()
 
+def get_alert_system() -> AlertSystem:
+    """The dashboard's AlertSystem, compiled from config.json on first use."""
+    global _alert_system
+    if _alert_system is None:
+        with _alert_system_lock:
+            if _alert_system is None:
+                _alert_system = AlertSystem()
+    return _alert_system
@@ -9,7 +9,7 @@ class ConfigManager:
     def __new__(cls):
         if not cls._instance:
             cls._instance = super().__new__(cls)
-            cls._instance._load_config()
+            cls._instance._config = None
         return cls._instance
     
     def _load_config(self):
@@ -18,6 +18,9 @@ class ConfigManager:
             self._config = yaml.safe_load(file)
     
     def get(self, key: str, default: Any = None) -> Any:
+        if self._config is None:
+            # Read on first use so importing the app has no file I/O
+            self._load_config()
         keys = key.split('.')
         value = self._config
         for k in keys:
@@ -5,13 +5,17 @@ from logging.handlers import RotatingFileHandler
 from .config import config
 
 def setup_logger():
+    """Attach the file and console handlers; called once at startup by run.py."""
+    logger = logging.getLogger('FranchiseMonitor')
+    if logger.handlers:
+        return logger
+
     log_dir = 'logs'
     os.makedirs(log_dir, exist_ok=True)
     
     log_file = config.get('logging.file', 'logs/franchise_monitor.log')
     log_level = getattr(logging, config.get('logging.level', 'INFO').upper())
     
-    logger = logging.getLogger('FranchiseMonitor')
     logger.setLevel(log_level)
     
     # File Handler
@@ -35,4 +39,5 @@ def setup_logger():
     
     return logger
 
-logger = setup_logger()
\ No newline at end of file
+# Handlers are added by setup_logger(), not at import time
+logger = logging.getLogger('FranchiseMonitor')
@@ -0,0 +1,89 @@
+# benchmarks/bench_counter_rates.py
+"""Time throughput derivation from cumulative byte counters: per-row loop vs vectorized.
+
+A synthetic fleet history, interleaved in time order as server_data.csv
+is, with counter resets (reboots) and collector outages. The loop keeps
+the previous reading per host as the collector used to; counter_rates
+diffs whole arrays, grouping hosts with one stable argsort. Both must
+agree, including NaN for resets, gaps and each host's first reading.
+The loop only runs on the first --loop-rows rows. Run from the
+repository root:
+
+    python -m benchmarks.bench_counter_rates [--rows 3000000] [--hosts 1000] [--loop-rows 300000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.data.rates import DEFAULT_MAX_GAP, counter_rates
+
+
+def fleet_counters(rows, hosts, interval=10, reset_rate=1e-4, outage_rate=1e-3, seed=0):
+    """(timestamps, counters, host names) of interleaved hosts."""
+    rng = np.random.default_rng(seed)
+    host_ids = np.arange(rows) % hosts
+    # An outage delays every later reading of the fleet by an hour
+    steps = np.where(rng.random(rows // hosts + 1) < outage_rate, 3600, interval)
+    offsets = np.cumsum(steps)[np.arange(rows) // hosts]
+    timestamps = pd.Timestamp('2026-01-01') + pd.to_timedelta(offsets, unit='s')
+    traffic = rng.exponential(50_000, rows).astype(np.int64)
+    counters = np.empty(rows, dtype=np.int64)
+    for host in range(hosts):
+        moved = traffic[host::hosts].copy()
+        # A reset starts the counter again from the bytes since the reboot
+        resets = np.flatnonzero(rng.random(len(moved)) < reset_rate)
+        totals = np.cumsum(moved)
+        for reset in resets:
+            totals[reset:] -= totals[reset] - moved[reset]
+        counters[host::hosts] = totals
+    names = np.array([f'FRANCHISE-{i:04d}' for i in range(hosts)])[host_ids]
+    return timestamps, pd.array(counters, dtype='UInt64'), pd.Categorical(names)
+
+
+def loop_rates(timestamps, counters, hosts, max_gap=DEFAULT_MAX_GAP):
+    """One reading at a time, with the previous reading kept per host."""
+    previous = {}
+    rates = []
+    for timestamp, counter, host in zip(timestamps, counters, hosts):
+        rate = np.nan
+        if host in previous:
+            last_time, last_counter = previous[host]
+            seconds = (timestamp - last_time).total_seconds()
+            if 0 < seconds <= max_gap and counter >= last_counter:
+                rate = (counter - last_counter) * 8 / 1_000_000 / seconds
+        previous[host] = (timestamp, counter)
+        rates.append(rate)
+    return np.array(rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--hosts', type=int, default=1000)
+    parser.add_argument('--loop-rows', type=int, default=300_000)
+    args = parser.parse_args()
+
+    timestamps, counters, hosts = fleet_counters(args.rows, args.hosts)
+
+    start = time.perf_counter()
+    rates = counter_rates(timestamps, counters, hosts)
+    vectorized = time.perf_counter() - start
+
+    n = min(args.loop_rows, args.rows)
+    start = time.perf_counter()
+    expected = loop_rates(timestamps[:n], counters[:n], hosts[:n])
+    looped = time.perf_counter() - start
+    assert np.allclose(counter_rates(timestamps[:n], counters[:n], hosts[:n]), expected, equal_nan=True)
+
+    print(f"{args.rows:,} rows, {args.hosts} hosts, {np.isnan(rates).sum():,} rows without a rate "
+          f"(first readings, resets, gaps)")
+    print(f"{'':>11} {'s per million rows':>19}")
+    print(f"{'loop':>11} {looped / n * 1_000_000:>19.3f}")
+    print(f"{'vectorized':>11} {vectorized / args.rows * 1_000_000:>19.3f}")
+    print(f"speedup: {looped / n / (vectorized / args.rows):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
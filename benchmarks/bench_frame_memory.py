@@ -0,0 +1,92 @@
+# benchmarks/bench_frame_memory.py
+"""Measure memory per million sample rows with inferred vs explicit column types.
+
+A synthetic fleet history is written to a temporary server_data.csv and
+parsed twice: the way read_data used to (pandas infers object strings and
+float64) and with app.data.schema (categoricals, float32, UInt64). Memory
+is DataFrame.memory_usage(deep=True). Run from the repository root:
+
+    python -m benchmarks.bench_frame_memory [--rows 1000000] [--hosts 1000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.data.schema import CSV_ENGINE, read_samples
+from monitoring.samples import FIELDNAMES
+
+STATUSES = np.array(['Running', 'Stopped', 'Unknown'])
+
+
+def write_fleet_csv(path, rows, hosts, seed=0):
+    """Interleaved samples from hosts, with realistic value ranges."""
+    rng = np.random.default_rng(seed)
+    host_ids = np.arange(rows) % hosts
+    names = np.array([f'FRANCHISE-{i:04d}' for i in range(hosts)])
+    local_ips = np.array([f'192.168.{i // 250}.{i % 250 + 2}' for i in range(hosts)])
+    public_ips = np.array([f'154.159.{i // 250}.{i % 250 + 2}' for i in range(hosts)])
+    start = pd.Timestamp('2026-01-01')
+    frame = pd.DataFrame({
+        'timestamp': (start + pd.to_timedelta((np.arange(rows) // hosts) * 60, unit='s')).strftime('%Y-%m-%dT%H:%M:%S.%f'),
+        'computer_name': names[host_ids],
+        'cpu_usage': rng.uniform(0, 100, rows).round(1),
+        'memory_usage': rng.uniform(20, 95, rows).round(1),
+        'disk_usage': rng.uniform(30, 90, rows).round(1),
+        'network_bytes_sent': rng.integers(0, 2**40, rows),
+        'network_bytes_recv': rng.integers(0, 2**40, rows),
+        'upload_speed_mbps': rng.exponential(2, rows).round(2),
+        'download_speed_mbps': rng.exponential(5, rows).round(2),
+        'local_ip': local_ips[host_ids],
+        'public_ip': public_ips[host_ids],
+    })
+    for column in FIELDNAMES:
+        if column.endswith('_status'):
+            frame[column] = STATUSES[rng.choice(3, rows, p=[0.95, 0.04, 0.01])]
+    frame['internet_upload_speed'] = rng.uniform(1, 50, rows).round(2)
+    frame['internet_download_speed'] = rng.uniform(1, 100, rows).round(2)
+    frame[FIELDNAMES].to_csv(path, index=False)
+
+
+def legacy_read(path):
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601')
+    return df
+
+
+def measure(read, path):
+    start = time.perf_counter()
+    df = read(path)
+    return df, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--hosts', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'server_data.csv')
+        write_fleet_csv(path, args.rows, args.hosts)
+        print(f"{args.rows:,} rows, {args.hosts} hosts, {os.path.getsize(path) / 2**20:.0f} MiB on disk, engine={CSV_ENGINE}")
+
+        results = {}
+        for name, read in (('inferred', legacy_read), ('schema', read_samples)):
+            df, seconds = measure(read, path)
+            results[name] = df.memory_usage(deep=True, index=False)
+            per_million = results[name].sum() / 2**20 * 1_000_000 / len(df)
+            print(f"{name:>9}: {per_million:8.1f} MiB per million rows, parsed in {seconds:.2f}s")
+            del df
+
+    print(f"\n{'column':>24} {'inferred MiB':>13} {'schema MiB':>11}")
+    for column in FIELDNAMES:
+        print(f"{column:>24} {results['inferred'][column] / 2**20:>13.1f} {results['schema'][column] / 2**20:>11.1f}")
+    print(f"memory saved: {1 - results['schema'].sum() / results['inferred'].sum():.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_host_partitions.py
+"""Compare fleet-wide boolean masks with per-host partitions for dashboard lookups.
+
+One dashboard tick for a selected host reads its latest row, previous row,
+service status and the last hour of history. The legacy path masks the
+whole fleet frame for each; the partitioned path uses HostPartitions.
+Run from the repository root (1,000 hosts x 30 days at 15-minute samples
+is ~2.9M rows and needs a few GB of memory):
+
+    python -m benchmarks.bench_host_partitions [--hosts 1000] [--days 30] [--interval 900] [--polls 200]
+
+The poll series appends one sample per host per poll, as the collector
+does, and reports the worst poll as well as the mean: every host merges
+its chunks on the same polls, so a spike there stalls the refresh.
+"""
+import argparse
+import time
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from app.data.partitions import HostPartitions
+
+STATUS_COLUMNS = ['smartcare_status', 'sql_server_status', 'smartlink_status', 'etims_status', 'tims_status']
+
+
+def fleet_frame(hosts, days, interval, seed=0):
+    """Synthetic fleet history in file order: samples interleaved across hosts."""
+    rng = np.random.default_rng(seed)
+    steps = days * 86400 // interval
+    end = pd.Timestamp.now().floor('s')
+    times = pd.date_range(end=end, periods=steps, freq=f'{interval}s')
+    n = steps * hosts
+    frame = pd.DataFrame({
+        'timestamp': np.repeat(times.values, hosts),
+        'computer_name': np.tile([f'FRANCHISE-{i:04d}' for i in range(hosts)], steps),
+        'cpu_usage': rng.uniform(0, 100, n).round(1),
+        'memory_usage': rng.uniform(20, 95, n).round(1),
+        'disk_usage': rng.uniform(30, 90, n).round(1),
+    })
+    for column in STATUS_COLUMNS:
+        frame[column] = np.where(rng.random(n) < 0.98, 'Running', 'Stopped')
+    return frame
+
+
+def legacy_tick(df, host, cutoff):
+    mask = df['computer_name'] == host
+    latest = df[mask].iloc[-1].to_dict()
+    previous = df[df['computer_name'] == host].iloc[-2].to_dict()
+    services = df[df['computer_name'] == host].iloc[-1][STATUS_COLUMNS].to_dict()
+    history = df[(df['computer_name'] == host) & (df['timestamp'] >= cutoff)].sort_values('timestamp')
+    return latest, previous, services, history
+
+
+def partitioned_tick(partitions, host, cutoff):
+    latest = partitions.latest(host)
+    previous = partitions.previous(host)
+    services = {column: latest.get(column) for column in STATUS_COLUMNS}
+    history = partitions.between(host, start=cutoff)
+    return latest, previous, services, history
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--interval', type=int, default=900, help='seconds between samples per host')
+    parser.add_argument('--polls', type=int, default=200, help='appends in the poll series')
+    args = parser.parse_args()
+
+    df = fleet_frame(args.hosts, args.days, args.interval)
+    print(f"{len(df):,} rows, {args.hosts} hosts, {args.days} days")
+
+    start = time.perf_counter()
+    partitions = HostPartitions().with_rows(df)
+    print(f"partitioning: {(time.perf_counter() - start) * 1000:.0f} ms (once, on full reload)")
+
+    host = f'FRANCHISE-{args.hosts // 2:04d}'
+    cutoff = df['timestamp'].iloc[-1] - pd.Timedelta(hours=1)
+    assert legacy_tick(df, host, cutoff)[0] == partitioned_tick(partitions, host, cutoff)[0]
+
+    runs = 5
+    legacy = timeit.timeit(lambda: legacy_tick(df, host, cutoff), number=runs) / runs * 1000
+    indexed = timeit.timeit(lambda: partitioned_tick(partitions, host, cutoff), number=runs * 100) / (runs * 100) * 1000
+    print(f"{'':>12} {'legacy ms':>10} {'partitioned ms':>15} {'speedup':>8}")
+    print(f"{'tick':>12} {legacy:>10.2f} {indexed:>15.3f} {legacy / indexed:>7.0f}x")
+
+    # One new sample per host, as after a collection interval
+    last = df['timestamp'].iloc[-1]
+    new_rows = fleet_frame(args.hosts, 1, 86400, seed=1)
+    new_rows['timestamp'] = last + pd.Timedelta(seconds=args.interval)
+    start = time.perf_counter()
+    partitions = partitions.with_rows(new_rows)
+    append_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    partitioned_tick(partitions, host, cutoff)
+    consolidate_ms = (time.perf_counter() - start) * 1000
+    print(f"append {len(new_rows)} rows: {append_ms:.1f} ms; first read of a host after it: {consolidate_ms:.2f} ms")
+
+    poll_ms = []
+    for poll in range(2, args.polls + 2):
+        new_rows['timestamp'] = last + pd.Timedelta(seconds=args.interval * poll)
+        start = time.perf_counter()
+        partitions = partitions.with_rows(new_rows)
+        poll_ms.append((time.perf_counter() - start) * 1000)
+    worst = int(np.argmax(poll_ms))
+    print(f"{args.polls} polls of {len(new_rows)} rows: mean {np.mean(poll_ms):.1f} ms, "
+          f"p99 {np.percentile(poll_ms, 99):.1f} ms, worst {poll_ms[worst]:.1f} ms (poll {worst + 1}); "
+          f"{len(partitions.get(host)._chunks)} chunks per host after")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_ingest_load.py
+"""Load test for the ingest service: how many samples per second one process commits.
+
+Starts IngestService in-process on a temporary SQLite database and drives
+it with many concurrent simulated collectors posting gzip batches:
+
+    python -m benchmarks.bench_ingest_load --collectors 300 --batches 20 --rows 30
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import aiohttp
+from aiohttp import web
+
+from monitoring.ingest import IngestService
+from monitoring.storage import SqliteSampleWriter
+
+
+def make_batch(host, start, rows):
+    return {
+        'batch_id': str(uuid.uuid4()),
+        'rows': [{
+            'timestamp': (start + timedelta(seconds=10 * i)).isoformat(timespec='microseconds'),
+            'computer_name': host,
+            'cpu_usage': 12.5, 'memory_usage': 61.0, 'disk_usage': 48.2,
+            'network_bytes_sent': 1000 * i, 'network_bytes_recv': 4000 * i,
+            'upload_speed_mbps': 0.4, 'download_speed_mbps': 2.1,
+            'local_ip': '10.0.0.5', 'public_ip': '203.0.113.9',
+            'smartcare_status': 'Running', 'sql_server_status': 'Running',
+            'smartlink_status': 'Running', 'etims_status': 'Stopped', 'tims_status': 'Running',
+            'internet_upload_speed': 9.8, 'internet_download_speed': 24.3
+        } for i in range(rows)]
+    }
+
+
+async def collector(session, url, host, batches, rows, throttled):
+    start = datetime(2024, 1, 1)
+    for b in range(batches):
+        batch = make_batch(host, start + timedelta(seconds=10 * rows * b), rows)
+        body = gzip.compress(json.dumps(batch).encode())
+        headers = {'Content-Encoding': 'gzip', 'Content-Type': 'application/json',
+                   'Idempotency-Key': batch['batch_id']}
+        while True:
+            async with session.post(url, data=body, headers=headers) as response:
+                if response.status == 429:
+                    throttled[0] += 1
+                    await asyncio.sleep(float(response.headers.get('Retry-After', 1)) / 10)
+                    continue
+                response.raise_for_status()
+                break
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        service = IngestService(SqliteSampleWriter(os.path.join(tmp, 'ingest.db')),
+                                max_queued_rows=args.max_queued_rows)
+        runner = web.AppRunner(service.create_app())
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f'http://127.0.0.1:{port}/ingest'
+
+        total = args.collectors * args.batches * args.rows
+        throttled = [0]
+        connector = aiohttp.TCPConnector(limit=args.collectors)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            start = time.perf_counter()
+            await asyncio.gather(*(collector(session, url, f'HOST{i:04d}', args.batches, args.rows, throttled)
+                                   for i in range(args.collectors)))
+            accepted = time.perf_counter() - start
+            while service.rows_committed.value() < total:
+                await asyncio.sleep(0.01)
+            committed = time.perf_counter() - start
+
+        print(f"collectors={args.collectors} batches/collector={args.batches} rows/batch={args.rows}")
+        print(f"accepted {total} samples in {accepted:.2f}s ({total / accepted:,.0f} samples/s)")
+        print(f"committed {total} samples in {committed:.2f}s ({total / committed:,.0f} samples/s)")
+        print(f"429 responses: {throttled[0]}, "
+              f"mean commit latency: {service.commit_latency.sum() / service.commit_latency.count():.3f}s")
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--collectors', type=int, default=300)
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=30)
+    parser.add_argument('--max-queued-rows', type=int, default=50000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
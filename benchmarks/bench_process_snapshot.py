@@ -0,0 +1,69 @@
+# benchmarks/bench_process_snapshot.py
+"""Compare per-application process scans with one indexed snapshot per cycle.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_process_snapshot
+"""
+import random
+import string
+import timeit
+
+from monitoring.processes import ProcessSnapshot
+
+APP_NAMES = ['SmartCareProcessName', 'sqlservr', 'SmartLinkProcessName', 'ETIMSProcessName', 'TIMSProcessName']
+SIZES = [250, 1000, 4000, 16000]
+
+
+def fake_process_table(count, seed=0):
+    """Build a process table with a realistic share of repeated names."""
+    rng = random.Random(seed)
+    names = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 14))) + '.exe'
+             for _ in range(max(50, count // 20))]
+    names.append('sqlservr.exe')
+    return [{
+        'pid': pid,
+        'name': rng.choice(names),
+        'cpu_percent': rng.random() * 5,
+        'memory_percent': rng.random() * 2,
+    } for pid in range(count)]
+
+
+def walk(processes):
+    """Stand-in for psutil.process_iter: every walk builds a fresh info dict per process."""
+    for proc in processes:
+        yield dict(proc)
+
+
+def legacy_cycle(processes):
+    """One cycle as the collector did it: one full scan per app, then one for ranking."""
+    for app in APP_NAMES:
+        needle = app.lower()
+        for proc in walk(processes):
+            name = proc['name'].lower()
+            if name == needle or needle in name:
+                break
+    ranked = [p for p in walk(processes) if p['cpu_percent'] > 0]
+    return sorted(ranked, key=lambda p: p['cpu_percent'], reverse=True)[:5]
+
+
+def snapshot_cycle(processes):
+    """One cycle with a single indexed snapshot."""
+    snapshot = ProcessSnapshot(list(walk(processes)))
+    for app in APP_NAMES:
+        snapshot.is_running(app)
+    return snapshot.top(5)
+
+
+def main():
+    print(f"{'processes':>10} {'legacy ms':>10} {'snapshot ms':>12} {'speedup':>8}")
+    for size in SIZES:
+        processes = fake_process_table(size)
+        runs = max(3, 20000 // size)
+        legacy = timeit.timeit(lambda: legacy_cycle(processes), number=runs) / runs * 1000
+        indexed = timeit.timeit(lambda: snapshot_cycle(processes), number=runs) / runs * 1000
+        print(f"{size:>10} {legacy:>10.3f} {indexed:>12.3f} {legacy / indexed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
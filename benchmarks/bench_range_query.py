@@ -0,0 +1,94 @@
+# benchmarks/bench_range_query.py
+"""Time arbitrary range queries on one host's history: boolean mask vs binary search.
+
+The legacy path masks the whole timestamp column for every query; the
+partitioned path finds the slice boundaries with searchsorted on the
+host's sorted timestamps and returns a zero-copy slice. The last row
+adds LTTB downsampling to a 1,000-point graph and the metric projection,
+as DataHandler.get_range() does. Each query picks a random window of one
+hour to one week. Run from the repository root (3M rows need about 1 GB
+of memory):
+
+    python -m benchmarks.bench_range_query [--rows 3000000] [--queries 200]
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.data.downsample import downsample
+from app.data.partitions import HostPartitions
+
+METRICS = ['cpu_usage', 'memory_usage', 'disk_usage']
+
+
+def host_frame(rows, interval=10, seed=0):
+    """Synthetic history of one host, one sample every interval seconds."""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().floor('s')
+    return pd.DataFrame({
+        'timestamp': pd.date_range(end=end, periods=rows, freq=f'{interval}s'),
+        'computer_name': 'FRANCHISE-0001',
+        **{metric: rng.uniform(0, 100, rows).round(1) for metric in METRICS},
+    })
+
+
+def legacy_range(df, start, end):
+    return df[(df['timestamp'] >= start) & (df['timestamp'] <= end)][['timestamp'] + METRICS]
+
+
+def partitioned_range(partitions, start, end):
+    return partitions.between('FRANCHISE-0001', start=start, end=end)
+
+
+def graph_range(partitions, start, end, max_points=1000):
+    return downsample(partitioned_range(partitions, start, end), METRICS, max_points)[['timestamp'] + METRICS]
+
+
+def time_queries(query, windows):
+    """Per-query durations in milliseconds."""
+    durations = []
+    for start, end in windows:
+        began = time.perf_counter()
+        query(start, end)
+        durations.append((time.perf_counter() - began) * 1000)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=3_000_000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    df = host_frame(args.rows)
+    partitions = HostPartitions().with_rows(df)
+    partitions.get('FRANCHISE-0001').frame()  # consolidate once, as the first read would
+    first, last = df['timestamp'].iloc[0], df['timestamp'].iloc[-1]
+    print(f"{len(df):,} rows from {first:%Y-%m-%d} to {last:%Y-%m-%d}")
+
+    rng = np.random.default_rng(1)
+    windows = []
+    for _ in range(args.queries):
+        length = pd.Timedelta(seconds=int(rng.integers(3600, 7 * 86400)))
+        start = first + (last - first - length) * rng.random()
+        windows.append((start, start + length))
+
+    start, end = windows[0]
+    assert legacy_range(df, start, end).reset_index(drop=True).equals(
+        partitioned_range(partitions, start, end)[['timestamp'] + METRICS].reset_index(drop=True))
+
+    legacy = time_queries(lambda start, end: legacy_range(df, start, end), windows[:20])
+    sliced = time_queries(lambda start, end: partitioned_range(partitions, start, end), windows)
+    graphed = time_queries(lambda start, end: graph_range(partitions, start, end), windows[:50])
+    print(f"{'':>16} {'median ms':>10} {'p95 ms':>8}")
+    for name, durations in (('mask', legacy), ('searchsorted', sliced), ('+ lttb 1000 pts', graphed)):
+        p95 = sorted(durations)[int(len(durations) * 0.95) - 1]
+        print(f"{name:>16} {statistics.median(durations):>10.3f} {p95:>8.3f}")
+    print(f"speedup: {statistics.median(legacy) / statistics.median(sliced):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_startup.py
+"""Check the import cost of both entry points against a budget.
+
+Each entry point is imported in a fresh interpreter with -X importtime;
+the median cumulative time over several runs must stay under its budget,
+and modules that should load lazily must not appear after the import.
+Exits non-zero when a check fails. Run from the repository root:
+
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (budget in ms, modules that must not be imported yet)
+ENTRY_POINTS = {
+    'collector': (150, ['speedtest', 'requests', 'aiohttp', 'sqlite3', 'http.server', 'pandas']),
+    'run': (1500, ['collector', 'speedtest', 'pandas']),
+}
+
+
+def import_time_ms(module):
+    """Cumulative import time of module in a fresh interpreter, in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def loaded_after_import(module, candidates):
+    """Which of candidates are in sys.modules after importing module."""
+    code = f"import json, sys, {module}; print(json.dumps([m for m in {candidates!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':>10} {'median ms':>10} {'budget ms':>10}  eager heavy imports")
+    for module, (budget, lazy) in ENTRY_POINTS.items():
+        median = statistics.median(import_time_ms(module) for _ in range(args.runs))
+        eager = loaded_after_import(module, lazy)
+        ok = median <= budget and not eager
+        failed |= not ok
+        print(f"{module:>10} {median:>10.1f} {budget:>10}  {', '.join(eager) or '-'}{'' if ok else '  FAIL'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,15 +4,30 @@ import logging
 import os
 import socket
 import json
+import asyncio
+import threading
 from datetime import datetime
-import csv
-from pathlib import Path
-import requests
-import speedtest
+import signal
+
+from monitoring.addresses import DEFAULT_PUBLIC_IP_URL, AddressService
+from monitoring.instrumentation import CollectorMetrics
+from monitoring.metrics import MetricsServer
+from monitoring.ports import ListeningPorts
+from monitoring.probes import TIMED_OUT, Probe, ProbeRunner
+from monitoring.processes import ProcessSnapshot, ProcessTable
+from monitoring.rules import DEFAULT_RULES, RuleEngine, rules_from_thresholds
+from monitoring.samples import sample_fieldnames, sample_to_row
+from monitoring.shipper import BatchShipper
+from monitoring.spool import Spool, SpooledSink
+from monitoring.sampler import SubIntervalSampler
+from monitoring.scheduler import FixedRateScheduler
+from monitoring.speedtest_worker import SpeedTestWorker
+from monitoring.writer import CsvSampleWriter
 
 # Configuration
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
 CSV_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server_data.csv')
+SPEED_TEST_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'speedtest_state.json')
 
 def setup_logging():
     """Set up logging configuration."""
@@ -31,105 +46,104 @@ def setup_logging():
     )
     return logging.getLogger('Collector')
 
-logger = setup_logging()
+# Handlers are attached by init(); importing this module has no side effects
+logger = logging.getLogger('Collector')
 
-def load_config():
+def load_config(path=CONFIG_PATH):
     """Load configuration from config.json file."""
     try:
-        with open(CONFIG_PATH, 'r') as f:
+        with open(path, 'r') as f:
             config = json.load(f)
         return config
     except Exception as e:
         logger.error(f"Error loading config: {e}")
         return None
 
-config = load_config()
-if not config:
-    logger.error("Failed to load configuration. Using defaults.")
-    INTERVAL = 10
-    DEBUG_MODE = True
-    APPLICATIONS = {
-        'smartcare': {'process_name': 'SmartCareProcessName', 'port': 8080},
-        'sql_server': {'process_name': 'sqlservr', 'port': 1433},
-        'smartlink': {'process_name': 'SmartLinkProcessName', 'port': 3307},
-        'etims': {'process_name': 'ETIMSProcessName', 'port': 8000},
-        'tims': {'process_name': 'TIMSProcessName', 'port': 8089}
-    }
-    THRESHOLDS = {
-        'cpu_percent': 80,
-        'memory_percent': 90,
-        'disk_percent': 85
-    }
-else:
+# Defaults, used as-is when config.json cannot be read; init() applies the file
+INTERVAL = 10
+DEBUG_MODE = True
+APPLICATIONS = {
+    'smartcare': {'process_name': 'SmartCareProcessName', 'port': 8080},
+    'sql_server': {'process_name': 'sqlservr', 'port': 1433},
+    'smartlink': {'process_name': 'SmartLinkProcessName', 'port': 3307},
+    'etims': {'process_name': 'ETIMSProcessName', 'port': 8000},
+    'tims': {'process_name': 'TIMSProcessName', 'port': 8089}
+}
+ALERT_RULES = DEFAULT_RULES
+PORT_CHECK_MODE = 'socket_table'
+IP_CHECK_INTERVAL = 300
+PUBLIC_IP_URL = DEFAULT_PUBLIC_IP_URL
+SPEED_TEST = {}
+CSV_WRITER = {}
+STORAGE = {}
+SHIPPING = {}
+SPOOL = {}
+METRICS = {}
+SUB_INTERVAL = {}
+ROLLUPS = {}
+
+# Per-probe deadlines in seconds; config.json 'probe_timeouts' overrides these
+DEFAULT_PROBE_TIMEOUTS = {
+    'cpu': 3,
+    'memory': 2,
+    'disk': 2,
+    'net_io': 2,
+    'applications': 8,
+    'ip': 6
+}
+PROBE_TIMEOUTS = dict(DEFAULT_PROBE_TIMEOUTS)
+
+# How often each probe needs fresh data, in seconds (None = every tick).
+# Slower probes reuse their last value in between.
+DEFAULT_PROBE_INTERVALS = {
+    'disk': 300,
+    'applications': 30
+}
+PROBE_INTERVALS = dict(DEFAULT_PROBE_INTERVALS)
+
+def apply_config(config):
+    """Replace the module settings with the values from a loaded config.json."""
+    global INTERVAL, DEBUG_MODE, APPLICATIONS, ALERT_RULES, PORT_CHECK_MODE
+    global PROBE_TIMEOUTS, PROBE_INTERVALS, IP_CHECK_INTERVAL, PUBLIC_IP_URL
+    global SPEED_TEST, CSV_WRITER, STORAGE, SHIPPING, SPOOL, METRICS, SUB_INTERVAL, ROLLUPS
+
     INTERVAL = config.get('interval', 10)
     DEBUG_MODE = config.get('debug_mode', True)
     APPLICATIONS = config.get('applications', {})
-    THRESHOLDS = config.get('thresholds', {
-        'cpu_percent': 80,
-        'memory_percent': 90,
-        'disk_percent': 85
-    })
-
-# Store previous network counters and IP
-previous_net_io = None
-previous_time = None
-previous_public_ip = None
-
-def bytes_to_mbps(bytes_count, seconds):
-    """Convert bytes over time to Megabits per second (Mbps)."""
-    if seconds <= 0:  # Avoid division by zero
-        return 0
-    
-    # Convert bytes to bits and then to megabits
-    bits = bytes_count * 8
-    megabits = bits / 1_000_000  # Using decimal (1 million) for Mbps calculation
-    
-    # Calculate megabits per second
-    mbps = megabits / seconds
-    
-    return round(mbps, 2)  # Round to 2 decimal places
+    # 'alert_rules' replaces the older single-sample 'thresholds' block
+    if 'alert_rules' in config:
+        ALERT_RULES = config['alert_rules']
+    elif 'thresholds' in config:
+        ALERT_RULES = rules_from_thresholds(config['thresholds'])
+    else:
+        ALERT_RULES = DEFAULT_RULES
+    # 'socket_table' reads the kernel's listening sockets once per cycle;
+    # 'connect' probes each port with a TCP connect (the old behaviour)
+    PORT_CHECK_MODE = config.get('port_check_mode', 'socket_table')
+    PROBE_TIMEOUTS = {**DEFAULT_PROBE_TIMEOUTS, **config.get('probe_timeouts', {})}
+    PROBE_INTERVALS = {**DEFAULT_PROBE_INTERVALS, **config.get('probe_intervals', {})}
+    IP_CHECK_INTERVAL = config.get('network_monitoring', {}).get('check_ip_interval', 300)
+    PUBLIC_IP_URL = config.get('network_monitoring', {}).get('public_ip_url', DEFAULT_PUBLIC_IP_URL)
+    SPEED_TEST = config.get('speed_test', {})
+    CSV_WRITER = config.get('csv_writer', {})
+    STORAGE = config.get('storage', {})
+    SHIPPING = config.get('shipping', {})
+    SPOOL = config.get('spool', {})
+    METRICS = config.get('metrics', {})
+    SUB_INTERVAL = config.get('sub_interval_sampling', {})
+    ROLLUPS = config.get('rollups', {})
 
-def format_speed(speed):
-    """Format speed to match Fast.com style."""
-    return f"{speed} Mbps"
+PORT_CONNECT_TIMEOUT = 1  # seconds per connect attempt in 'connect' mode
 
-def get_network_speeds():
-    """Calculate current network speeds in Mbps."""
-    global previous_net_io, previous_time
-    
-    current_net_io = psutil.net_io_counters()
-    current_time = time.time()
-    
-    # Initialize speeds to 0
-    upload_speed = download_speed = 0
-    
-    if previous_net_io and previous_time:
-        time_elapsed = current_time - previous_time
-        
-        # Only calculate if at least 1 second has passed
-        if time_elapsed >= 1:
-            # Calculate bytes transferred during the interval
-            bytes_sent = current_net_io.bytes_sent - previous_net_io.bytes_sent
-            bytes_recv = current_net_io.bytes_recv - previous_net_io.bytes_recv
-            
-            # Convert to Mbps
-            upload_speed = bytes_to_mbps(bytes_sent, time_elapsed)
-            download_speed = bytes_to_mbps(bytes_recv, time_elapsed)
-            
-            logger.debug(f"Raw bytes sent: {bytes_sent}, received: {bytes_recv} in {time_elapsed} seconds")
-    
-    # Update previous values
-    previous_net_io = current_net_io
-    previous_time = current_time
-    
-    logger.debug(f"Network Speeds - Upload: {upload_speed} Mbps, Download: {download_speed} Mbps")
-    return upload_speed, download_speed
+# Store the previous public IP
+previous_public_ip = None
 
 def check_port(port):
-    """Check if a port is in use."""
+    """Check if a port is in use by connecting to it."""
     try:
         # Try localhost first
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(PORT_CONNECT_TIMEOUT)
         localhost_result = sock.connect_ex(('127.0.0.1', port))
         sock.close()
         
@@ -139,6 +153,7 @@ def check_port(port):
             ip_addresses = socket.gethostbyname_ex(hostname)[2]
             for ip in ip_addresses:
                 sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.settimeout(PORT_CONNECT_TIMEOUT)
                 result = sock.connect_ex((ip, port))
                 sock.close()
                 if result == 0:
@@ -148,24 +163,26 @@ def check_port(port):
     except:
         return False
 
-def check_application_status(application):
-    """Check if the specified application is running and its port is active."""
-    process_running = False
-    process_name = application['process_name'].lower()
-    
-    for proc in psutil.process_iter(['pid', 'name']):
-        try:
-            if proc.info['name'].lower() == process_name:
-                process_running = True
-                break
-            # Check for partial matches (e.g., "sql" in "sqlservr.exe")
-            elif process_name in proc.info['name'].lower():
-                process_running = True
-                break
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-    
-    port_active = check_port(application['port'])
+def check_application_status(application, snapshot=None, ports=None):
+    """Check if the specified application is running and its port is active.
+
+    With a ListeningPorts table the port answer comes from the kernel socket
+    table instead of a TCP connect, and ownership of the port is verified.
+    """
+    if snapshot is None:
+        snapshot = ProcessSnapshot.take(['pid', 'name'])
+
+    # Exact or partial match (e.g., "sql" in "sqlservr.exe")
+    pids = snapshot.find(application['process_name'])
+    process_running = bool(pids)
+
+    if ports is None:
+        port_active = check_port(application['port'])
+    else:
+        port_active = ports.is_listening(application['port'])
+        owners = ports.owners(application['port'])
+        if process_running and port_active and owners and owners.isdisjoint(pids):
+            return 'Port Held By Another Process'
     
     if process_running and port_active:
         return 'Running'
@@ -190,34 +207,16 @@ def check_ip_change(current_public_ip):
     
     return False, None
 
-def get_ip_addresses():
+async def get_ip_addresses():
     """Get the computer's static and public IP addresses."""
-    global previous_public_ip
-    
     local_ip = "Unknown"
     public_ip = "Unknown"
     
     try:
-        # Get local IP
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.settimeout(5)  # 5 second timeout
-        try:
-            s.connect(("8.8.8.8", 80))
-            local_ip = s.getsockname()[0]
-        except (socket.timeout, socket.error) as e:
-            logger.error(f"Error getting local IP: {str(e)}")
-        finally:
-            s.close()
-        
-        # Get public IP with timeout
-        try:
-            response = requests.get('https://api.ipify.org', timeout=5)
-            if response.status_code == 200:
-                public_ip = response.text
-            else:
-                logger.error(f"Error getting public IP: HTTP {response.status_code}")
-        except requests.RequestException as e:
-            logger.error(f"Error getting public IP: {str(e)}")
+        # Both come from address_service's caches; neither makes a network
+        # call unless interfaces changed or the public IP TTL expired
+        local_ip = address_service.local_ip()
+        public_ip = await address_service.public_ip()
         
         # Check for IP change only if we got a valid public IP
         if public_ip != "Unknown":
@@ -231,165 +230,311 @@ def get_ip_addresses():
         logger.exception('Unexpected error getting IP addresses')
         return local_ip, public_ip  # Return whatever we managed to get
 
-def check_thresholds(system_info):
-    """Check if any metrics exceed defined thresholds."""
-    alerts = []
-    
-    cpu_usage = system_info['cpu']['usage_percent']
-    if cpu_usage > THRESHOLDS['cpu_percent']:
-        alerts.append(f"HIGH CPU USAGE: {cpu_usage}% exceeds threshold of {THRESHOLDS['cpu_percent']}%")
-    
-    memory_usage = system_info['memory']['percent']
-    if memory_usage > THRESHOLDS['memory_percent']:
-        alerts.append(f"HIGH MEMORY USAGE: {memory_usage}% exceeds threshold of {THRESHOLDS['memory_percent']}%")
-    
-    disk_usage = system_info['disk']['percent']
-    if disk_usage > THRESHOLDS['disk_percent']:
-        alerts.append(f"HIGH DISK USAGE: {disk_usage}% exceeds threshold of {THRESHOLDS['disk_percent']}%")
-    
-    return alerts
+def check_thresholds(row, timestamp):
+    """Feed a sample row to the alert rules; returns the alerts that fired or resolved."""
+    return alert_engine.evaluate(row['computer_name'], timestamp, row)
+
+def get_memory_info():
+    """Read virtual memory usage."""
+    memory = psutil.virtual_memory()
+    return {
+        'total': memory.total,
+        'available': memory.available,
+        'used': memory.used,
+        'percent': memory.percent
+    }
+
+def get_disk_info():
+    """Read usage of the root filesystem."""
+    disk = psutil.disk_usage('/')
+    return {
+        'total': disk.total,
+        'used': disk.used,
+        'free': disk.free,
+        'percent': disk.percent
+    }
+
+def get_network_counters():
+    """Read cumulative NIC counters."""
+    net_io = psutil.net_io_counters()
+    return {
+        'bytes_sent': net_io.bytes_sent,
+        'bytes_recv': net_io.bytes_recv,
+        'packets_sent': net_io.packets_sent,
+        'packets_recv': net_io.packets_recv
+    }
+
+async def probe_applications():
+    """Check every configured application against one process and socket snapshot."""
+    loop = asyncio.get_running_loop()
+    take_ports = ListeningPorts.take if PORT_CHECK_MODE == 'socket_table' else (lambda: None)
+    # Walk the process table once; every application check reads this snapshot
+    snapshot, ports = await asyncio.gather(
+        loop.run_in_executor(None, process_table.snapshot),
+        loop.run_in_executor(None, take_ports)
+    )
+
+    if ports is not None:
+        # Pure lookups, no I/O
+        statuses = [check_application_status(APPLICATIONS[app], snapshot, ports) for app in APPLICATIONS]
+    else:
+        # Connect mode: each check may block on the network, so run them side by side
+        statuses = await asyncio.gather(*(
+            loop.run_in_executor(None, check_application_status, APPLICATIONS[app], snapshot)
+            for app in APPLICATIONS
+        ))
+
+    return {
+        'status': dict(zip(APPLICATIONS, statuses)),
+        'top_processes': snapshot.top(5)
+    }
+
+def system_probes():
+    """Independent probes that make up one sample."""
+    empty_memory = dict.fromkeys(['total', 'available', 'used', 'percent'])
+    empty_disk = dict.fromkeys(['total', 'used', 'free', 'percent'])
+    empty_net = dict.fromkeys(['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv'])
+    empty_apps = {'status': {app: TIMED_OUT for app in APPLICATIONS}, 'top_processes': []}
+
+    def probe(name, func, default):
+        return Probe(name, func, PROBE_TIMEOUTS[name], default, PROBE_INTERVALS.get(name))
 
-def get_internet_speed():
-    """Perform an internet speed test using speedtest-cli."""
+    return [
+        # With the sub-interval sampler running, CPU comes from its summary instead
+        *([] if sub_interval_sampler else [probe('cpu', lambda: psutil.cpu_percent(interval=1), None)]),
+        probe('memory', get_memory_info, empty_memory),
+        probe('disk', get_disk_info, empty_disk),
+        probe('net_io', get_network_counters, empty_net),
+        probe('applications', probe_applications, empty_apps),
+        probe('ip', get_ip_addresses, ("Unknown", "Unknown")),
+    ]
+
+# Runtime objects, created by init()
+sub_interval_sampler = None
+SAMPLE_FIELDNAMES = sample_fieldnames()
+alert_engine = None
+collector_metrics = None
+probe_runner = None
+process_table = None
+sample_writer = None
+sample_shipper = None
+address_service = None
+speed_test_worker = None
+
+def create_sample_writer():
+    """Build the sample sink for the configured storage backend."""
+    backend = STORAGE.get('backend', 'csv')
+    if backend == 'sqlite':
+        from monitoring.storage import SqliteSampleWriter
+        db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), STORAGE.get('sqlite_path', 'server_data.db'))
+        writer = SqliteSampleWriter(
+            db_path,
+            SAMPLE_FIELDNAMES,
+            flush_rows=CSV_WRITER.get('flush_rows', 50),
+            flush_interval=CSV_WRITER.get('flush_interval', 30)
+        )
+    else:
+        if backend != 'csv':
+            logger.error(f"Unknown storage backend '{backend}', falling back to csv")
+        # Keeps server_data.csv open and writes samples in batches
+        writer = CsvSampleWriter(
+            CSV_FILE_PATH,
+            SAMPLE_FIELDNAMES,
+            flush_rows=CSV_WRITER.get('flush_rows', 50),
+            flush_interval=CSV_WRITER.get('flush_interval', 30),
+            fsync=CSV_WRITER.get('fsync', 'interval'),
+            fsync_interval=CSV_WRITER.get('fsync_interval', 300)
+        )
+    writer.on_flush = collector_metrics.flush_finished
+    return writer
+
+def with_spool(sink, name):
+    """Wrap a sink so rows it fails to deliver are spooled to disk and replayed."""
+    if not SPOOL.get('enabled', True):
+        return sink
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), SPOOL.get('directory', 'spool'), name)
+    spool = Spool(
+        directory,
+        segment_bytes=SPOOL.get('segment_bytes', 4 * 1024 * 1024),
+        max_bytes=SPOOL.get('max_bytes', 256 * 1024 * 1024)
+    )
+    return SpooledSink(
+        sink,
+        spool,
+        replay_rows_per_second=SPOOL.get('replay_rows_per_second', 200),
+        replay_batch_rows=SPOOL.get('replay_batch_rows', 1000)
+    )
+
+def with_rollups(sink, writer):
+    """Wrap the storage sink so samples are rolled up and old history is compacted.
+
+    writer is the sample writer at the bottom of sink; raw CSV compaction
+    goes through it so the file is closed while being replaced.
+    """
+    if not ROLLUPS.get('enabled', False):
+        return sink
+    from functools import partial
+    from monitoring.rollups import (
+        RollupSink, RollupStore, compact_csv, compact_samples_db, csv_rows, rebuild, sqlite_rows, tiers_from_config
+    )
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    tiers, raw_retention = tiers_from_config(ROLLUPS)
+    if STORAGE.get('backend', 'csv') == 'sqlite':
+        # Rollup tables live next to the samples table
+        db_path = os.path.join(base_dir, STORAGE.get('sqlite_path', 'server_data.db'))
+        existing_rows, compact_raw = partial(sqlite_rows, db_path), partial(compact_samples_db, db_path)
+    else:
+        db_path = os.path.join(base_dir, ROLLUPS.get('path', 'server_data_rollups.db'))
+        existing_rows, compact_raw = partial(csv_rows, CSV_FILE_PATH), partial(writer.rewrite, compact_csv)
+    store = RollupStore(db_path, tiers)
     try:
-        logger.info("Starting internet speed test...")
-        st = speedtest.Speedtest(secure=True)  # Use HTTPS
-        
-        # Configure timeouts
-        st.timeout = 30  # 30 second timeout
-        
-        # Get server list
-        logger.info("Getting server list...")
-        st.get_servers()
-        
-        # Get best server
-        logger.info("Finding best server...")
-        best = st.get_best_server()
-        logger.info(f"Selected server: {best['host']} ({best['country']})")
-        
-        # Get download speed in bits per second
-        logger.info("Testing download speed...")
-        download_speed = st.download()
-        # Convert to Mbps
-        download_mbps = download_speed / 1_000_000
-        
-        # Get upload speed in bits per second
-        logger.info("Testing upload speed...")
-        upload_speed = st.upload()
-        # Convert to Mbps
-        upload_mbps = upload_speed / 1_000_000
-        
-        logger.info(f"Speed test completed - Download: {download_mbps:.2f} Mbps, Upload: {upload_mbps:.2f} Mbps")
-        return round(download_mbps, 2), round(upload_mbps, 2)
-    except speedtest.ConfigRetrievalError:
-        logger.error("Failed to retrieve speedtest.net configuration. Check network connectivity.")
-        return 0, 0
-    except speedtest.NoMatchedServers:
-        logger.error("No matched servers - could not find a suitable speedtest.net server.")
-        return 0, 0
-    except Exception as e:
-        logger.error(f"Error during speed test: {str(e)}")
-        return 0, 0
+        if store.empty():
+            # First run with rollups: backfill before raw history is compacted away
+            start = time.monotonic()
+            count = rebuild(existing_rows(), store)
+            logger.info(f"Rolled up {count} existing samples into {db_path} in {time.monotonic() - start:.1f}s")
+    except FileNotFoundError:
+        pass
+    except Exception:
+        logger.exception(f"Could not backfill rollups in {db_path}")
+        # Compacting now would drop history that exists nowhere else
+        compact_raw = None
+        logger.warning("Raw samples will be kept until rollups are rebuilt (python -m monitoring.rollups rebuild)")
+    return RollupSink(
+        sink,
+        store,
+        raw_retention=raw_retention,
+        compact_raw=compact_raw,
+        flush_interval=ROLLUPS.get('flush_interval', 60),
+        compact_interval=ROLLUPS.get('compact_interval', 3600)
+    )
+
+def create_sample_shipper():
+    """Build the batch shipper if shipping to a central endpoint is enabled."""
+    if not SHIPPING.get('enabled') or not SHIPPING.get('url'):
+        return None
+    shipper = BatchShipper(
+        SHIPPING['url'],
+        batch_size=SHIPPING.get('batch_size', 100),
+        max_batch_age=SHIPPING.get('max_batch_age', 60),
+        timeout=SHIPPING.get('timeout', 10),
+        max_retries=SHIPPING.get('max_retries', 5),
+        headers=SHIPPING.get('headers')
+    )
+    sink = with_spool(shipper, 'shipping')
+    if sink is not shipper:
+        # Batches that exhaust their retries land in the spool
+        shipper.on_failure = sink.spool_rows
+    return sink
 
-# Track last speed test time
-last_speed_test = 0
-SPEED_TEST_INTERVAL = 600  # Run speed test every 10 minutes (600 seconds)
+def init(config_path=CONFIG_PATH):
+    """Set up logging, apply config.json and build the collector's long-lived objects.
 
-def collect_system_info():
-    """Collect system information."""
-    global last_speed_test
-    
+    Nothing happens at import time; main() calls this once before sampling.
+    """
+    global sub_interval_sampler, SAMPLE_FIELDNAMES, alert_engine, collector_metrics, probe_runner
+    global process_table, sample_writer, sample_shipper, address_service, speed_test_worker
+
+    setup_logging()
+    config = load_config(config_path)
+    if config:
+        apply_config(config)
+    else:
+        logger.error("Failed to load configuration. Using defaults.")
+
+    # Optional background sampler; each sample then carries min/mean/max/p95 columns
+    sub_interval_sampler = None
+    if SUB_INTERVAL.get('enabled', False):
+        period = SUB_INTERVAL.get('period', 0.5)
+        sub_interval_sampler = SubIntervalSampler(period=period, capacity=max(2 * int(INTERVAL / period), 16))
+    SAMPLE_FIELDNAMES = sample_fieldnames(sub_interval_sampler is not None)
+
+    # Compiled once; keeps the per-rule state that 'for' windows and flapping need
+    alert_engine = RuleEngine.from_config(ALERT_RULES)
+
+    # Self-instrumentation, served in Prometheus format when metrics.enabled is set
+    collector_metrics = CollectorMetrics([probe.name for probe in system_probes()])
+    if sub_interval_sampler is not None:
+        collector_metrics.watch_sampler(sub_interval_sampler)
+
+    probe_runner = ProbeRunner(observer=collector_metrics)
+
+    # Keeps psutil.Process objects between cycles so per-process CPU% is measured
+    process_table = ProcessTable()
+
+    writer = create_sample_writer()
+    sample_writer = with_rollups(with_spool(writer, 'storage'), writer)
+    sample_shipper = create_sample_shipper()
+    collector_metrics.watch_sinks(
+        {'storage': sample_writer, **({'shipping': sample_shipper} if sample_shipper is not None else {})}
+    )
+
+    address_service = AddressService(public_ip_url=PUBLIC_IP_URL, ttl=IP_CHECK_INTERVAL)
+
+    # Runs speed tests in the background; the sampler only reads its last result
+    speed_test_worker = SpeedTestWorker(
+        interval=SPEED_TEST.get('interval', 600),
+        jitter=SPEED_TEST.get('jitter', 0.2),
+        startup_delay=SPEED_TEST.get('startup_delay', 120),
+        state_path=SPEED_TEST_STATE_PATH
+    )
+
+def collect_system_info(tick=None):
+    """Collect system information.
+
+    tick is the scheduler Tick for this cycle; its grid time becomes the
+    sample timestamp and decides which slower probes are due.
+    """
     try:
-        current_time = time.time()
-        
-        # Get regular network usage
-        upload_speed, download_speed = get_network_speeds()
-        
-        # Check if it's time for a speed test
-        if current_time - last_speed_test >= SPEED_TEST_INTERVAL:
-            internet_download, internet_upload = get_internet_speed()
-            last_speed_test = current_time
-        else:
-            # Use cached values or 0 if no test has been run yet
-            internet_download = getattr(collect_system_info, 'last_download', 0)
-            internet_upload = getattr(collect_system_info, 'last_upload', 0)
-        
-        # Cache the latest speed test results
-        collect_system_info.last_download = internet_download
-        collect_system_info.last_upload = internet_upload
+        now = tick.timestamp if tick is not None else time.time()
+        timestamp = datetime.fromtimestamp(now).isoformat(timespec='microseconds')
         
-        # Get basic system stats
-        cpu_usage = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        # Latest published speed test result (0 until the first test completes)
+        internet_download, internet_upload = speed_test_worker.latest()
         
-        # Get network stats and speeds
-        net_io = psutil.net_io_counters()
+        # Spread of CPU, memory and NIC readings taken since the previous cycle
+        sub_interval = sub_interval_sampler.drain() if sub_interval_sampler is not None else {}
         
-        # Get process information
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-            try:
-                pinfo = proc.info
-                if pinfo['cpu_percent'] > 0:
-                    processes.append({
-                        'pid': pinfo['pid'],
-                        'name': pinfo['name'],
-                        'cpu_percent': pinfo['cpu_percent'],
-                        'memory_percent': pinfo['memory_percent']
-                    })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-
-        local_ip, public_ip = get_ip_addresses()
-        application_status = {app: check_application_status(APPLICATIONS[app]) for app in APPLICATIONS}
+        # Run the independent probes concurrently, each under its own deadline
+        results = probe_runner.run(system_probes(), now)
+        local_ip, public_ip = results['ip']
 
         system_info = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp,
             'computer_name': socket.gethostname(),
             'cpu': {
-                'usage_percent': cpu_usage,
+                'usage_percent': results['cpu'] if 'cpu' in results else sub_interval.get('cpu_mean'),
                 'cores': psutil.cpu_count(),
                 'frequency': psutil.cpu_freq().current if psutil.cpu_freq() else 0
             },
-            'memory': {
-                'total': memory.total,
-                'available': memory.available,
-                'used': memory.used,
-                'percent': memory.percent
-            },
-            'disk': {
-                'total': disk.total,
-                'used': disk.used,
-                'free': disk.free,
-                'percent': disk.percent
-            },
+            'memory': results['memory'],
+            'disk': results['disk'],
             'network': {
-                'bytes_sent': net_io.bytes_sent,
-                'bytes_recv': net_io.bytes_recv,
-                'packets_sent': net_io.packets_sent,
-                'packets_recv': net_io.packets_recv,
-                'upload_speed_mbps': upload_speed,
-                'download_speed_mbps': download_speed
+                **results['net_io'],
+                # Left blank: the dashboard derives throughput from the byte counters
+                'upload_speed_mbps': None,
+                'download_speed_mbps': None
             },
-            'top_processes': sorted(processes, 
-                                  key=lambda x: x['cpu_percent'], 
-                                  reverse=True)[:5],
+            'top_processes': results['applications']['top_processes'],
             'local_ip': local_ip,
             'public_ip': public_ip,
-            'application_status': application_status,
+            'application_status': results['applications']['status'],
             'internet_speed': {
                 'upload': internet_upload,
                 'download': internet_download
-            }
+            },
+            'sub_interval': sub_interval
         }
         
-        # Check for threshold alerts
-        alerts = check_thresholds(system_info)
-        for alert in alerts:
-            logger.warning(alert)
+        # Check the alert rules
+        for alert in check_thresholds(sample_to_row(system_info), now):
+            if alert.state == 'firing':
+                logger.warning(f"ALERT [{alert.level}] {alert.message}")
+            else:
+                logger.info(f"RESOLVED {alert.message}")
         
         write_to_csv(system_info)
+        ship_sample(system_info)
         return system_info
 
     except Exception as e:
@@ -397,70 +542,77 @@ def collect_system_info():
         return None
 
 def write_to_csv(data):
-  """Write data to CSV file."""
+  """Queue a sample for the buffered writer of the configured backend."""
   try:
-      fieldnames = [
-          "timestamp", "computer_name", "cpu_usage", "memory_usage",
-          "disk_usage", "network_bytes_sent", "network_bytes_recv",
-          "upload_speed_mbps", "download_speed_mbps",
-          "local_ip", "public_ip", "smartcare_status", "sql_server_status",
-          "smartlink_status", "etims_status", "tims_status",
-          "internet_upload_speed", "internet_download_speed"
-      ]
-
-      file_exists = Path(CSV_FILE_PATH).exists()
-
-      with open(CSV_FILE_PATH, mode='a', newline='') as file:
-          writer = csv.DictWriter(file, fieldnames=fieldnames)
-
-          if not file_exists:
-              writer.writeheader()
-
-          writer.writerow({
-              "timestamp": data['timestamp'],
-              "computer_name": data['computer_name'],
-              "cpu_usage": data['cpu']['usage_percent'],
-              "memory_usage": data['memory']['percent'],
-              "disk_usage": data['disk']['percent'],
-              "network_bytes_sent": data['network']['bytes_sent'],
-              "network_bytes_recv": data['network']['bytes_recv'],
-              "upload_speed_mbps": data['network']['upload_speed_mbps'],
-              "download_speed_mbps": data['network']['download_speed_mbps'],
-              "local_ip": data['local_ip'],
-              "public_ip": data['public_ip'],
-              "smartcare_status": data['application_status'].get('smartcare', 'Unknown'),
-              "sql_server_status": data['application_status'].get('sql_server', 'Unknown'),
-              "smartlink_status": data['application_status'].get('smartlink', 'Unknown'),
-              "etims_status": data['application_status'].get('etims', 'Unknown'),
-              "tims_status": data['application_status'].get('tims', 'Unknown'),
-              "internet_upload_speed": data['internet_speed']['upload'],
-              "internet_download_speed": data['internet_speed']['download']
-          })
-
-          logger.debug(f"Data written to CSV: {data['timestamp']}")
-          # Log network speeds in Fast.com style
-          logger.info(f"Download Speed: {format_speed(data['network']['download_speed_mbps'])}")
-          logger.info(f"Upload Speed: {format_speed(data['network']['upload_speed_mbps'])}")
+      sample_writer.write(sample_to_row(data))
+      logger.debug(f"Data queued for storage: {data['timestamp']}")
 
   except Exception as e:
       logger.exception('Error writing to CSV')
       
+def ship_sample(data):
+    """Queue a sample for the central endpoint when shipping is enabled."""
+    if sample_shipper is None:
+        return
+    try:
+        sample_shipper.write(sample_to_row(data))
+    except Exception as e:
+        logger.exception('Error queueing sample for shipping')
+
 def main():
+    init()
     logger.info("Starting system monitor...")
+    speed_test_worker.start()
+    if sub_interval_sampler is not None:
+        sub_interval_sampler.start()
+    stop_event = threading.Event()
+    scheduler = FixedRateScheduler(INTERVAL)
+    # Leave the loop cleanly on SIGTERM so buffered samples are flushed
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    metrics_server = None
+    if METRICS.get('enabled', False):
+        try:
+            metrics_server = MetricsServer(
+                collector_metrics.registry,
+                host=METRICS.get('host', '127.0.0.1'),
+                port=METRICS.get('port', 9108)
+            )
+            metrics_server.start()
+        except OSError as e:
+            logger.error(f"Could not start metrics endpoint: {e}")
+            metrics_server = None
     
-    while True:
+    try:
+        for tick in scheduler.ticks(stop_event):
+            started = time.monotonic()
+            try:
+                system_info = collect_system_info(tick)
+                if system_info:
+                    logger.debug(f"Collected data: {json.dumps(system_info, indent=2)}")
+            except Exception as e:
+                logger.exception("Unexpected error in main loop")
+            collector_metrics.cycle_finished(tick, started)
+    except KeyboardInterrupt:
+        logger.info("Stopping system monitor...")
+    finally:
+        stop_event.set()
+        speed_test_worker.stop(timeout=5)
+        if sub_interval_sampler is not None:
+            sub_interval_sampler.stop(timeout=5)
+        probe_runner.loop.run_until_complete(address_service.close())
+        probe_runner.close()
         try:
-            system_info = collect_system_info()
-            if system_info:
-                logger.debug(f"Collected data: {json.dumps(system_info, indent=2)}")
-            time.sleep(INTERVAL)
-            
-        except KeyboardInterrupt:
-            logger.info("Stopping system monitor...")
-            break
-        except Exception as e:
-            logger.exception("Unexpected error in main loop")
-            time.sleep(INTERVAL)
+            sample_writer.close()
+        except Exception:
+            logger.exception('Error flushing samples on shutdown')
+        logger.info(f"Sample writer stats: {sample_writer.stats}")
+        if sample_shipper is not None:
+            sample_shipper.close(timeout=SHIPPING.get('timeout', 10))
+            logger.info(f"Shipper stats: {sample_shipper.stats}")
+        if scheduler.missed_ticks:
+            logger.info(f"Missed {scheduler.missed_ticks} tick(s) this run")
+        if metrics_server is not None:
+            metrics_server.stop()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+# monitoring/addresses.py
+import asyncio
+import ipaddress
+import logging
+import random
+import socket
+import time
+
+import psutil
+
+logger = logging.getLogger('Collector')
+
+DEFAULT_PUBLIC_IP_URL = 'https://api.ipify.org'
+
+
+class AddressService:
+    """Cached discovery of the local and public IP addresses.
+
+    The local address comes from interface enumeration and is only
+    recomputed when the set of up interfaces or their addresses changes.
+    The public address is fetched at most once per ttl seconds; failed
+    lookups back off exponentially (capped at ttl) and keep serving the
+    last known address in the meantime.
+    """
+
+    def __init__(self, public_ip_url=DEFAULT_PUBLIC_IP_URL, ttl=300, backoff_base=15,
+                 timeout=5, clock=time.monotonic):
+        self.public_ip_url = public_ip_url
+        self.ttl = ttl
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self._clock = clock
+
+        self._if_signature = None
+        self._local_ip = "Unknown"
+
+        self._public_ip = "Unknown"
+        self._next_fetch = 0
+        self._failures = 0
+        self._session = None
+
+    def local_ip(self):
+        """Return the preferred IPv4 address of an up, non-loopback interface."""
+        addrs = psutil.net_if_addrs()
+        stats = psutil.net_if_stats()
+        candidates = tuple(sorted(
+            (name, addr.address)
+            for name, entries in addrs.items()
+            if name in stats and stats[name].isup
+            for addr in entries
+            if addr.family == socket.AF_INET
+        ))
+        if candidates != self._if_signature:
+            self._if_signature = candidates
+            self._local_ip = self._pick_local_ip(candidates)
+            logger.info(f"Interfaces changed, local IP is {self._local_ip}")
+        return self._local_ip
+
+    @staticmethod
+    def _pick_local_ip(candidates):
+        usable = []
+        for name, address in candidates:
+            ip = ipaddress.ip_address(address)
+            if ip.is_loopback or ip.is_link_local:
+                continue
+            # Private LAN addresses first, then by interface name for stability
+            usable.append((not ip.is_private, name, address))
+        return min(usable)[2] if usable else "Unknown"
+
+    async def public_ip(self):
+        """Return the public IP, refreshing it only when the TTL or backoff has expired."""
+        now = self._clock()
+        if now < self._next_fetch:
+            return self._public_ip
+
+        public_ip = await self._fetch_public_ip()
+        if public_ip is not None:
+            self._public_ip = public_ip
+            self._failures = 0
+            self._next_fetch = now + self.ttl
+        else:
+            self._failures += 1
+            backoff = min(self.ttl, self.backoff_base * 2 ** (self._failures - 1))
+            self._next_fetch = now + backoff * random.uniform(0.8, 1.2)
+            logger.info(f"Public IP lookup failed {self._failures} time(s), retrying in {backoff:.0f}s")
+        return self._public_ip
+
+    async def _fetch_public_ip(self):
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        try:
+            async with self._session.get(self.public_ip_url) as response:
+                if response.status != 200:
+                    logger.error(f"Error getting public IP: HTTP {response.status}")
+                    return None
+                body = (await response.text(errors='replace')).strip()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error getting public IP: {str(e)}")
+            return None
+        try:
+            return str(ipaddress.ip_address(body))
+        except ValueError:
+            logger.error(f"Error getting public IP: not an address: {body[:64]!r}")
+            return None
+
+    async def close(self):
+        """Close the HTTP session, if one was opened."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
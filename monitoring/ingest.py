@@ -0,0 +1,241 @@
+# monitoring/ingest.py
+"""Central ingest service for batches shipped by franchise collectors.
+
+    python -m monitoring.ingest --port 8060 --db server_data.db [--rollups]
+
+POST /ingest accepts the JSON batches sent by BatchShipper (gzip or plain),
+validates them and queues them for a single writer task that commits them
+to SQLite in bulk. The queue is bounded by rows; once the writer falls
+behind, new batches get 429 with Retry-After until it catches up. A
+failed commit is retried with backoff before its rows are dropped, and
+only committed rows are counted (and rolled up, with --rollups).
+GET /metrics exposes accept/commit latency and queue depth in Prometheus
+text format.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import partial
+
+from aiohttp import web
+
+from .metrics import Registry
+from .rollups import RollupSink, RollupStore, compact_samples_db, load_settings, tiers_from_config
+from .samples import FIELDNAMES, SUMMARY_FIELDNAMES
+from .storage import COLUMN_TYPES, SqliteSampleWriter
+
+logger = logging.getLogger('Ingest')
+
+NUMERIC_FIELDS = {name for name, kind in COLUMN_TYPES.items() if kind.startswith(('REAL', 'INTEGER'))}
+
+
+class ValidationError(ValueError):
+    """Raised for a payload that cannot be ingested."""
+
+
+# Hosts with and without the sub-interval sampler share one table
+INGEST_FIELDNAMES = FIELDNAMES + SUMMARY_FIELDNAMES
+
+
+def validate_batch(payload, fieldnames=INGEST_FIELDNAMES):
+    """Return the rows of a batch payload, restricted to known columns."""
+    if not isinstance(payload, dict) or not isinstance(payload.get('rows'), list):
+        raise ValidationError("payload must be an object with a 'rows' list")
+    rows = []
+    for i, row in enumerate(payload['rows']):
+        if not isinstance(row, dict):
+            raise ValidationError(f"row {i} is not an object")
+        if not row.get('computer_name') or not isinstance(row['computer_name'], str):
+            raise ValidationError(f"row {i} has no computer_name")
+        try:
+            datetime.fromisoformat(row['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(f"row {i} has no valid ISO timestamp") from None
+        clean = {}
+        for name in fieldnames:
+            value = row.get(name)
+            if name in NUMERIC_FIELDS and value not in (None, ''):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    try:
+                        value = float(value)
+                    except (TypeError, ValueError):
+                        raise ValidationError(f"row {i} field {name} is not numeric") from None
+            clean[name] = value
+        rows.append(clean)
+    return rows
+
+
+class IngestService:
+    """aiohttp application that validates batches and commits them in bulk."""
+
+    def __init__(self, writer, max_queued_rows=50000, max_rows_per_commit=5000,
+                 retry_after=2, dedupe_window=100000, commit_attempts=5, commit_backoff=0.5):
+        self.writer = writer
+        self.max_queued_rows = max_queued_rows
+        self.max_rows_per_commit = max_rows_per_commit
+        self.retry_after = retry_after
+        self.dedupe_window = dedupe_window
+        self.commit_attempts = commit_attempts
+        self.commit_backoff = commit_backoff
+
+        self._queue = asyncio.Queue()
+        self._queued_rows = 0
+        self._seen_keys = OrderedDict()
+        self._writer_task = None
+
+        self.registry = Registry()
+        outcomes = [('accepted',), ('duplicate',), ('rejected',), ('throttled',)]
+        self.requests = self.registry.counter(
+            'ingest_requests_total', 'Ingest requests by outcome', ('outcome',), outcomes)
+        self.rows_committed = self.registry.counter(
+            'ingest_rows_committed_total', 'Rows committed to storage')
+        self.commit_errors = self.registry.counter(
+            'ingest_commit_errors_total', 'Bulk commits that failed')
+        self.rows_dropped = self.registry.counter(
+            'ingest_rows_dropped_total', 'Accepted rows dropped after every commit attempt failed')
+        self.accept_latency = self.registry.histogram(
+            'ingest_accept_latency_seconds', 'Time to validate and queue a batch')
+        self.commit_latency = self.registry.histogram(
+            'ingest_commit_latency_seconds', 'Time from acceptance to commit')
+        self.write_latency = self.registry.histogram(
+            'ingest_write_latency_seconds', 'Duration of one bulk write')
+        self.registry.gauge(
+            'ingest_queued_rows', 'Rows waiting for the writer',
+            callback=lambda: [((), self._queued_rows)])
+
+    def create_app(self):
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_post('/ingest', self.handle_ingest)
+        app.router.add_get('/metrics', self.handle_metrics)
+        app.router.add_get('/health', self.handle_health)
+        app.on_startup.append(self._start_writer)
+        app.on_cleanup.append(self._stop_writer)
+        return app
+
+    async def handle_ingest(self, request):
+        start = time.monotonic()
+        key = request.headers.get('Idempotency-Key')
+        if key and key in self._seen_keys:
+            self.requests.inc(labels=('duplicate',))
+            return web.json_response({'status': 'duplicate'})
+
+        if self._queued_rows >= self.max_queued_rows:
+            self.requests.inc(labels=('throttled',))
+            return web.json_response(
+                {'status': 'busy'}, status=429, headers={'Retry-After': str(self.retry_after)})
+
+        try:
+            # aiohttp decodes Content-Encoding: gzip request bodies itself
+            rows = validate_batch(json.loads(await request.read()))
+        except (ValueError, UnicodeDecodeError) as e:
+            self.requests.inc(labels=('rejected',))
+            return web.json_response({'status': 'invalid', 'error': str(e)}, status=400)
+
+        if key:
+            self._remember(key)
+        self._queued_rows += len(rows)
+        self._queue.put_nowait((rows, start))
+        self.requests.inc(labels=('accepted',))
+        self.accept_latency.observe(time.monotonic() - start)
+        return web.json_response({'status': 'accepted', 'rows': len(rows)}, status=202)
+
+    async def handle_metrics(self, request):
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def handle_health(self, request):
+        return web.json_response({'status': 'ok', 'queued_rows': self._queued_rows})
+
+    def _remember(self, key):
+        self._seen_keys[key] = None
+        if len(self._seen_keys) > self.dedupe_window:
+            self._seen_keys.popitem(last=False)
+
+    async def _start_writer(self, app):
+        self._writer_task = asyncio.create_task(self._write_loop())
+
+    async def _stop_writer(self, app):
+        # Drain what was accepted before shutting down
+        await self._queue.join()
+        self._writer_task.cancel()
+        await asyncio.gather(self._writer_task, return_exceptions=True)
+        await asyncio.get_running_loop().run_in_executor(None, self.writer.close)
+
+    async def _write_loop(self):
+        while True:
+            batches = [await self._queue.get()]
+            rows_in_commit = len(batches[0][0])
+            # Coalesce whatever else is waiting into one transaction
+            while rows_in_commit < self.max_rows_per_commit and not self._queue.empty():
+                batches.append(self._queue.get_nowait())
+                rows_in_commit += len(batches[-1][0])
+
+            rows = [row for batch_rows, _ in batches for row in batch_rows]
+            write_start = time.monotonic()
+            try:
+                await self._commit(rows)
+            finally:
+                now = time.monotonic()
+                self.write_latency.observe(now - write_start)
+                for _, accepted_at in batches:
+                    self.commit_latency.observe(now - accepted_at)
+                    self._queue.task_done()
+                self._queued_rows -= len(rows)
+
+    async def _commit(self, rows):
+        """Write rows in one transaction, retrying with backoff; returns whether they were committed.
+
+        write_many() is all or nothing, so a failed attempt leaves nothing
+        behind in the writer to be committed (or missed by rollups) later.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, self.commit_attempts + 1):
+            try:
+                await loop.run_in_executor(None, self.writer.write_many, rows)
+            except Exception:
+                self.commit_errors.inc()
+                logger.exception(f"Bulk commit of {len(rows)} rows failed (attempt {attempt})")
+                if attempt < self.commit_attempts:
+                    # Rows pile up meanwhile, so collectors are throttled with 429
+                    await asyncio.sleep(self.commit_backoff * 2 ** (attempt - 1))
+                continue
+            self.rows_committed.inc(len(rows))
+            return True
+        self.rows_dropped.inc(len(rows))
+        logger.error(f"Dropped {len(rows)} rows after {self.commit_attempts} failed commits")
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Franchise monitor ingest service")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8060)
+    parser.add_argument('--db', default='server_data.db', help="SQLite database to write to")
+    parser.add_argument('--max-queued-rows', type=int, default=50000)
+    parser.add_argument('--rollups', action='store_true',
+                        help="Roll up samples and apply retention per the 'rollups' block of --config")
+    parser.add_argument('--config', default='config.json')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    writer = SqliteSampleWriter(args.db, INGEST_FIELDNAMES)
+    if args.rollups:
+        settings = load_settings(args.config)
+        tiers, raw_retention = tiers_from_config(settings)
+        writer = RollupSink(
+            writer,
+            RollupStore(args.db, tiers),
+            raw_retention=raw_retention,
+            compact_raw=partial(compact_samples_db, args.db),
+            flush_interval=settings.get('flush_interval', 60),
+            compact_interval=settings.get('compact_interval', 3600)
+        )
+    service = IngestService(writer, max_queued_rows=args.max_queued_rows)
+    web.run_app(service.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
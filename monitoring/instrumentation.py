@@ -0,0 +1,87 @@
+# monitoring/instrumentation.py
+import os
+import time
+
+import psutil
+
+from .metrics import Registry
+
+CYCLE_BUCKETS = (0.5, 1, 2, 5, 10, 15, 20, 30, 45, 60, 120)
+LATENESS_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30)
+PROBE_OUTCOMES = ('ok', 'timeout', 'error')
+
+
+class CollectorMetrics:
+    """The collector's own metrics: probe, cycle and write timings plus its CPU and memory.
+
+    Probe names are fixed at construction so every series is allocated
+    up front. ProbeRunner reports through probe_finished().
+    """
+
+    def __init__(self, probe_names):
+        self.registry = Registry()
+        probes = [(name,) for name in probe_names]
+        self.probe_duration = self.registry.histogram(
+            'collector_probe_duration_seconds', 'Duration of each probe run',
+            label_names=('probe',), label_values=probes)
+        self.probe_runs = self.registry.counter(
+            'collector_probe_runs_total', 'Probe runs by outcome',
+            label_names=('probe', 'outcome'),
+            label_values=[(name, outcome) for name in probe_names for outcome in PROBE_OUTCOMES])
+        self.cycle_duration = self.registry.histogram(
+            'collector_cycle_duration_seconds', 'Duration of one collection cycle', buckets=CYCLE_BUCKETS)
+        self.cycle_lateness = self.registry.histogram(
+            'collector_cycle_lateness_seconds', 'Delay between a tick\'s grid time and its start',
+            buckets=LATENESS_BUCKETS)
+        self.missed_ticks = self.registry.counter(
+            'collector_missed_ticks_total', 'Ticks skipped because a cycle overran')
+        self.write_latency = self.registry.histogram(
+            'collector_write_flush_seconds', 'Duration of one storage flush')
+
+        self._process = psutil.Process(os.getpid())
+        self.registry.counter(
+            'process_cpu_seconds_total', 'User and system CPU time of the collector',
+            callback=self._cpu_seconds)
+        self.registry.gauge(
+            'process_resident_memory_bytes', 'Resident memory of the collector',
+            callback=lambda: [((), self._process.memory_info().rss)])
+
+    def _cpu_seconds(self):
+        times = self._process.cpu_times()
+        return [((), times.user + times.system)]
+
+    def watch_sinks(self, sinks):
+        """Export every sink's stats dict (rows written, spool depth, ...) as gauges."""
+        self._sinks = dict(sinks)
+        stat_names = sorted((sink, stat) for sink, obj in self._sinks.items() for stat in obj.stats)
+        self.registry.gauge(
+            'collector_sink_stat', 'Counters and gauges reported by each sample sink',
+            label_names=('sink', 'stat'), label_values=stat_names,
+            callback=self._sink_stats)
+
+    def _sink_stats(self):
+        for sink, obj in self._sinks.items():
+            for stat, value in obj.stats.items():
+                yield (sink, stat), value
+
+    def watch_sampler(self, sampler):
+        """Export the sub-interval sampler's sample count and its own CPU time."""
+        self.registry.counter(
+            'collector_sampler_samples_total', 'Readings taken by the sub-interval sampler',
+            callback=lambda: [((), sampler.stats['samples'])])
+        self.registry.counter(
+            'collector_sampler_cpu_seconds_total', 'CPU time spent in the sub-interval sampler thread',
+            callback=lambda: [((), sampler.stats['cpu_seconds'])])
+
+    def probe_finished(self, name, seconds, outcome):
+        self.probe_duration.observe(seconds, (name,))
+        self.probe_runs.inc(labels=(name, outcome))
+
+    def cycle_finished(self, tick, started):
+        self.cycle_duration.observe(time.monotonic() - started)
+        self.cycle_lateness.observe(tick.lateness)
+        if tick.missed:
+            self.missed_ticks.inc(tick.missed)
+
+    def flush_finished(self, seconds):
+        self.write_latency.observe(seconds)
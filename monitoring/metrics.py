@@ -0,0 +1,210 @@
+# monitoring/metrics.py
+"""Fixed-size metrics with Prometheus text exposition.
+
+Every metric is allocated when it is registered: histograms get their
+bucket array up front and label sets are declared at registration time,
+so recording a value never allocates and memory use stays flat.
+"""
+import logging
+import threading
+from array import array
+
+logger = logging.getLogger('Collector')
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, label_names=(), label_values=((),)):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series = {tuple(values): self._new_series() for values in label_values}
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def _get(self, labels):
+        try:
+            return self._series[labels]
+        except KeyError:
+            raise KeyError(f"{self.name}: label values {labels} were not declared") from None
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, series in self._series.items():
+                lines.extend(self._render_series(labels, series))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally read at scrape time.
+
+    A callback returns [(label values, value), ...] for counts kept
+    elsewhere, such as the process's CPU time.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=(), label_values=((),), callback=None):
+        super().__init__(name, help_text, label_names, label_values)
+        self._callback = callback
+
+    def _new_series(self):
+        return array('d', [0.0])
+
+    def inc(self, amount=1, labels=()):
+        series = self._get(tuple(labels))
+        with self._lock:
+            series[0] += amount
+
+    def value(self, labels=()):
+        return self._get(tuple(labels))[0]
+
+    def _store(self, value, labels):
+        series = self._get(tuple(labels))
+        with self._lock:
+            series[0] = value
+
+    def render(self):
+        if self._callback is not None:
+            for labels, value in self._callback():
+                self._store(value, labels)
+        return super().render()
+
+    def _render_series(self, labels, series):
+        yield f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(series[0])}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down, optionally computed at scrape time."""
+    kind = 'gauge'
+
+    def set(self, value, labels=()):
+        self._store(value, labels)
+
+
+class Histogram(_Metric):
+    """Cumulative histogram over fixed, preallocated buckets."""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_LATENCY_BUCKETS, label_names=(), label_values=((),)):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, label_names, label_values)
+
+    def _new_series(self):
+        # One slot per bucket plus +Inf, then sum and count
+        return array('d', [0.0] * (len(self.buckets) + 3))
+
+    def observe(self, value, labels=()):
+        series = self._get(tuple(labels))
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, labels=()):
+        return self._get(tuple(labels))[-1]
+
+    def sum(self, labels=()):
+        return self._get(tuple(labels))[-2]
+
+    def _render_series(self, labels, series):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), series):
+            cumulative += count
+            le = ('le', _format_value(float(bound)))
+            yield f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {int(cumulative)}"
+        yield f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(series[-2])}"
+        yield f"{self.name}_count{_format_labels(self.label_names, labels)} {int(series[-1])}"
+
+
+class Registry:
+    """A named set of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Serve a registry at /metrics from a daemon thread."""
+
+    def __init__(self, registry, host='127.0.0.1', port=9108):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.registry = registry
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"metrics: {format % args}")
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True)
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{self.address[0]}:{self.address[1]}/metrics")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,69 @@
+# monitoring/ports.py
+import logging
+import os
+
+import psutil
+
+logger = logging.getLogger('Collector')
+
+# /proc/net/tcp* state code for LISTEN
+_PROC_LISTEN = '0A'
+PROC_TCP_TABLES = ('/proc/net/tcp', '/proc/net/tcp6')
+
+
+class ListeningPorts:
+    """Port to owning-PID map built from the kernel's listening-socket table once per cycle."""
+
+    def __init__(self, owners):
+        # port -> set of pids; an empty set means the owner could not be resolved
+        self._owners = owners
+
+    @classmethod
+    def take(cls):
+        """Read every listening TCP socket once.
+
+        Returns None when the socket table is not readable on this platform,
+        in which case callers fall back to connect-based checks.
+        """
+        try:
+            return cls(cls._from_psutil())
+        except (psutil.AccessDenied, PermissionError):
+            logger.debug("net_connections denied, falling back to /proc/net/tcp")
+        owners = cls._from_proc()
+        return cls(owners) if owners is not None else None
+
+    @staticmethod
+    def _from_psutil():
+        owners = {}
+        for conn in psutil.net_connections(kind='inet'):
+            if conn.status != psutil.CONN_LISTEN or not conn.laddr:
+                continue
+            pids = owners.setdefault(conn.laddr.port, set())
+            if conn.pid is not None:
+                pids.add(conn.pid)
+        return owners
+
+    @staticmethod
+    def _from_proc(paths=PROC_TCP_TABLES):
+        tables = [t for t in paths if os.path.exists(t)]
+        if not tables:
+            return None
+        owners = {}
+        for table in tables:
+            with open(table) as f:
+                next(f, None)  # header
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 4 or fields[3] != _PROC_LISTEN:
+                        continue
+                    port = int(fields[1].rsplit(':', 1)[1], 16)
+                    owners.setdefault(port, set())
+        return owners
+
+    def is_listening(self, port):
+        """Check whether anything listens on port."""
+        return port in self._owners
+
+    def owners(self, port):
+        """PIDs listening on port (empty if none or unknown)."""
+        return self._owners.get(port, set())
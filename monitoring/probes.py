@@ -0,0 +1,104 @@
+# monitoring/probes.py
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('Collector')
+
+TIMED_OUT = 'Timed Out'
+
+
+class Probe:
+    """A named piece of collection work with its own deadline and fallback value.
+
+    interval is how often the probe needs fresh data, in seconds; None means
+    every cycle. Between runs the runner hands back the last good value.
+    """
+
+    def __init__(self, name, func, timeout, default=TIMED_OUT, interval=None):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.default = default
+        self.interval = interval
+        self.is_async = asyncio.iscoroutinefunction(func)
+
+
+class ProbeRunner:
+    """Run independent probes concurrently on a private event loop.
+
+    Coroutine probes run on the loop; blocking probes (psutil, sockets) run
+    in a thread pool. A probe that misses its deadline yields its default
+    value. Its worker thread is not interrupted, but the sample is not held
+    up by it.
+    """
+
+    def __init__(self, max_workers=8, observer=None):
+        # observer.probe_finished(name, seconds, outcome) is told about every run
+        self.observer = observer
+        self._loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='probe')
+        self._loop.set_default_executor(self._executor)
+        self._last_value = {}
+        self._last_run = {}
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def run(self, probes, now=None):
+        """Run the probes that are due at the same time and return {probe name: value}.
+
+        now is the cycle's grid time; probes that are not due yet return
+        their last good value without running.
+        """
+        if now is None:
+            now = time.time()
+        due = [probe for probe in probes if self._is_due(probe, now)]
+        results = {probe.name: self._last_value[probe.name] for probe in probes if probe not in due}
+        results.update(self._loop.run_until_complete(self._run_all(due, now)))
+        return results
+
+    def _is_due(self, probe, now):
+        if probe.interval is None or probe.name not in self._last_run:
+            return True
+        # Small tolerance so grid-aligned times count as due on the boundary
+        return now - self._last_run[probe.name] >= probe.interval - 1e-3
+
+    async def _run_all(self, probes, now):
+        results = await asyncio.gather(*(self._run_one(probe, now) for probe in probes))
+        return {probe.name: result for probe, result in zip(probes, results)}
+
+    async def _run_one(self, probe, now):
+        started = time.monotonic()
+        if probe.is_async:
+            pending = probe.func()
+        else:
+            pending = self._loop.run_in_executor(self._executor, probe.func)
+        try:
+            value = await asyncio.wait_for(pending, probe.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Probe '{probe.name}' missed its {probe.timeout}s deadline")
+            self._observe(probe, started, 'timeout')
+            return probe.default
+        except Exception:
+            logger.exception(f"Probe '{probe.name}' failed")
+            self._observe(probe, started, 'error')
+            return probe.default
+
+        self._observe(probe, started, 'ok')
+
+        # Only good values are reused; a failed probe is retried next cycle
+        self._last_value[probe.name] = value
+        self._last_run[probe.name] = now
+        return value
+
+    def _observe(self, probe, started, outcome):
+        if self.observer is not None:
+            self.observer.probe_finished(probe.name, time.monotonic() - started, outcome)
+
+    def close(self):
+        """Stop the worker pool and close the loop."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._loop.close()
@@ -0,0 +1,162 @@
+# monitoring/processes.py
+import heapq
+import threading
+import time
+
+import psutil
+
+PROCESS_ATTRS = ['pid', 'name', 'cpu_percent', 'memory_percent']
+
+
+class ProcessSnapshot:
+    """Index over one walk of the process table, shared by every check in a cycle."""
+
+    def __init__(self, processes):
+        self.processes = processes
+        self._by_name = {}
+        self._by_lower = {}
+        for proc in processes:
+            name = proc.get('name') or ''
+            self._by_name.setdefault(name, []).append(proc['pid'])
+            self._by_lower.setdefault(name.lower(), []).append(proc['pid'])
+
+        # One newline-joined haystack of the distinct names, so a substring
+        # match is a single C-level search.
+        self._haystack = '\n'.join(sorted(self._by_lower))
+        self._match_cache = {}
+
+    @classmethod
+    def take(cls, attrs=PROCESS_ATTRS):
+        """Walk the process table once and index it."""
+        processes = []
+        for proc in psutil.process_iter(attrs):
+            try:
+                info = proc.info
+                if info.get('name') is None:
+                    continue
+                processes.append(info)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return cls(processes)
+
+    def __len__(self):
+        return len(self.processes)
+
+    def pids_by_exact_name(self, name):
+        """PIDs whose name matches exactly (case-sensitive)."""
+        return list(self._by_name.get(name, ()))
+
+    def find(self, process_name):
+        """PIDs whose name equals or contains process_name, case-insensitive (the collector's rule)."""
+        needle = process_name.lower()
+        if needle in self._match_cache:
+            return self._match_cache[needle]
+
+        # Exact names contain the needle too, so one substring scan finds every match
+        pids = self._substring_matches(needle)
+        self._match_cache[needle] = pids
+        return pids
+
+    def is_running(self, process_name):
+        """Check whether any process matches process_name."""
+        return bool(self.find(process_name))
+
+    def _substring_matches(self, needle):
+        if not needle or '\n' in needle or needle not in self._haystack:
+            return []
+        pids = []
+        start = self._haystack.find(needle)
+        while start != -1:
+            line_start = self._haystack.rfind('\n', 0, start) + 1
+            line_end = self._haystack.find('\n', start)
+            if line_end == -1:
+                line_end = len(self._haystack)
+            pids.extend(self._by_lower[self._haystack[line_start:line_end]])
+            start = self._haystack.find(needle, line_end)
+        return pids
+
+    def top(self, n=5, key='cpu_percent'):
+        """Return the n processes with the highest value for key."""
+        candidates = [p for p in self.processes if (p.get(key) or 0) > 0]
+        return heapq.nlargest(n, candidates, key=lambda p: p[key])
+
+
+class _ProcessEntry:
+    __slots__ = ('proc', 'key', 'name', 'cpu_time', 'rss', 'sampled_at')
+
+    def __init__(self, proc):
+        self.proc = proc
+        self.key = (proc.pid, proc.create_time())
+        self.name = proc.name()
+        self.cpu_time = None
+        self.rss = None
+        self.sampled_at = None
+
+
+class ProcessTable:
+    """Long-lived cache of psutil.Process objects, keyed by (pid, create_time).
+
+    psutil's cpu_percent() on a freshly created Process always returns 0.0,
+    so rebuilding the table every cycle measures nothing. This keeps each
+    process and its CPU-time/RSS baseline between cycles and derives real
+    per-interval CPU% and RSS deltas. Exited processes are evicted and a
+    reused pid is detected by its different create_time.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def snapshot(self):
+        """Refresh every cached process and return this cycle's ProcessSnapshot."""
+        with self._lock:
+            return ProcessSnapshot(self._refresh())
+
+    def _refresh(self):
+        total_memory = psutil.virtual_memory().total
+        live = {}
+        processes = []
+        for pid in psutil.pids():
+            try:
+                entry = self._entries.get(pid)
+                if entry is not None and not entry.proc.is_running():
+                    entry = None  # pid was reused by a new process
+                if entry is None:
+                    entry = _ProcessEntry(psutil.Process(pid))
+
+                with entry.proc.oneshot():
+                    cpu = entry.proc.cpu_times()
+                    rss = entry.proc.memory_info().rss
+                now = self._clock()
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            except psutil.AccessDenied:
+                if entry is None:
+                    continue
+                cpu, rss, now = None, None, self._clock()
+
+            cpu_time = cpu.user + cpu.system if cpu is not None else None
+            cpu_percent = rss_delta = None
+            if cpu_time is not None and entry.cpu_time is not None and now > entry.sampled_at:
+                cpu_percent = round((cpu_time - entry.cpu_time) / (now - entry.sampled_at) * 100, 1)
+                rss_delta = rss - entry.rss
+            if cpu_time is not None:
+                entry.cpu_time, entry.rss, entry.sampled_at = cpu_time, rss, now
+
+            live[pid] = entry
+            processes.append({
+                'pid': pid,
+                'name': entry.name,
+                'cpu_percent': cpu_percent,
+                'memory_percent': round(rss / total_memory * 100, 2) if rss is not None else None,
+                'rss': rss,
+                'rss_delta': rss_delta
+            })
+
+        # Anything not seen this cycle has exited
+        self._entries = live
+        return processes
@@ -0,0 +1,555 @@
+# monitoring/rollups.py
+"""Multi-resolution rollups of samples, with retention per tier.
+
+Samples are folded per host into 1-minute, 15-minute and 1-hour buckets
+holding the min, mean, max and last value of every numeric metric (the
+last byte counter values give each bucket's network throughput). The
+buckets live in SQLite tables (rollup_1m, rollup_15m, rollup_1h): in the
+sample database itself for the sqlite backend, or in a sidecar database
+next to server_data.csv. Rows are upserted with merge semantics (sum and
+count instead of mean), so a bucket can be flushed while still open and
+completed by later flushes.
+
+Compaction deletes rollup rows older than their tier's retention and raw
+samples older than raw_retention_days. Configured in config.json:
+
+    "rollups": {"enabled": true, "path": "server_data_rollups.db",
+                "raw_retention_days": 7, "flush_interval": 60,
+                "compact_interval": 3600,
+                "tiers": [{"name": "1m", "seconds": 60, "retention_days": 30}, ...]}
+
+Existing history can be rolled up (and compacted) with:
+
+    python -m monitoring.rollups rebuild --db server_data_rollups.db (--csv server_data.csv | --samples-db server_data.db)
+    python -m monitoring.rollups compact --db server_data_rollups.db [--csv server_data.csv | --samples-db server_data.db]
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from .storage import connect
+
+logger = logging.getLogger('Collector')
+
+Tier = namedtuple('Tier', ['name', 'seconds', 'retention'])
+
+DEFAULT_TIERS = (
+    Tier('1m', 60, 30 * 86400),
+    Tier('15m', 900, 180 * 86400),
+    Tier('1h', 3600, 365 * 86400),
+)
+DEFAULT_RAW_RETENTION = 7 * 86400
+
+# Gauges worth aggregating, and the network byte counters: the last
+# counter value of consecutive buckets gives the bucket's throughput
+ROLLUP_METRICS = [
+    "cpu_usage", "memory_usage", "disk_usage",
+    "upload_speed_mbps", "download_speed_mbps",
+    "internet_upload_speed", "internet_download_speed",
+    "network_bytes_sent", "network_bytes_recv"
+]
+
+STATS = ('min', 'max', 'sum', 'count', 'last')
+
+# Buckets are aligned to multiples of their width since this instant
+EPOCH = datetime(1970, 1, 1)
+
+
+def tiers_from_config(settings):
+    """(tiers, raw retention in seconds) from a config.json 'rollups' block."""
+    tiers = tuple(
+        Tier(spec['name'], int(spec['seconds']), float(spec['retention_days']) * 86400)
+        for spec in settings.get('tiers', [])
+    ) or DEFAULT_TIERS
+    raw_retention = float(settings.get('raw_retention_days', DEFAULT_RAW_RETENTION / 86400)) * 86400
+    return tuple(sorted(tiers, key=lambda tier: tier.seconds)), raw_retention
+
+
+def load_settings(config_path):
+    """The 'rollups' block of a config.json file ({} if missing or unreadable)."""
+    try:
+        with open(config_path, 'r') as f:
+            return json.load(f).get('rollups', {})
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read rollup settings from {config_path}: {e}")
+        return {}
+
+
+def choose_tier(age, resolution, tiers=DEFAULT_TIERS, raw_retention=DEFAULT_RAW_RETENTION):
+    """The coarsest tier at least as fine as resolution that reaches back age seconds.
+
+    Returns None for raw samples: when no tier is fine enough and raw
+    samples still reach back that far. Past raw retention the finest tier
+    that reaches back far enough is used even if it is coarser than asked
+    for, or the longest-kept tier if none does.
+    """
+    covering = [tier for tier in tiers if tier.retention >= age]
+    fine_enough = [tier for tier in covering if tier.seconds <= resolution]
+    if fine_enough:
+        return fine_enough[-1]
+    if age <= raw_retention or not tiers:
+        return None
+    return covering[0] if covering else max(tiers, key=lambda tier: tier.retention)
+
+
+def table_name(tier):
+    return f"rollup_{tier.name}"
+
+
+def ensure_schema(conn, tiers=DEFAULT_TIERS, metrics=ROLLUP_METRICS):
+    """Create one rollup table per tier, keyed on (computer_name, bucket).
+
+    Tables from before a metric was added gain its columns.
+    """
+    columns = {
+        f"{metric}_{stat}": 'INTEGER' if stat == 'count' else 'REAL' for metric in metrics for stat in STATS
+    }
+    for tier in tiers:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table_name(tier)} ("
+            f"computer_name TEXT NOT NULL, bucket TEXT NOT NULL, samples INTEGER NOT NULL, "
+            f"last_timestamp TEXT NOT NULL, {', '.join(f'{name} {kind}' for name, kind in columns.items())}, "
+            f"PRIMARY KEY (computer_name, bucket))"
+        )
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table_name(tier)})")}
+        for name, kind in columns.items():
+            if name not in existing:
+                # Counts start at 0 so the upsert can add to them
+                default = " NOT NULL DEFAULT 0" if kind == 'INTEGER' else ""
+                conn.execute(f"ALTER TABLE {table_name(tier)} ADD COLUMN {name} {kind}{default}")
+    conn.commit()
+
+
+def _upsert_sql(tier, metrics):
+    columns = ['computer_name', 'bucket', 'samples', 'last_timestamp'] + [
+        f"{metric}_{stat}" for metric in metrics for stat in STATS
+    ]
+    updates = ["samples = samples + excluded.samples",
+               "last_timestamp = max(last_timestamp, excluded.last_timestamp)"]
+    for metric in metrics:
+        updates += [
+            # NULL-safe min/max: a side without values keeps the other
+            f"{metric}_min = CASE WHEN excluded.{metric}_min IS NULL OR {metric}_min <= excluded.{metric}_min "
+            f"THEN {metric}_min ELSE excluded.{metric}_min END",
+            f"{metric}_max = CASE WHEN excluded.{metric}_max IS NULL OR {metric}_max >= excluded.{metric}_max "
+            f"THEN {metric}_max ELSE excluded.{metric}_max END",
+            f"{metric}_sum = coalesce({metric}_sum, 0) + coalesce(excluded.{metric}_sum, 0)",
+            f"{metric}_count = {metric}_count + excluded.{metric}_count",
+            f"{metric}_last = CASE WHEN excluded.{metric}_last IS NOT NULL "
+            f"AND excluded.last_timestamp >= last_timestamp THEN excluded.{metric}_last ELSE {metric}_last END",
+        ]
+    return (
+        f"INSERT INTO {table_name(tier)} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT (computer_name, bucket) DO UPDATE SET {', '.join(updates)}"
+    ), columns
+
+
+def _number(value):
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RollupAggregator:
+    """Accumulates per-bucket deltas for every tier until they are taken.
+
+    A delta holds only the samples added since the last take(), which the
+    upsert merges into whatever the bucket already holds.
+    """
+
+    def __init__(self, tiers=DEFAULT_TIERS, metrics=ROLLUP_METRICS):
+        self.tiers = tuple(tiers)
+        self.metrics = list(metrics)
+        self._deltas = {tier.name: {} for tier in self.tiers}
+
+    def __len__(self):
+        return sum(len(deltas) for deltas in self._deltas.values())
+
+    def add(self, row):
+        """Fold one sample row (dict with an ISO timestamp) into every tier."""
+        try:
+            timestamp = datetime.fromisoformat(str(row['timestamp']))
+        except (KeyError, ValueError):
+            return
+        host = row.get('computer_name')
+        if not host:
+            return
+        timestamp = timestamp.replace(tzinfo=None)
+        iso = timestamp.isoformat(timespec='microseconds')
+        values = [_number(row.get(metric)) for metric in self.metrics]
+        seconds = int((timestamp - EPOCH).total_seconds())
+        for tier in self.tiers:
+            bucket = (EPOCH + timedelta(seconds=seconds - seconds % tier.seconds)).isoformat()
+            delta = self._deltas[tier.name].get((host, bucket))
+            if delta is None:
+                delta = self._deltas[tier.name][(host, bucket)] = {
+                    'samples': 0, 'last_timestamp': iso, 'stats': [[None, None, 0.0, 0, None] for _ in values]
+                }
+            delta['samples'] += 1
+            newest = iso >= delta['last_timestamp']
+            if newest:
+                delta['last_timestamp'] = iso
+            for stats, value in zip(delta['stats'], values):
+                if value is None:
+                    continue
+                stats[0] = value if stats[0] is None else min(stats[0], value)
+                stats[1] = value if stats[1] is None else max(stats[1], value)
+                stats[2] += value
+                stats[3] += 1
+                if newest or stats[4] is None:
+                    stats[4] = value
+
+    def take(self):
+        """Remove and return {tier name: [(host, bucket, delta), ...]}."""
+        taken = {name: [(host, bucket, delta) for (host, bucket), delta in deltas.items()]
+                 for name, deltas in self._deltas.items()}
+        self._deltas = {tier.name: {} for tier in self.tiers}
+        return taken
+
+
+class RollupStore:
+    """Read and write access to the rollup tables of one database."""
+
+    def __init__(self, path, tiers=DEFAULT_TIERS, metrics=ROLLUP_METRICS):
+        self.path = path
+        self.tiers = tuple(tiers)
+        self.metrics = list(metrics)
+        self._local = threading.local()
+        self._upserts = {tier.name: _upsert_sql(tier, self.metrics) for tier in self.tiers}
+
+    def connection(self, readonly=False):
+        """One connection per thread; the schema is created by the first writer."""
+        key = 'reader' if readonly else 'writer'
+        conn = getattr(self._local, key, None)
+        if conn is None:
+            conn = connect(self.path, readonly=readonly)
+            if not readonly:
+                ensure_schema(conn, self.tiers, self.metrics)
+            setattr(self._local, key, conn)
+        return conn
+
+    def empty(self):
+        """Whether no tier holds a bucket yet, e.g. because rollups were just enabled."""
+        conn = self.connection()
+        return not any(conn.execute(f"SELECT 1 FROM {table_name(tier)} LIMIT 1").fetchone() for tier in self.tiers)
+
+    def upsert(self, taken):
+        """Merge RollupAggregator.take() output into the tables in one transaction."""
+        conn = self.connection()
+        with conn:
+            for tier in self.tiers:
+                sql, _ = self._upserts[tier.name]
+                conn.executemany(sql, (
+                    [host, bucket, delta['samples'], delta['last_timestamp']]
+                    + [value for stats in delta['stats'] for value in stats]
+                    for host, bucket, delta in taken.get(tier.name, ())
+                ))
+
+    def compact(self, now=None):
+        """Delete rows past each tier's retention; returns the number deleted."""
+        now = now or datetime.now()
+        conn = self.connection()
+        deleted = 0
+        with conn:
+            for tier in self.tiers:
+                cutoff = (now - timedelta(seconds=tier.retention)).isoformat()
+                deleted += conn.execute(f"DELETE FROM {table_name(tier)} WHERE bucket < ?", (cutoff,)).rowcount
+        return deleted
+
+    def history_query(self, tier, computer_name, metrics, start, end=None, stats=('mean',), counters=()):
+        """SQL and parameters for a host's buckets between start and end, oldest first.
+
+        The mean of a metric is returned under the metric's own name, other
+        stats as metric_stat. Each of counters is returned with its last
+        value under its own name, along with the bucket's last_timestamp,
+        to derive rates from.
+        """
+        select = ['bucket AS timestamp']
+        if counters:
+            select.append('last_timestamp')
+            select += [f"{counter}_last AS {counter}" for counter in counters]
+        for metric in metrics:
+            for stat in stats:
+                alias = metric if stat == 'mean' else f"{metric}_{stat}"
+                expr = f"{metric}_sum / NULLIF({metric}_count, 0)" if stat == 'mean' else f"{metric}_{stat}"
+                select.append(f"{expr} AS {alias}")
+        sql = f"SELECT {', '.join(select)} FROM {table_name(tier)} WHERE computer_name = ? AND bucket >= ?"
+        params = [computer_name, start]
+        if end is not None:
+            sql += " AND bucket <= ?"
+            params.append(end)
+        return sql + " ORDER BY bucket", params
+
+    def close(self):
+        for key in ('reader', 'writer'):
+            conn = getattr(self._local, key, None)
+            if conn is not None:
+                conn.close()
+                setattr(self._local, key, None)
+
+
+def compact_csv(path, cutoff):
+    """Drop rows older than cutoff from the front of a sample CSV.
+
+    The file is rewritten beside itself and moved into place, so writers
+    and readers see a new inode and reopen it. Rows are assumed to be
+    appended in time order: copying starts at the first row not older
+    than cutoff. Returns the number of rows dropped.
+    """
+    try:
+        src = open(path, 'rb')
+    except FileNotFoundError:
+        return 0
+    with src:
+        header = src.readline()
+        dropped = 0
+        while True:
+            position = src.tell()
+            line = src.readline()
+            if not line:
+                break
+            try:
+                timestamp = datetime.fromisoformat(line.split(b',', 1)[0].decode('utf-8'))
+            except ValueError:
+                timestamp = None
+            # Incomplete or unparseable lines are kept rather than guessed at
+            if timestamp is None or timestamp >= cutoff or not line.endswith(b'\n'):
+                break
+            dropped += 1
+        if not dropped:
+            return 0
+        src.seek(position)
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as dst:
+                dst.write(header)
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    logger.info(f"Compacted {path}: dropped {dropped} rows older than {cutoff.isoformat()}")
+    return dropped
+
+
+def compact_samples_db(path, cutoff):
+    """Delete raw samples older than cutoff from a sample database."""
+    conn = connect(path)
+    try:
+        with conn:
+            deleted = conn.execute("DELETE FROM samples WHERE timestamp < ?", (cutoff.isoformat(),)).rowcount
+    finally:
+        conn.close()
+    if deleted:
+        logger.info(f"Compacted {path}: deleted {deleted} samples older than {cutoff.isoformat()}")
+    return deleted
+
+
+class RollupSink:
+    """Wrap a sample sink so every row written is also rolled up.
+
+    Rows are aggregated in memory and upserted every flush_interval
+    seconds (and on flush/close). Every compact_interval seconds a
+    background thread runs compact(): compact_raw(cutoff) drops raw
+    samples past raw_retention and the rollup tables are trimmed to their
+    retention, without holding up writes. compact_raw must be safe to run
+    beside the wrapped sink (see CsvSampleWriter.rewrite). Rollup failures
+    are logged and never reach the wrapped sink.
+    """
+
+    def __init__(self, sink, store, raw_retention=DEFAULT_RAW_RETENTION, compact_raw=None,
+                 flush_interval=60, compact_interval=3600, clock=time.monotonic):
+        self.sink = sink
+        self.store = store
+        self.raw_retention = raw_retention
+        self.compact_raw = compact_raw
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self._clock = clock
+        self._aggregator = RollupAggregator(store.tiers, store.metrics)
+        self._last_flush = clock()
+        # Compact soon after start, then on the interval
+        self._last_compact = clock() - compact_interval + min(flush_interval, compact_interval)
+        self._compaction = None
+        self._stats = {'rollup_flushes': 0, 'rollup_errors': 0, 'compactions': 0,
+                       'raw_rows_compacted': 0, 'rollup_rows_compacted': 0}
+
+    @property
+    def pending(self):
+        return self.sink.pending
+
+    @property
+    def healthy(self):
+        return self.sink.healthy
+
+    def take_pending(self):
+        return self.sink.take_pending()
+
+    def write(self, row):
+        self._aggregator.add(row)
+        try:
+            self.sink.write(row)
+        finally:
+            self._maintain()
+
+    def write_many(self, rows):
+        try:
+            self.sink.write_many(rows)
+            # Only once stored: a failed batch is retried by its sender
+            for row in rows:
+                self._aggregator.add(row)
+        finally:
+            self._maintain()
+
+    def flush(self):
+        try:
+            self.sink.flush()
+        finally:
+            self.flush_rollups()
+
+    def close(self, *args, **kwargs):
+        if self._compaction is not None:
+            self._compaction.join()
+        try:
+            self.sink.close(*args, **kwargs)
+        finally:
+            self.flush_rollups()
+            self.store.close()
+
+    def flush_rollups(self):
+        """Upsert the buckets aggregated since the last flush."""
+        self._last_flush = self._clock()
+        if not len(self._aggregator):
+            return
+        taken = self._aggregator.take()
+        try:
+            self.store.upsert(taken)
+            self._stats['rollup_flushes'] += 1
+        except Exception:
+            self._stats['rollup_errors'] += 1
+            logger.exception(f"Could not write rollups to {self.store.path}")
+
+    def compact(self, now=None):
+        """Trim raw samples and rollup tiers to their retention."""
+        now = now or datetime.now()
+        self._last_compact = self._clock()
+        try:
+            if self.compact_raw is not None:
+                # Rows still buffered are newer than the cutoff, so need no flush first
+                self._stats['raw_rows_compacted'] += self.compact_raw(now - timedelta(seconds=self.raw_retention))
+            self._stats['rollup_rows_compacted'] += self.store.compact(now)
+            self._stats['compactions'] += 1
+        except Exception:
+            self._stats['rollup_errors'] += 1
+            logger.exception("Compaction failed")
+
+    def _maintain(self):
+        now = self._clock()
+        if now - self._last_flush >= self.flush_interval:
+            self.flush_rollups()
+        if now - self._last_compact >= self.compact_interval:
+            self._start_compaction()
+
+    def _start_compaction(self):
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._last_compact = self._clock()
+        self._compaction = threading.Thread(target=self._compact_in_background, name='rollup-compaction', daemon=True)
+        self._compaction.start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        finally:
+            # The store's connections are per thread
+            self.store.close()
+
+    @property
+    def stats(self):
+        return {**self.sink.stats, **self._stats}
+
+
+def csv_rows(path):
+    """Sample rows of a server_data.csv file."""
+    with open(path, newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def sqlite_rows(path):
+    """Sample rows of a sample database, oldest first."""
+    conn = connect(path, readonly=True)
+    try:
+        for row in conn.execute("SELECT * FROM samples ORDER BY timestamp"):
+            yield dict(row)
+    finally:
+        conn.close()
+
+
+def rebuild(rows, store, batch_rows=10000):
+    """Roll up existing sample rows into store; returns the number of rows.
+
+    Meant for rollup tables that are empty: rows already rolled up would
+    be counted twice.
+    """
+    aggregator = RollupAggregator(store.tiers, store.metrics)
+    count = 0
+    for row in rows:
+        aggregator.add(row)
+        count += 1
+        if count % batch_rows == 0:
+            store.upsert(aggregator.take())
+    store.upsert(aggregator.take())
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sample rollup maintenance")
+    parser.add_argument('--config', default='config.json', help="config.json with the 'rollups' block")
+    commands = parser.add_subparsers(dest='command', required=True)
+    rebuild_cmd = commands.add_parser('rebuild', help="Roll up existing samples into empty rollup tables")
+    rebuild_cmd.add_argument('--db', required=True, help="Database holding the rollup tables")
+    source = rebuild_cmd.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help="Samples from this CSV")
+    source.add_argument('--samples-db', help="Samples from this database")
+    compact_cmd = commands.add_parser('compact', help="Apply the retention of every tier")
+    compact_cmd.add_argument('--db', required=True, help="Database holding the rollup tables")
+    raw = compact_cmd.add_mutually_exclusive_group()
+    raw.add_argument('--csv', help="Also trim raw rows from this CSV")
+    raw.add_argument('--samples-db', help="Also trim raw samples from this database")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    tiers, raw_retention = tiers_from_config(load_settings(args.config))
+    store = RollupStore(args.db, tiers)
+    start = time.monotonic()
+    if args.command == 'rebuild':
+        count = rebuild(csv_rows(args.csv) if args.csv else sqlite_rows(args.samples_db), store)
+        print(f"Rolled up {count} rows into {args.db} in {time.monotonic() - start:.1f}s")
+    else:
+        cutoff = datetime.now() - timedelta(seconds=raw_retention)
+        raw_rows = 0
+        if args.csv:
+            raw_rows = compact_csv(args.csv, cutoff)
+        elif args.samples_db:
+            raw_rows = compact_samples_db(args.samples_db, cutoff)
+        rollup_rows = store.compact()
+        print(f"Dropped {raw_rows} raw rows and {rollup_rows} rollup rows in {time.monotonic() - start:.1f}s")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
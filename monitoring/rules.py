@@ -0,0 +1,310 @@
+# monitoring/rules.py
+"""Alert rules shared by the collector and the dashboard.
+
+Rules are declared in config.json under 'alert_rules' and compiled once
+into a RuleEngine. Samples are fed to it one at a time, per host and in
+timestamp order; each rule keeps a fixed handful of fields per host, so
+evaluation cost does not grow with history. Supported rule types:
+
+    threshold  {"metric": "cpu_usage", "op": ">", "value": 85, "for": 300}
+    rate       {"metric": "disk_usage", "op": ">", "value": 5, "per": 3600}
+    flapping   {"metric": "smartcare_status", "changes": 4, "window": 1800}
+
+Every rule also takes "name", "level" ('warning' or 'danger'), an
+optional "for" (seconds the condition must hold before it fires) and an
+optional "message" template. "metric" may be a list, which expands into
+one rule per metric.
+"""
+import json
+import logging
+import math
+import operator
+from collections import namedtuple
+
+logger = logging.getLogger('Collector')
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+LEVELS = ('warning', 'danger')
+
+DEFAULT_MESSAGES = {
+    'threshold': "{label} is {current} ({op} {value}{sustained})",
+    'rate': "{label} changed by {current} in {period} ({op} {value})",
+    'flapping': "{label} is flapping ({current} changes in {window}s)",
+}
+
+# Used when config.json has no alert_rules
+DEFAULT_RULES = [
+    {'name': 'high_cpu', 'metric': 'cpu_usage', 'op': '>', 'value': 80, 'for': 300,
+     'level': 'danger', 'label': 'CPU usage'},
+    {'name': 'high_memory', 'metric': 'memory_usage', 'op': '>', 'value': 90, 'for': 300,
+     'level': 'danger', 'label': 'Memory usage'},
+    {'name': 'high_disk', 'metric': 'disk_usage', 'op': '>', 'value': 85,
+     'level': 'danger', 'label': 'Disk usage'},
+]
+
+# A transition of one rule on one host; state is 'firing' or 'resolved'
+Alert = namedtuple('Alert', ['rule', 'host', 'level', 'message', 'state', 'timestamp'])
+
+
+class RuleError(ValueError):
+    """Raised for an invalid rule declaration."""
+
+
+class _State:
+    """Everything a rule remembers about one host."""
+    __slots__ = ('last_time', 'last_value', 'baseline_time', 'since', 'firing', 'score', 'message')
+
+    def __init__(self):
+        self.last_time = None
+        self.last_value = None
+        self.baseline_time = None
+        self.since = None
+        self.firing = False
+        self.score = 0.0
+        self.message = None
+
+
+class Rule:
+    """One compiled rule; holds a _State per host."""
+
+    def __init__(self, spec, metric):
+        self.kind = spec.get('type', 'threshold')
+        if self.kind not in DEFAULT_MESSAGES:
+            raise RuleError(f"Unknown rule type {self.kind!r}")
+        self.metric = metric
+        self.name = spec.get('name', f"{self.kind}_{metric}")
+        if isinstance(spec.get('metric'), list):
+            self.name = f"{self.name}:{metric}"
+        self.level = spec.get('level', 'warning')
+        if self.level not in LEVELS:
+            raise RuleError(f"Rule {self.name}: level must be one of {LEVELS}")
+        self.sustain = float(spec.get('for', 0))
+        self.label = spec.get('label') or metric.removesuffix('_status').replace('_', ' ')
+        self.template = spec.get('message', DEFAULT_MESSAGES[self.kind])
+        self.params = {key: spec[key] for key in ('op', 'value', 'per', 'changes', 'window') if key in spec}
+
+        if self.kind in ('threshold', 'rate'):
+            op = spec.get('op', '>')
+            if op not in OPERATORS or 'value' not in spec:
+                raise RuleError(f"Rule {self.name}: needs an op from {list(OPERATORS)} and a value")
+            self._op = OPERATORS[op]
+            self.value = spec['value']
+            self.per = float(spec.get('per', 60))
+        else:
+            self.changes = float(spec.get('changes', 4))
+            self.window = float(spec.get('window', 1800))
+        self.states = {}
+
+    @property
+    def lookback(self):
+        """Seconds of history needed to bring a fresh state up to date."""
+        if self.kind == 'flapping':
+            return self.sustain + 3 * self.window
+        if self.kind == 'rate':
+            return self.sustain + 2 * self.per
+        return self.sustain
+
+    def reset(self, state):
+        """Forget partial progress after a gap in the data."""
+        state.since = None
+        state.last_value = None
+        state.baseline_time = None
+        state.score = 0.0
+
+    def condition(self, state, timestamp, value):
+        """Update state with a sample and return (holds, current) or None to skip."""
+        if self.kind == 'threshold':
+            if isinstance(self.value, str):
+                # Status columns, e.g. {"op": "!=", "value": "Running"}
+                if not isinstance(value, str):
+                    return None
+                return self._op(value, self.value), value
+            number = _number(value)
+            if number is None:
+                return None
+            return self._op(number, self.value), _display(number)
+
+        if self.kind == 'rate':
+            # Change over at least `per` seconds against a baseline sample,
+            # so coarse readings (disk % to one decimal) do not jitter
+            number = _number(value)
+            if number is None:
+                return None
+            if state.baseline_time is None:
+                state.last_value, state.baseline_time = number, timestamp
+                return None
+            elapsed = timestamp - state.baseline_time
+            if elapsed < self.per:
+                return None
+            rate = (number - state.last_value) / elapsed * self.per
+            state.last_value, state.baseline_time = number, timestamp
+            return self._op(rate, self.value), _display(rate)
+
+        # flapping: exponentially decayed count of value changes, so the
+        # "changes within window" estimate needs no per-change history
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None
+        if state.last_time is not None:
+            state.score *= math.exp(-(timestamp - state.last_time) / self.window)
+        if state.last_value is not None and value != state.last_value:
+            state.score += 1
+        state.last_value = value
+        return state.score >= self.changes, round(state.score)
+
+    def format(self, current):
+        sustained = f" for {_duration(self.sustain)}" if self.sustain else ''
+        fields = dict(self.params, label=self.label, metric=self.metric, current=current,
+                      sustained=sustained, op=self.params.get('op', ''),
+                      period=_duration(getattr(self, 'per', 0)))
+        try:
+            return self.template.format(**fields)
+        except (KeyError, IndexError, ValueError):
+            return f"{self.name}: {self.label} is {current}"
+
+
+class RuleEngine:
+    """Evaluates compiled rules incrementally over per-host sample streams.
+
+    evaluate() returns the alerts that fired or resolved with that sample;
+    active() lists what is currently firing for a host. Samples older than
+    the last one seen for a host are ignored, so overlapping replays are
+    harmless. A gap longer than max_gap seconds resets pending 'for'
+    windows and rate baselines instead of bridging across it.
+    """
+
+    def __init__(self, rules, max_gap=600):
+        self.rules = rules
+        self.max_gap = max_gap
+        self._last_seen = {}
+
+    @classmethod
+    def from_config(cls, specs, **kwargs):
+        rules = []
+        for spec in specs:
+            metrics = spec.get('metric')
+            if not metrics:
+                raise RuleError(f"Rule {spec.get('name', spec)} has no metric")
+            for metric in metrics if isinstance(metrics, list) else [metrics]:
+                rules.append(Rule(spec, metric))
+        return cls(rules, **kwargs)
+
+    @property
+    def metrics(self):
+        return sorted({rule.metric for rule in self.rules})
+
+    @property
+    def lookback(self):
+        return max((rule.lookback for rule in self.rules), default=0)
+
+    def last_seen(self, host):
+        return self._last_seen.get(host)
+
+    def evaluate(self, host, timestamp, sample):
+        """Feed one sample (a column -> value mapping) taken at timestamp (epoch seconds)."""
+        last = self._last_seen.get(host)
+        if last is not None and timestamp <= last:
+            return []
+        self._last_seen[host] = timestamp
+        gap = last is not None and timestamp - last > self.max_gap
+
+        alerts = []
+        for rule in self.rules:
+            state = rule.states.get(host)
+            if state is None:
+                state = rule.states[host] = _State()
+            elif gap:
+                rule.reset(state)
+
+            result = rule.condition(state, timestamp, sample.get(rule.metric))
+            state.last_time = timestamp
+            if result is None:
+                continue
+            holds, current = result
+
+            if not holds:
+                state.since = None
+                if state.firing:
+                    state.firing = False
+                    alerts.append(Alert(rule.name, host, rule.level, state.message, 'resolved', timestamp))
+                continue
+
+            if state.since is None:
+                state.since = timestamp
+            if timestamp - state.since >= rule.sustain:
+                state.message = rule.format(current)
+                if not state.firing:
+                    state.firing = True
+                    alerts.append(Alert(rule.name, host, rule.level, state.message, 'firing', timestamp))
+        return alerts
+
+    def active(self, host):
+        """Alerts currently firing for host, most severe first."""
+        firing = [
+            Alert(rule.name, host, rule.level, state.message, 'firing', state.since)
+            for rule in self.rules
+            for state in (rule.states.get(host),)
+            if state is not None and state.firing
+        ]
+        return sorted(firing, key=lambda alert: LEVELS.index(alert.level), reverse=True)
+
+    def forget(self, host):
+        """Drop all state for a host that no longer reports."""
+        self._last_seen.pop(host, None)
+        for rule in self.rules:
+            rule.states.pop(host, None)
+
+
+def rules_from_thresholds(thresholds):
+    """Translate the legacy config.json 'thresholds' block into single-sample rules."""
+    rules = []
+    for key, metric, label in (('cpu_percent', 'cpu_usage', 'CPU usage'),
+                               ('memory_percent', 'memory_usage', 'Memory usage'),
+                               ('disk_percent', 'disk_usage', 'Disk usage')):
+        if key in thresholds:
+            rules.append({'name': f"high_{metric.split('_')[0]}", 'metric': metric, 'op': '>',
+                          'value': thresholds[key], 'level': 'danger', 'label': label})
+    return rules
+
+
+def load_rules(config_path):
+    """Rule declarations from a config.json file, falling back to DEFAULT_RULES."""
+    try:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read alert rules from {config_path}: {e}")
+        return DEFAULT_RULES
+    if 'alert_rules' in config:
+        return config['alert_rules']
+    if 'thresholds' in config:
+        return rules_from_thresholds(config['thresholds'])
+    return DEFAULT_RULES
+
+
+def _number(value):
+    if value is None or value == '' or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _display(number):
+    return round(number, 2)
+
+
+def _duration(seconds):
+    if seconds >= 3600 and seconds % 3600 == 0:
+        return f"{int(seconds // 3600)}h"
+    if seconds >= 60 and seconds % 60 == 0:
+        return f"{int(seconds // 60)}m"
+    return f"{seconds:g}s"
@@ -0,0 +1,149 @@
+# monitoring/sampler.py
+import logging
+import threading
+import time
+from array import array
+
+import psutil
+
+logger = logging.getLogger('Collector')
+
+SAMPLED_METRICS = ('cpu', 'memory', 'upload_mbps', 'download_mbps')
+SUMMARY_STATS = ('min', 'mean', 'max', 'p95')
+
+
+class RingBuffer:
+    """Fixed-size buffer of floats; once full, the oldest values are overwritten."""
+
+    def __init__(self, capacity):
+        self._values = array('d', bytes(8 * capacity))
+        self._capacity = capacity
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self._capacity
+        self._count = min(self._count + 1, self._capacity)
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def values(self):
+        """Held values, oldest first."""
+        if self._count < self._capacity:
+            return self._values[:self._count]
+        return self._values[self._next:] + self._values[:self._next]
+
+
+def summarize(values):
+    """min/mean/max/p95 of values (nearest-rank p95), or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    n = len(ordered)
+    return {
+        'min': ordered[0],
+        'mean': sum(ordered) / n,
+        'max': ordered[-1],
+        'p95': ordered[max(0, -(-95 * n // 100) - 1)],
+    }
+
+
+class SubIntervalSampler(threading.Thread):
+    """Reads CPU, memory and NIC counters several times per collection interval.
+
+    Readings go into one ring buffer per metric; drain() summarizes and
+    empties them once per main interval, so short CPU spikes and traffic
+    bursts show up in the max/p95 columns instead of being averaged away.
+    The thread's own CPU time is tracked in stats so its overhead is visible.
+    """
+
+    def __init__(self, period=0.5, capacity=600):
+        super().__init__(name='sub-interval-sampler', daemon=True)
+        self.period = period
+        self._buffers = {metric: RingBuffer(capacity) for metric in SAMPLED_METRICS}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._started_at = None
+        self.stats = {
+            'samples': 0,
+            'overruns': 0,
+            'cpu_seconds': 0.0,
+            'cpu_percent': 0.0,
+        }
+
+    def run(self):
+        self._started_at = time.monotonic()
+        psutil.cpu_percent(interval=None)  # First call only sets the baseline
+        previous = psutil.net_io_counters()
+        previous_time = time.monotonic()
+        deadline = previous_time
+
+        while True:
+            deadline += self.period
+            delay = deadline - time.monotonic()
+            if delay < 0:
+                # Fell behind (suspended VM, starved thread): restart the grid
+                self.stats['overruns'] += 1
+                deadline = time.monotonic()
+                delay = 0
+            if self._stop_event.wait(delay):
+                break
+
+            cpu_start = time.thread_time()
+            try:
+                now = time.monotonic()
+                counters = psutil.net_io_counters()
+                elapsed = now - previous_time
+                readings = {
+                    'cpu': psutil.cpu_percent(interval=None),
+                    'memory': psutil.virtual_memory().percent,
+                    # Decimal megabits, as in app/data/rates.py; a counter reset reads as 0
+                    'upload_mbps': max(counters.bytes_sent - previous.bytes_sent, 0) * 8 / 1_000_000 / elapsed,
+                    'download_mbps': max(counters.bytes_recv - previous.bytes_recv, 0) * 8 / 1_000_000 / elapsed,
+                }
+                previous, previous_time = counters, now
+                with self._lock:
+                    for metric, value in readings.items():
+                        self._buffers[metric].append(value)
+            except Exception:
+                logger.exception('Sub-interval sample failed')
+
+            self.stats['samples'] += 1
+            self.stats['cpu_seconds'] += time.thread_time() - cpu_start
+            wall = time.monotonic() - self._started_at
+            if wall > 0:
+                self.stats['cpu_percent'] = 100 * self.stats['cpu_seconds'] / wall
+
+    def drain(self):
+        """Summaries of the readings since the last drain, as {'cpu_max': ..., ...}.
+
+        Metrics without readings (the sampler has just started) are left out.
+        """
+        with self._lock:
+            held = {metric: buffer.values() for metric, buffer in self._buffers.items()}
+            for buffer in self._buffers.values():
+                buffer.clear()
+
+        summary = {}
+        for metric, values in held.items():
+            stats = summarize(values)
+            if stats is None:
+                continue
+            for stat, value in stats.items():
+                summary[f'{metric}_{stat}'] = round(value, 2)
+        return summary
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        logger.info(
+            f"Sub-interval sampler took {self.stats['samples']} samples using "
+            f"{self.stats['cpu_seconds']:.2f}s CPU ({self.stats['cpu_percent']:.3f}% of one core)"
+        )
@@ -0,0 +1,48 @@
+# monitoring/samples.py
+
+# Column order of server_data.csv and every other sample sink
+FIELDNAMES = [
+    "timestamp", "computer_name", "cpu_usage", "memory_usage",
+    "disk_usage", "network_bytes_sent", "network_bytes_recv",
+    "upload_speed_mbps", "download_speed_mbps",
+    "local_ip", "public_ip", "smartcare_status", "sql_server_status",
+    "smartlink_status", "etims_status", "tims_status",
+    "internet_upload_speed", "internet_download_speed"
+]
+
+# Appended when the sub-interval sampler is enabled: cpu_min, cpu_mean, ...
+SUMMARY_FIELDNAMES = [
+    f"{metric}_{stat}"
+    for metric in ("cpu", "memory", "upload_mbps", "download_mbps")
+    for stat in ("min", "mean", "max", "p95")
+]
+
+
+def sample_fieldnames(sub_interval=False):
+    """Columns written by the collector, with the summary columns if sampling."""
+    return FIELDNAMES + SUMMARY_FIELDNAMES if sub_interval else list(FIELDNAMES)
+
+
+def sample_to_row(data):
+    """Flatten a collect_system_info() result into a FIELDNAMES row."""
+    return {
+        "timestamp": data['timestamp'],
+        "computer_name": data['computer_name'],
+        "cpu_usage": data['cpu']['usage_percent'],
+        "memory_usage": data['memory']['percent'],
+        "disk_usage": data['disk']['percent'],
+        "network_bytes_sent": data['network']['bytes_sent'],
+        "network_bytes_recv": data['network']['bytes_recv'],
+        "upload_speed_mbps": data['network']['upload_speed_mbps'],
+        "download_speed_mbps": data['network']['download_speed_mbps'],
+        "local_ip": data['local_ip'],
+        "public_ip": data['public_ip'],
+        "smartcare_status": data['application_status'].get('smartcare', 'Unknown'),
+        "sql_server_status": data['application_status'].get('sql_server', 'Unknown'),
+        "smartlink_status": data['application_status'].get('smartlink', 'Unknown'),
+        "etims_status": data['application_status'].get('etims', 'Unknown'),
+        "tims_status": data['application_status'].get('tims', 'Unknown'),
+        "internet_upload_speed": data['internet_speed']['upload'],
+        "internet_download_speed": data['internet_speed']['download'],
+        **data.get('sub_interval', {})
+    }
@@ -0,0 +1,59 @@
+# monitoring/scheduler.py
+import logging
+import math
+import time
+from collections import namedtuple
+
+logger = logging.getLogger('Collector')
+
+# index: position on the grid; timestamp: wall-clock grid time (epoch seconds);
+# lateness: seconds between the grid time and when the tick actually fired;
+# missed: grid points skipped since the previous tick because work overran
+Tick = namedtuple('Tick', ['index', 'timestamp', 'lateness', 'missed'])
+
+
+class FixedRateScheduler:
+    """Fire ticks at a fixed rate on the monotonic clock.
+
+    Deadlines are computed from the start time rather than by sleeping after
+    the work, so the cadence does not drift with cycle duration. Grid
+    timestamps are aligned to multiples of the interval. When a cycle
+    overruns, the next tick fires immediately on the latest grid point that
+    has passed and the skipped points are reported as missed.
+    """
+
+    def __init__(self, interval, clock=time.monotonic, wall_clock=time.time):
+        self.interval = interval
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.missed_ticks = 0
+
+    def ticks(self, stop_event):
+        """Yield Tick values until stop_event is set."""
+        wall_now = self._wall_clock()
+        wall_start = math.ceil(wall_now / self.interval) * self.interval
+        mono_start = self._clock() + (wall_start - wall_now)
+
+        index = 0
+        missed = 0
+        while True:
+            deadline = mono_start + index * self.interval
+            delay = deadline - self._clock()
+            if delay > 0:
+                if stop_event.wait(delay):
+                    return
+            elif stop_event.is_set():
+                return
+
+            grid_time = round(wall_start + index * self.interval, 6)
+            yield Tick(index, grid_time, self._clock() - deadline, missed)
+
+            latest_due = math.floor((self._clock() - mono_start) / self.interval)
+            if latest_due > index + 1:
+                missed = latest_due - index - 1
+                self.missed_ticks += missed
+                logger.warning(f"Collection cycle overran: skipped {missed} tick(s) of {self.interval}s")
+                index = latest_due
+            else:
+                missed = 0
+                index += 1
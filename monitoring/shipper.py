@@ -0,0 +1,216 @@
+# monitoring/shipper.py
+import gzip
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+
+logger = logging.getLogger('Collector')
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class BatchShipper:
+    """Sample sink that ships batches of rows to a central HTTP endpoint.
+
+    Rows are grouped into a batch until batch_size rows are waiting or the
+    oldest row is max_batch_age seconds old. Sealed batches are posted by a
+    background thread as gzip-compressed JSON over one keep-alive session.
+    Every batch carries an Idempotency-Key that stays the same across its
+    retries, so the server can drop duplicates. Retries use exponential
+    backoff with full jitter and honour Retry-After. A batch that still
+    fails is passed to on_failure(rows, batch_id) (or dropped if there is
+    none); write_batches() can later queue it again under the same id.
+    """
+
+    def __init__(self, url, batch_size=100, max_batch_age=60, timeout=10, max_retries=5,
+                 backoff_base=1, backoff_max=60, max_pending_batches=100, on_failure=None,
+                 headers=None, clock=time.monotonic):
+        self.url = url
+        self.batch_size = batch_size
+        self.max_batch_age = max_batch_age
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.on_failure = on_failure
+        self._clock = clock
+
+        self._rows = []
+        self._batch_started = None
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_pending_batches)
+        self._stop_event = threading.Event()
+        self.healthy = True
+
+        # Imported here so the collector only pays for requests when shipping is enabled
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._session.headers.update({
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+            **(headers or {})
+        })
+
+        self.stats = {
+            'batches_sent': 0,
+            'rows_sent': 0,
+            'bytes_sent': 0,
+            'retries': 0,
+            'batches_failed': 0,
+            'last_send_ms': 0.0
+        }
+        self._thread = threading.Thread(target=self._run, name='shipper', daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return len(self._rows) + self._queue.qsize()
+
+    def write(self, row):
+        """Add a row to the open batch, sealing it once it is full or old enough."""
+        with self._lock:
+            if not self._rows:
+                self._batch_started = self._clock()
+            self._rows.append(row)
+            due = len(self._rows) >= self.batch_size or self._clock() - self._batch_started >= self.max_batch_age
+        if due:
+            self.flush()
+
+    def take_pending(self):
+        """Remove and return rows not yet sealed into a batch."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        return rows
+
+    def write_many(self, rows):
+        """Queue rows as batches right away; raises if the send queue has no room for them."""
+        self.write_batches([(None, rows)])
+
+    def write_batches(self, batches):
+        """Queue (batch_id, rows) pairs, all or none; raises if the send queue has no room.
+
+        A batch that was sent before keeps its id, so the receiver can
+        recognise a replay; rows without one are split into new batches.
+        """
+        sealed = []
+        for batch_id, rows in batches:
+            if batch_id is not None:
+                sealed.append({'batch_id': batch_id, 'rows': rows})
+                continue
+            sealed.extend({'batch_id': str(uuid.uuid4()), 'rows': rows[i:i + self.batch_size]}
+                          for i in range(0, len(rows), self.batch_size))
+        if self._queue.maxsize - self._queue.qsize() < len(sealed):
+            raise RuntimeError("shipping queue is full")
+        for batch in sealed:
+            self._queue.put_nowait(batch)
+
+    def flush(self):
+        """Seal the open batch and hand it to the sender thread."""
+        with self._lock:
+            if not self._rows:
+                return
+            batch = {'batch_id': str(uuid.uuid4()), 'rows': self._rows}
+            self._rows = []
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            logger.error(f"Shipping queue full, dropping batch of {len(batch['rows'])} rows")
+            self._fail(batch)
+
+    def close(self, timeout=10):
+        """Ship what is pending, waiting up to timeout seconds for the sender.
+
+        Never blocks for much longer than timeout: when the queue is full or
+        the sender is stuck retrying, its retries are abandoned and anything
+        still queued goes to on_failure.
+        """
+        deadline = time.monotonic() + timeout
+        self.flush()
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("Shipping queue still full at shutdown, abandoning retries")
+        else:
+            self._thread.join(max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            self._stop_event.set()
+            self._thread.join(self.timeout)
+        while True:
+            try:
+                batch = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is not None:
+                self._fail(batch)
+        self._session.close()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                # Wakes up now and then so a stop request is noticed with an empty queue
+                batch = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if batch is None:
+                return
+            self.healthy = self._send(batch)
+            if not self.healthy:
+                self._fail(batch)
+
+    def _send(self, batch):
+        import requests
+
+        body = gzip.compress(json.dumps(batch, default=str).encode('utf-8'))
+        headers = {'Idempotency-Key': batch['batch_id']}
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+            retry_after = None
+            start = self._clock()
+            try:
+                response = self._session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+                if response.status_code < 300:
+                    self.stats['batches_sent'] += 1
+                    self.stats['rows_sent'] += len(batch['rows'])
+                    self.stats['bytes_sent'] += len(body)
+                    self.stats['last_send_ms'] = (self._clock() - start) * 1000
+                    return True
+                if response.status_code not in RETRYABLE_STATUS:
+                    logger.error(f"Shipping rejected with HTTP {response.status_code}: {response.text[:200]}")
+                    return False
+                retry_after = _retry_after_seconds(response)
+                logger.warning(f"Shipping got HTTP {response.status_code} (attempt {attempt + 1})")
+            except requests.RequestException as e:
+                logger.warning(f"Shipping failed (attempt {attempt + 1}): {str(e)}")
+
+            if attempt < self.max_retries:
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if self._stop_event.wait(delay):
+                    break
+        return False
+
+    def _fail(self, batch):
+        self.stats['batches_failed'] += 1
+        if self.on_failure is not None:
+            self.on_failure(batch['rows'], batch['batch_id'])
+        else:
+            logger.error(f"Dropped batch {batch['batch_id']} of {len(batch['rows'])} rows")
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,151 @@
+# monitoring/speedtest_worker.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger('Collector')
+
+
+class SpeedTestCancelled(Exception):
+    """Raised between speed test phases when the worker is stopping."""
+
+
+def run_speed_test(stop_event=None):
+    """Perform an internet speed test using speedtest-cli.
+
+    Returns (download_mbps, upload_mbps), or None if the test failed or was
+    cancelled. speedtest-cli cannot be interrupted mid-transfer, so
+    cancellation is checked between phases.
+    """
+    import speedtest
+
+    def checkpoint():
+        if stop_event is not None and stop_event.is_set():
+            raise SpeedTestCancelled()
+
+    try:
+        logger.info("Starting internet speed test...")
+        st = speedtest.Speedtest(secure=True)  # Use HTTPS
+        
+        # Configure timeouts
+        st.timeout = 30  # 30 second timeout
+        
+        # Get server list
+        logger.info("Getting server list...")
+        st.get_servers()
+        checkpoint()
+        
+        # Get best server
+        logger.info("Finding best server...")
+        best = st.get_best_server()
+        logger.info(f"Selected server: {best['host']} ({best['country']})")
+        checkpoint()
+        
+        # Get download speed in bits per second
+        logger.info("Testing download speed...")
+        download_mbps = st.download() / 1_000_000
+        checkpoint()
+        
+        # Get upload speed in bits per second
+        logger.info("Testing upload speed...")
+        upload_mbps = st.upload() / 1_000_000
+        
+        logger.info(f"Speed test completed - Download: {download_mbps:.2f} Mbps, Upload: {upload_mbps:.2f} Mbps")
+        return round(download_mbps, 2), round(upload_mbps, 2)
+    except SpeedTestCancelled:
+        logger.info("Speed test cancelled")
+        return None
+    except speedtest.ConfigRetrievalError:
+        logger.error("Failed to retrieve speedtest.net configuration. Check network connectivity.")
+        return None
+    except speedtest.NoMatchedServers:
+        logger.error("No matched servers - could not find a suitable speedtest.net server.")
+        return None
+    except Exception as e:
+        logger.error(f"Error during speed test: {str(e)}")
+        return None
+
+
+class SpeedTestWorker(threading.Thread):
+    """Background thread that runs speed tests on a jittered schedule.
+
+    The sampler only ever reads the last published result through latest(),
+    so a 30+ second test never holds up a sample. The result is persisted to
+    state_path so a restart resumes the schedule instead of testing at once.
+    """
+
+    def __init__(self, interval=600, jitter=0.2, startup_delay=120, state_path=None, test_func=run_speed_test):
+        super().__init__(name='speedtest', daemon=True)
+        self.interval = interval
+        self.jitter = jitter
+        self.startup_delay = startup_delay
+        self.state_path = state_path
+        self._test_func = test_func
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._result = {'download': 0, 'upload': 0, 'completed_at': None}
+        self._load_state()
+
+    def latest(self):
+        """Return the last published (download_mbps, upload_mbps)."""
+        with self._lock:
+            return self._result['download'], self._result['upload']
+
+    def stop(self, timeout=None):
+        """Ask the worker to finish and wait for it."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        delay = self._initial_delay()
+        logger.info(f"Next speed test in {delay:.0f}s")
+        while not self._stop_event.wait(delay):
+            result = self._test_func(self._stop_event)
+            if result is not None:
+                self._publish(*result)
+            delay = self._jittered(self.interval)
+
+    def _jittered(self, seconds):
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _initial_delay(self):
+        completed_at = self._result['completed_at']
+        if completed_at is None:
+            return self._jittered(self.startup_delay)
+        due_in = completed_at + self.interval - time.time()
+        return max(due_in, self._jittered(self.startup_delay))
+
+    def _publish(self, download, upload):
+        with self._lock:
+            self._result = {'download': download, 'upload': upload, 'completed_at': time.time()}
+            state = dict(self._result)
+        self._save_state(state)
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            self._result = {
+                'download': state['download'],
+                'upload': state['upload'],
+                'completed_at': state['completed_at']
+            }
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable speed test state {self.state_path}: {e}")
+
+    def _save_state(self, state):
+        if not self.state_path:
+            return
+        try:
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Could not persist speed test result: {e}")
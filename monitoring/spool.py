@@ -0,0 +1,388 @@
+# monitoring/spool.py
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+
+logger = logging.getLogger('Collector')
+
+# length of payload, crc32 of (created + payload), created (epoch seconds)
+_HEADER = struct.Struct('<IId')
+_SEGMENT_SUFFIX = '.seg'
+_CURSOR_FILE = 'cursor'
+
+
+class TokenBucket:
+    """Rate limiter that refills at rate tokens per second up to burst."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    def available(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return int(self._tokens)
+
+    def consume(self, amount):
+        self._tokens -= amount
+
+
+class Spool:
+    """Durable, size-capped queue of undelivered rows on disk.
+
+    Rows are appended as CRC-checked records to numbered segment files and
+    read back oldest-first. A cursor file records how far replay has got,
+    and fully replayed segments are deleted. Once the spool exceeds
+    max_bytes, the oldest segments are dropped. A record that fails its CRC
+    (for example a write torn by a crash) ends replay of its segment and
+    the reader moves on to the next one.
+    """
+
+    def __init__(self, directory, segment_bytes=4 * 1024 * 1024, max_bytes=256 * 1024 * 1024,
+                 fsync=True, clock=time.time):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self._clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments = sorted(self._segment_numbers())
+        self._cursor = self._load_cursor()
+        # Never append to a segment left over from a previous run; its tail may be torn
+        self._tail = None
+        self._tail_number = (self._segments[-1] + 1) if self._segments else 1
+
+        self.stats = {
+            'records': 0,
+            'bytes': 0,
+            'appended_rows': 0,
+            'replayed_rows': 0,
+            'dropped_bytes': 0,
+            'corrupt_records': 0,
+            'replay_rows_per_second': 0.0
+        }
+        self._count_existing()
+
+    def __len__(self):
+        return self.stats['records']
+
+    # -- writing --------------------------------------------------------
+
+    def append(self, rows, batch_id=None):
+        """Persist rows as one record, with the id of the batch they were sent as (if any)."""
+        if not rows:
+            return
+        created = self._clock()
+        body = rows if batch_id is None else {'batch_id': batch_id, 'rows': rows}
+        payload = json.dumps(body, default=str).encode('utf-8')
+        crc = zlib.crc32(struct.pack('<d', created) + payload)
+        record = _HEADER.pack(len(payload), crc, created) + payload
+        with self._lock:
+            tail = self._open_tail()
+            tail.write(record)
+            tail.flush()
+            if self.fsync:
+                os.fsync(tail.fileno())
+            self.stats['records'] += 1
+            self.stats['bytes'] += len(record)
+            self.stats['appended_rows'] += len(rows)
+            if tail.tell() >= self.segment_bytes:
+                tail.close()
+                self._tail = None
+                self._tail_number += 1
+            self._enforce_cap()
+
+    def _open_tail(self):
+        if self._tail is None:
+            self._tail = open(self._segment_path(self._tail_number), 'ab')
+            if self._tail_number not in self._segments:
+                self._segments.append(self._tail_number)
+        return self._tail
+
+    def _enforce_cap(self):
+        while self.stats['bytes'] > self.max_bytes and len(self._segments) > 1:
+            oldest = self._segments[0]
+            if oldest == self._tail_number and self._tail is not None:
+                break
+            records, size = self._scan_segment(oldest, self._start_offset(oldest))
+            self._remove_segment(oldest)
+            self.stats['records'] -= records
+            self.stats['bytes'] -= size
+            self.stats['dropped_bytes'] += size
+            logger.warning(f"Spool over {self.max_bytes} bytes, dropped {records} record(s) from segment {oldest}")
+
+    # -- replay ---------------------------------------------------------
+
+    def oldest_age(self):
+        """Seconds since the oldest unreplayed record was spooled, or 0 if empty."""
+        with self._lock:
+            for number in self._segments:
+                header = self._read_header(number, self._start_offset(number))
+                if header is not None:
+                    return max(0.0, self._clock() - header[2])
+        return 0.0
+
+    def replay(self, deliver, max_rows):
+        """Deliver up to max_rows spooled rows, oldest first.
+
+        deliver(batches) gets a list of (batch_id, rows), one per record;
+        batch_id is None for rows that were never sent as a batch. It must
+        raise if delivery fails; the rows then stay in the spool. Returns
+        the number of rows delivered.
+        """
+        with self._lock:
+            batches, records, size, position = self._read_batch(max_rows)
+        rows = sum(len(batch_rows) for _, batch_rows in batches)
+        if not rows:
+            return 0
+
+        start = time.monotonic()
+        deliver(batches)
+        elapsed = time.monotonic() - start
+
+        with self._lock:
+            self._commit(position)
+            self.stats['records'] = max(0, self.stats['records'] - records)
+            self.stats['bytes'] = max(0, self.stats['bytes'] - size)
+            self.stats['replayed_rows'] += rows
+            if elapsed > 0:
+                self.stats['replay_rows_per_second'] = round(rows / elapsed, 1)
+        return rows
+
+    def _read_batch(self, max_rows):
+        batches, rows, records, size = [], 0, 0, 0
+        position = None
+        for number in list(self._segments):
+            offset = self._start_offset(number)
+            if number == self._tail_number and self._tail is not None:
+                self._tail.flush()
+            with open(self._segment_path(number), 'rb') as f:
+                f.seek(offset)
+                while rows < max_rows:
+                    record = self._read_record(f, number)
+                    if record is None:
+                        break
+                    size += f.tell() - offset
+                    offset = f.tell()
+                    records += 1
+                    if record[1]:
+                        batches.append(record)
+                        rows += len(record[1])
+                position = (number, offset)
+            if rows >= max_rows:
+                break
+        return batches, records, size, position
+
+    def _read_record(self, f, number):
+        """Next record as (batch_id, rows), with no rows for a corrupt record
+        (skipping to segment end), or None at the end."""
+        header = f.read(_HEADER.size)
+        if not header:
+            return None
+        if len(header) == _HEADER.size:
+            length, crc, created = _HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) == length and zlib.crc32(struct.pack('<d', created) + payload) == crc:
+                record = json.loads(payload)
+                # Records without a batch id are a plain list of rows
+                if isinstance(record, dict):
+                    return record.get('batch_id'), record['rows']
+                return None, record
+        self.stats['corrupt_records'] += 1
+        logger.error(f"Corrupt record in spool segment {number}, skipping the rest of it")
+        f.seek(0, os.SEEK_END)
+        return None, []
+
+    def _commit(self, position):
+        number, offset = position
+        if number not in self._segments:
+            # Dropped by the size cap while its rows were being delivered
+            return
+        # Segments before the cursor, and the cursor's own segment once it is
+        # complete and no longer being written, are fully replayed
+        for older in [n for n in self._segments if n < number]:
+            self._remove_segment(older)
+        is_tail = number == self._tail_number and self._tail is not None
+        if not is_tail and offset >= os.path.getsize(self._segment_path(number)):
+            self._remove_segment(number)
+            self._cursor = None
+        else:
+            self._cursor = (number, offset)
+        self._save_cursor()
+
+    # -- bookkeeping ----------------------------------------------------
+
+    def _segment_numbers(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(_SEGMENT_SUFFIX):
+                yield int(name[:-len(_SEGMENT_SUFFIX)])
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{number:020d}{_SEGMENT_SUFFIX}")
+
+    def _start_offset(self, number):
+        if self._cursor is not None and self._cursor[0] == number:
+            return self._cursor[1]
+        return 0
+
+    def _remove_segment(self, number):
+        if number == self._tail_number and self._tail is not None:
+            self._tail.close()
+            self._tail = None
+            self._tail_number += 1
+        try:
+            os.remove(self._segment_path(number))
+        except FileNotFoundError:
+            pass
+        self._segments.remove(number)
+        if self._cursor is not None and self._cursor[0] == number:
+            self._cursor = None
+
+    def _read_header(self, number, offset):
+        with open(self._segment_path(number), 'rb') as f:
+            f.seek(offset)
+            header = f.read(_HEADER.size)
+        return _HEADER.unpack(header) if len(header) == _HEADER.size else None
+
+    def _scan_segment(self, number, offset):
+        records = 0
+        with open(self._segment_path(number), 'rb') as f:
+            f.seek(offset)
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                length = _HEADER.unpack(header)[0]
+                f.seek(length, os.SEEK_CUR)
+                records += 1
+            size = f.tell() - offset
+        return records, size
+
+    def _count_existing(self):
+        for number in self._segments:
+            records, size = self._scan_segment(number, self._start_offset(number))
+            self.stats['records'] += records
+            self.stats['bytes'] += size
+
+    def _load_cursor(self):
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        try:
+            with open(path) as f:
+                number, offset = (int(part) for part in f.read().split())
+            return (number, offset) if number in self._segments else None
+        except (OSError, ValueError):
+            return None
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, _CURSOR_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            if self._cursor is not None:
+                f.write(f"{self._cursor[0]} {self._cursor[1]}")
+        os.replace(tmp_path, path)
+
+    def close(self):
+        with self._lock:
+            if self._tail is not None:
+                self._tail.close()
+                self._tail = None
+
+
+class SpooledSink:
+    """Wrap a sample sink so rows it fails to deliver are spooled and replayed.
+
+    When the sink raises, its pending rows go to the spool. Once the sink
+    reports healthy again, spooled rows are replayed oldest-first in batches
+    of up to replay_batch_rows, paced by a token bucket of
+    replay_rows_per_second so a backlog does not saturate the link.
+    Shippers that fail asynchronously report through spool_rows(), with
+    the batch id the rows were sent under; a sink with write_batches()
+    gets each spooled batch back under that id, so a receiver can drop
+    duplicates. Other sinks get the rows through write_many().
+    """
+
+    def __init__(self, sink, spool, replay_rows_per_second=200, replay_batch_rows=1000):
+        self.sink = sink
+        self.spool = spool
+        self.replay_batch_rows = replay_batch_rows
+        self._bucket = TokenBucket(replay_rows_per_second, replay_batch_rows)
+
+    @property
+    def pending(self):
+        return self.sink.pending
+
+    def write(self, row):
+        try:
+            self.sink.write(row)
+        except Exception as e:
+            logger.error(f"Delivery failed, spooling pending rows: {str(e)}")
+            self.spool_rows(self.sink.take_pending())
+            return
+        self.replay()
+
+    def spool_rows(self, rows, batch_id=None):
+        """Persist rows that could not be delivered."""
+        try:
+            self.spool.append(rows, batch_id)
+        except Exception:
+            logger.exception(f"Could not spool {len(rows)} undelivered rows")
+
+    def replay(self):
+        """Replay a rate-limited batch of spooled rows if the sink is healthy."""
+        if not len(self.spool) or not self.sink.healthy:
+            return 0
+        budget = min(self._bucket.available(), self.replay_batch_rows)
+        if budget <= 0:
+            return 0
+        try:
+            replayed = self.spool.replay(self._deliver, budget)
+        except Exception as e:
+            logger.warning(f"Spool replay failed, will retry: {str(e)}")
+            return 0
+        self._bucket.consume(replayed)
+        if replayed:
+            logger.info(f"Replayed {replayed} spooled rows, {len(self.spool)} record(s) left")
+        return replayed
+
+    def _deliver(self, batches):
+        if hasattr(self.sink, 'write_batches'):
+            self.sink.write_batches(batches)
+        else:
+            self.sink.write_many([row for _, rows in batches for row in rows])
+
+    def flush(self):
+        try:
+            self.sink.flush()
+        except Exception as e:
+            logger.error(f"Flush failed, spooling pending rows: {str(e)}")
+            self.spool_rows(self.sink.take_pending())
+
+    def close(self, *args, **kwargs):
+        try:
+            self.sink.close(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Close failed, spooling pending rows: {str(e)}")
+            self.spool_rows(self.sink.take_pending())
+        finally:
+            self.spool.close()
+
+    @property
+    def stats(self):
+        return {
+            **self.sink.stats,
+            'spool_records': len(self.spool),
+            'spool_bytes': self.spool.stats['bytes'],
+            'spool_oldest_age_seconds': round(self.spool.oldest_age(), 1),
+            'spool_replayed_rows': self.spool.stats['replayed_rows'],
+            'spool_replay_rows_per_second': self.spool.stats['replay_rows_per_second']
+        }
@@ -0,0 +1,272 @@
+# monitoring/storage.py
+"""SQLite storage for samples.
+
+The collector writes through SqliteSampleWriter and the dashboard reads
+through SqliteSampleStore. Both share one schema: a samples table indexed
+on (computer_name, timestamp), stored in WAL mode so readers never block
+the writer. Existing CSV history can be imported with:
+
+    python -m monitoring.storage import-csv server_data.csv server_data.db
+"""
+import argparse
+import csv
+import logging
+import sqlite3
+import threading
+import time
+
+from .samples import FIELDNAMES, SUMMARY_FIELDNAMES
+
+logger = logging.getLogger('Collector')
+
+COLUMN_TYPES = {
+    "timestamp": "TEXT NOT NULL",
+    "computer_name": "TEXT NOT NULL",
+    "cpu_usage": "REAL",
+    "memory_usage": "REAL",
+    "disk_usage": "REAL",
+    "network_bytes_sent": "INTEGER",
+    "network_bytes_recv": "INTEGER",
+    "upload_speed_mbps": "REAL",
+    "download_speed_mbps": "REAL",
+    "internet_upload_speed": "REAL",
+    "internet_download_speed": "REAL",
+    **{name: "REAL" for name in SUMMARY_FIELDNAMES},
+}
+
+
+def connect(path, readonly=False):
+    """Open a connection with the pragmas every sample database uses."""
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def ensure_schema(conn, fieldnames=FIELDNAMES):
+    """Create the samples table and index, adding any columns that are missing."""
+    columns = ", ".join(f"{name} {COLUMN_TYPES.get(name, 'TEXT')}" for name in fieldnames)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS samples (id INTEGER PRIMARY KEY, {columns})")
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(samples)")}
+    for name in fieldnames:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE samples ADD COLUMN {name} {COLUMN_TYPES.get(name, 'TEXT').replace(' NOT NULL', '')}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_samples_host_time ON samples (computer_name, timestamp)")
+    conn.commit()
+
+
+def insert_rows(conn, rows, fieldnames=FIELDNAMES):
+    """Insert rows (dicts) in one transaction."""
+    placeholders = ", ".join("?" for _ in fieldnames)
+    sql = f"INSERT INTO samples ({', '.join(fieldnames)}) VALUES ({placeholders})"
+    with conn:
+        conn.executemany(sql, ([_nullable(row.get(name)) for name in fieldnames] for row in rows))
+
+
+def _nullable(value):
+    # The CSV path writes missing values as empty strings
+    return None if value == '' else value
+
+
+class SqliteSampleWriter:
+    """Sample sink that inserts buffered rows into SQLite in batches.
+
+    Same interface and flush thresholds as CsvSampleWriter, so the
+    collector can use either one.
+    """
+
+    def __init__(self, path, fieldnames=FIELDNAMES, flush_rows=50, flush_interval=30, clock=time.monotonic):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._conn = None
+        self._buffer = []
+        self._last_flush = clock()
+        self.healthy = True
+        # Called with the duration in seconds of every successful flush
+        self.on_flush = None
+        self.stats = {
+            'rows_written': 0,
+            'flushes': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    def take_pending(self):
+        """Remove and return rows that have not been written yet."""
+        rows, self._buffer = self._buffer, []
+        return rows
+
+    def write(self, row):
+        """Queue a row, flushing if the size or time threshold is reached."""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_rows or self._clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_many(self, rows):
+        """Insert rows immediately, bypassing the thresholds.
+
+        All or nothing: if the flush fails, rows are taken back out of the
+        buffer (rows queued before stay), so a caller that keeps them for a
+        retry, like the spool, never gets them written twice.
+        """
+        start = len(self._buffer)
+        self._buffer.extend(rows)
+        try:
+            self.flush()
+        except Exception:
+            del self._buffer[start:]
+            raise
+
+    def flush(self):
+        """Insert every buffered row in one transaction."""
+        if not self._buffer:
+            self._last_flush = self._clock()
+            return
+        start = self._clock()
+        try:
+            if self._conn is None:
+                self._conn = connect(self.path)
+                ensure_schema(self._conn, self.fieldnames)
+            insert_rows(self._conn, self._buffer, self.fieldnames)
+        except Exception:
+            self.healthy = False
+            raise
+        self.healthy = True
+
+        elapsed_ms = (self._clock() - start) * 1000
+        self.stats['rows_written'] += len(self._buffer)
+        self.stats['flushes'] += 1
+        self.stats['last_flush_ms'] = elapsed_ms
+        self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], elapsed_ms)
+        self.stats['total_flush_ms'] += elapsed_ms
+        if self.on_flush is not None:
+            self.on_flush(elapsed_ms / 1000)
+        self._buffer.clear()
+        self._last_flush = self._clock()
+
+    def close(self):
+        """Flush pending rows and close the connection."""
+        try:
+            self.flush()
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class SqliteSampleStore:
+    """Indexed read access to a sample database, one connection per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect(self.path, readonly=True)
+            self._local.conn = conn
+        return conn
+
+    def computer_names(self):
+        """Distinct hosts, read from the index."""
+        rows = self.connection().execute("SELECT DISTINCT computer_name FROM samples ORDER BY computer_name")
+        return [row[0] for row in rows]
+
+    def latest(self, computer_name, offset=0):
+        """The newest row for a host (offset=1 for the one before it), or {}."""
+        row = self.connection().execute(
+            "SELECT * FROM samples WHERE computer_name = ? ORDER BY timestamp DESC LIMIT 1 OFFSET ?",
+            (computer_name, offset)
+        ).fetchone()
+        if row is None:
+            return {}
+        result = dict(row)
+        result.pop('id', None)
+        return result
+
+    def latest_rows(self):
+        """The newest row of every host, found per host through the index."""
+        rows = self.connection().execute(
+            "SELECT s.* FROM samples s JOIN ("
+            "SELECT computer_name, MAX(timestamp) AS timestamp FROM samples GROUP BY computer_name"
+            ") newest USING (computer_name, timestamp) ORDER BY s.id"
+        )
+        latest = {}
+        for row in rows:
+            result = dict(row)
+            result.pop('id', None)
+            # Later inserts win ties on timestamp
+            latest[result['computer_name']] = result
+        return list(latest.values())
+
+    def history_query(self, computer_name, columns, start, end=None):
+        """SQL and parameters for a host's rows between start and end, oldest first."""
+        select = ", ".join(['timestamp'] + [c for c in columns if c != 'timestamp'])
+        sql = f"SELECT {select} FROM samples WHERE computer_name = ? AND timestamp >= ?"
+        params = [computer_name, start]
+        if end is not None:
+            sql += " AND timestamp <= ?"
+            params.append(end)
+        return sql + " ORDER BY timestamp", params
+
+    def columns(self):
+        return [row[1] for row in self.connection().execute("PRAGMA table_info(samples)") if row[1] != 'id']
+
+    def last_id(self):
+        """Highest row id, which grows with every insert (0 when empty)."""
+        return self.connection().execute("SELECT MAX(id) FROM samples").fetchone()[0] or 0
+
+
+def import_csv(csv_path, db_path, batch_size=5000):
+    """Copy an existing server_data.csv into a sample database."""
+    conn = connect(db_path)
+    imported = 0
+    try:
+        with open(csv_path, newline='') as f:
+            reader = csv.DictReader(f)
+            fieldnames = [name for name in reader.fieldnames if name]
+            ensure_schema(conn, fieldnames)
+            batch = []
+            for row in reader:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    insert_rows(conn, batch, fieldnames)
+                    imported += len(batch)
+                    batch = []
+            if batch:
+                insert_rows(conn, batch, fieldnames)
+                imported += len(batch)
+    finally:
+        conn.close()
+    return imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sample storage maintenance")
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_cmd = commands.add_parser('import-csv', help="Import a server_data.csv file into SQLite")
+    import_cmd.add_argument('csv_path')
+    import_cmd.add_argument('db_path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'import-csv':
+        start = time.monotonic()
+        count = import_csv(args.csv_path, args.db_path)
+        print(f"Imported {count} rows into {args.db_path} in {time.monotonic() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
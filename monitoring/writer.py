@@ -0,0 +1,231 @@
+# monitoring/writer.py
+import csv
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger('Collector')
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+
+class CsvSampleWriter:
+    """Append-only CSV sink that keeps the file open and writes rows in batches.
+
+    Rows are buffered in memory and flushed when flush_rows are pending or
+    flush_interval seconds have passed since the last flush. fsync is
+    'always' (every flush), 'interval' (at most every fsync_interval
+    seconds) or 'never' (left to the OS). If the file is rotated away or
+    truncated, it is reopened and a header is written once to the new file.
+
+    An existing file whose header differs from fieldnames is reconciled
+    before the first write: extra trailing columns are kept (rows leave
+    them blank), missing trailing columns are added to the header (old
+    rows are simply shorter), and anything else is rotated aside.
+
+    rewrite() lets another thread replace the file (e.g. compaction) while
+    the handle is closed; flushes due meanwhile are put off until it is done.
+    """
+
+    def __init__(self, path, fieldnames, flush_rows=50, flush_interval=30,
+                 fsync='interval', fsync_interval=60, clock=time.monotonic):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._clock = clock
+
+        self._file = None
+        # Held while the file is written to or rewritten
+        self._file_lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = clock()
+        self._last_fsync = clock()
+        self.healthy = True
+        # Called with the duration in seconds of every successful flush
+        self.on_flush = None
+        self.stats = {
+            'rows_written': 0,
+            'bytes_written': 0,
+            'flushes': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+            'total_flush_ms': 0.0
+        }
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    def take_pending(self):
+        """Remove and return rows that have not been written yet."""
+        rows, self._buffer = self._buffer, []
+        return rows
+
+    def write(self, row):
+        """Queue a row, flushing if the size or time threshold is reached."""
+        self._buffer.append(row)
+        due = len(self._buffer) >= self.flush_rows or self._clock() - self._last_flush >= self.flush_interval
+        # Keep buffering rather than wait for a rewrite to finish
+        if due and not self._file_lock.locked():
+            self.flush()
+
+    def write_many(self, rows):
+        """Write rows immediately, bypassing the thresholds.
+
+        All or nothing: if the flush fails, rows are taken back out of the
+        buffer (rows queued before stay), so a caller that keeps them for a
+        retry, like the spool, never gets them written twice.
+        """
+        start = len(self._buffer)
+        self._buffer.extend(rows)
+        try:
+            self.flush()
+        except Exception:
+            del self._buffer[start:]
+            raise
+
+    def flush(self):
+        """Write every buffered row in one write() call.
+
+        On failure the rows stay buffered and the exception propagates.
+        """
+        if not self._buffer:
+            self._last_flush = self._clock()
+            return
+
+        start = self._clock()
+        with self._file_lock:
+            payload = self._write_buffer(start)
+        self.healthy = True
+
+        elapsed_ms = (self._clock() - start) * 1000
+        self.stats['rows_written'] += len(self._buffer)
+        self.stats['bytes_written'] += len(payload)
+        self.stats['flushes'] += 1
+        self.stats['last_flush_ms'] = elapsed_ms
+        self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], elapsed_ms)
+        self.stats['total_flush_ms'] += elapsed_ms
+        if self.on_flush is not None:
+            self.on_flush(elapsed_ms / 1000)
+        logger.debug(f"Flushed {len(self._buffer)} rows ({len(payload)} bytes) to {self.path} in {elapsed_ms:.1f}ms")
+
+        self._buffer.clear()
+        self._last_flush = self._clock()
+
+    def _write_buffer(self, start):
+        """Append the buffered rows to the file; returns the bytes written."""
+        try:
+            f = self._open()
+            text = io.StringIO()
+            writer = csv.DictWriter(text, fieldnames=self.fieldnames, extrasaction='ignore', lineterminator='\n')
+            if os.fstat(f.fileno()).st_size == 0:
+                writer.writeheader()
+            writer.writerows(self._buffer)
+            payload = text.getvalue().encode('utf-8')
+
+            f.write(payload)
+            f.flush()
+            if self.fsync == 'always' or (self.fsync == 'interval' and start - self._last_fsync >= self.fsync_interval):
+                os.fsync(f.fileno())
+                self._last_fsync = start
+        except Exception:
+            self.healthy = False
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            raise
+        return payload
+
+    def rewrite(self, func, *args):
+        """Call func(path, *args) with the file closed and return its result.
+
+        Flushes wait until func returns, then reopen the path, so func may
+        move a new file into place (os.replace fails on Windows while the
+        file is open). May be called from another thread.
+        """
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            return func(self.path, *args)
+
+    def _open(self):
+        """Return the open file, reopening it if the path was rotated away."""
+        if self._file is not None:
+            try:
+                current = os.stat(self.path)
+                opened = os.fstat(self._file.fileno())
+                rotated = (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev)
+            except FileNotFoundError:
+                rotated = True
+            if rotated:
+                logger.info(f"{self.path} was rotated, reopening")
+                self._file.close()
+                self._file = None
+        if self._file is None:
+            self._reconcile_header()
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def _reconcile_header(self):
+        try:
+            with open(self.path, 'r', newline='', encoding='utf-8') as f:
+                existing = next(csv.reader(f), None)
+        except FileNotFoundError:
+            return
+        if not existing or existing == self.fieldnames:
+            return
+
+        if existing[:len(self.fieldnames)] == self.fieldnames:
+            # Written with more columns (e.g. sampler since disabled): keep them
+            self.fieldnames = existing
+        elif self.fieldnames[:len(existing)] == existing:
+            self._rewrite_header()
+        else:
+            root, ext = os.path.splitext(self.path)
+            aside = f"{root}.{datetime.now().strftime('%Y%m%d%H%M%S')}{ext}"
+            os.replace(self.path, aside)
+            logger.warning(f"{self.path} has an incompatible header, moved it to {aside}")
+
+    def _rewrite_header(self):
+        """Replace the header line, copying the existing rows unchanged."""
+        header = (','.join(self.fieldnames) + '\n').encode('utf-8')
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with open(self.path, 'rb') as src:
+            src.readline()
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as dst:
+                    dst.write(header)
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        logger.info(f"Extended the header of {self.path} to {len(self.fieldnames)} columns")
+
+    def close(self):
+        """Flush pending rows, sync and close the file."""
+        try:
+            self.flush()
+        finally:
+            with self._file_lock:
+                if self._file is not None:
+                    try:
+                        if self.fsync != 'never':
+                            os.fsync(self._file.fileno())
+                    finally:
+                        self._file.close()
+                        self._file = None
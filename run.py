@@ -1,6 +1,8 @@
 # run.py
 from app.app import app
+from app.utils.logger import setup_logger
 
 if __name__ == '__main__':
+    setup_logger()
     app.run_server(debug=True, host='localhost', port=8050)
     
\ No newline at end of file
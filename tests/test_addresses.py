@@ -0,0 +1,118 @@
+# tests/test_addresses.py
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from monitoring.addresses import AddressService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class IpServer:
+    """Local HTTP server answering each request with the next scripted (status, body, delay)."""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                status, body, delay = server.responses.pop(0)
+                time.sleep(delay)
+                payload = body.encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass  # client gave up (timeout test)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def reply(self, body, status=200, delay=0):
+        self.responses.append((status, body, delay))
+
+
+@pytest.fixture
+def ip_server():
+    server = IpServer()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def lookups(service, clock, times):
+    """Call public_ip() at each clock time on one event loop and return the answers."""
+    async def run():
+        answers = []
+        try:
+            for now in times:
+                clock.now = now
+                answers.append(await service.public_ip())
+        finally:
+            await service.close()
+        return answers
+
+    return asyncio.run(run())
+
+
+def test_pick_local_ip_prefers_private_addresses():
+    candidates = (('eth0', '154.159.252.42'), ('lo', '127.0.0.1'), ('wlan0', '192.168.1.20'), ('zz', '169.254.1.1'))
+    assert AddressService._pick_local_ip(candidates) == '192.168.1.20'
+    assert AddressService._pick_local_ip((('lo', '127.0.0.1'),)) == 'Unknown'
+
+
+def test_public_ip_is_cached_for_the_ttl(ip_server):
+    ip_server.reply('198.51.100.7\n')
+    ip_server.reply('198.51.100.8')
+    clock = FakeClock()
+    service = AddressService(public_ip_url=ip_server.url, ttl=300, clock=clock)
+    assert lookups(service, clock, [0, 299, 300]) == ['198.51.100.7', '198.51.100.7', '198.51.100.8']
+    assert ip_server.requests == 2
+
+
+@pytest.mark.parametrize('status, body, delay', [
+    (500, 'upstream broke', 0),
+    (200, '<html>captive portal</html>', 0),
+    (200, '198.51.100.9', 1),
+])
+def test_failed_lookups_keep_the_last_address(ip_server, status, body, delay):
+    ip_server.reply('198.51.100.7')
+    ip_server.reply(body, status, delay)
+    clock = FakeClock()
+    service = AddressService(public_ip_url=ip_server.url, ttl=300, timeout=0.5, clock=clock)
+    assert lookups(service, clock, [0, 300]) == ['198.51.100.7', '198.51.100.7']
+    assert service._failures == 1
+    assert ip_server.requests == 2
+
+
+def test_failed_lookups_back_off(ip_server):
+    ip_server.reply('198.51.100.7')
+    ip_server.reply('', 503)
+    ip_server.reply('', 503)
+    ip_server.reply('198.51.100.9')
+    clock = FakeClock()
+    service = AddressService(public_ip_url=ip_server.url, ttl=300, backoff_base=10, clock=clock)
+    # First retry after 10s (+-20% jitter), the next after 20s
+    answers = lookups(service, clock, [0, 300, 305, 313, 320, 338])
+    assert answers == ['198.51.100.7'] * 5 + ['198.51.100.9']
+    assert ip_server.requests == 4
@@ -0,0 +1,105 @@
+# tests/test_csv_reader.py
+import os
+
+import pytest
+
+from app.data.csv_reader import IncrementalCsvReader
+
+HEADER = 'timestamp,computer_name,cpu_usage\n'
+
+
+def line(i, host='HOST-1'):
+    return f'2026-01-01T00:00:{i:02d},{host},{i}\n'
+
+
+def write(path, text, mode='a'):
+    with open(path, mode) as f:
+        f.write(text)
+
+
+def test_only_appended_rows_are_parsed(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    write(path, HEADER + line(0) + line(1), 'w')
+    reader = IncrementalCsvReader(str(path))
+    reset, rows = reader.poll()
+    assert reset and list(rows['cpu_usage']) == [0, 1]
+
+    assert reader.poll() == (False, None)
+    write(path, line(2) + line(3))
+    reset, rows = reader.poll()
+    assert not reset and list(rows['cpu_usage']) == [2, 3]
+    assert str(rows['computer_name'].dtype) == 'category'
+    assert reader.stats == {'full_reloads': 1, 'appends': 1, 'rows_appended': 2}
+
+
+def test_partial_line_waits_for_its_newline(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    write(path, HEADER + line(0), 'w')
+    reader = IncrementalCsvReader(str(path))
+    reader.poll()
+    write(path, line(1)[:12])
+    assert reader.poll() == (False, None)
+    write(path, line(1)[12:])
+    reset, rows = reader.poll()
+    assert not reset and list(rows['cpu_usage']) == [1]
+
+
+def test_truncation_and_rotation_reload_the_file(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    write(path, HEADER + line(0) + line(1), 'w')
+    reader = IncrementalCsvReader(str(path))
+    reader.poll()
+
+    write(path, HEADER + line(5), 'w')
+    reset, rows = reader.poll()
+    assert reset and list(rows['cpu_usage']) == [5]
+
+    os.replace(path, tmp_path / 'server_data.1.csv')
+    write(path, HEADER + line(6) + line(7) + line(8), 'w')
+    reset, rows = reader.poll()
+    assert reset and list(rows['cpu_usage']) == [6, 7, 8]
+    assert reader.stats['full_reloads'] == 3
+
+
+def test_changed_header_or_same_size_rewrite_reloads(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    write(path, HEADER + line(0), 'w')
+    reader = IncrementalCsvReader(str(path))
+    reader.poll()
+
+    # Rewritten in place (same inode, same size), e.g. a host renamed
+    mtime = os.stat(path).st_mtime_ns
+    write(path, HEADER + line(0, 'HOST-2'), 'r+')
+    os.utime(path, ns=(mtime, mtime + 1_000_000))
+    reset, rows = reader.poll()
+    assert reset and list(rows['computer_name']) == ['HOST-2']
+
+    # Header widened in place, rows appended after it
+    write(path, 'timestamp,computer_name,cpu_usage,disk_usage\n' + line(0).rstrip('\n') + ',7\n', 'r+')
+    reset, rows = reader.poll()
+    assert reset and list(rows['disk_usage']) == [7]
+
+
+def test_a_bad_row_is_not_skipped(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    write(path, HEADER + line(0), 'w')
+    reader = IncrementalCsvReader(str(path))
+    reader.poll()
+    offset = reader._offset
+
+    write(path, 'not-a-time,HOST-1,1\n')
+    with pytest.raises(ValueError):
+        reader.poll()
+    assert reader._offset == offset
+    # A good row after it does not hide the bad one
+    write(path, line(2))
+    with pytest.raises(ValueError):
+        reader.poll()
+    assert reader._offset == offset
+
+    # Once the file is repaired every row comes back
+    write(path, HEADER + line(0) + line(1) + line(2), 'w')
+    reset, rows = reader.poll()
+    assert reset and list(rows['cpu_usage']) == [0, 1, 2]
+    write(path, line(3))
+    assert list(reader.poll()[1]['cpu_usage']) == [3]
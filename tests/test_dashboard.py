@@ -0,0 +1,76 @@
+# tests/test_dashboard.py
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app.app import app
+from app.callbacks import dashboard_callbacks
+from app.layouts.main import create_layout
+from dash._callback import GLOBAL_CALLBACK_MAP
+
+
+def layout_ids():
+    layout = create_layout()
+    return {component.id for component in layout._traverse() if getattr(component, 'id', None)}
+
+
+def callback_ids(module):
+    for outputs, spec in GLOBAL_CALLBACK_MAP.items():
+        if spec['callback'].__module__ != module.__name__:
+            continue
+        for output in outputs.strip('.').split('...'):
+            yield output.rsplit('.', 1)[0]
+        for dependency in spec['inputs'] + spec['state']:
+            yield dependency['id']
+
+
+def test_dashboard_callbacks_refer_to_components_in_the_layout():
+    assert app.layout is create_layout
+    ids = set(callback_ids(dashboard_callbacks))
+    assert 'network-usage-graph' in ids
+    assert ids - layout_ids() == set()
+
+
+class FakeHandler:
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = []
+
+    def get_range(self, computer_name, metrics, start, end=None, resolution=None, max_points=None):
+        self.calls.append((computer_name, metrics, max_points))
+        return self.frame
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    frame = pd.DataFrame({
+        'timestamp': pd.date_range('2026-01-01', periods=3, freq='10s'),
+        'upload_speed_mbps': [0.5, float('nan'), 0.7],
+        'download_speed_mbps': [2.0, float('nan'), 3.0],
+    })
+    fake = FakeHandler(frame)
+    monkeypatch.setattr(dashboard_callbacks, 'get_data_handler', lambda: fake)
+    return fake
+
+
+def test_network_usage_graph_draws_derived_throughput(handler):
+    fig = dashboard_callbacks.update_network_usage('HOST-1', 1, '6h', None, None, 640)
+    assert handler.calls == [('HOST-1', ['upload_speed_mbps', 'download_speed_mbps'], 640)]
+    assert [trace.name for trace in fig.data] == ['Upload (Usage)', 'Download (Usage)']
+    assert list(fig.data[0].y[[0, 2]]) == [0.5, 0.7]
+
+
+def test_network_usage_graph_is_empty_without_a_computer(handler):
+    assert dashboard_callbacks.update_network_usage(None, 1, '1h', None, None, 640).data == ()
+    assert handler.calls == []
+
+
+def test_selected_range():
+    start, end = dashboard_callbacks.selected_range('6h', None, None)
+    assert end is None
+    assert abs(datetime.now() - timedelta(hours=6) - start) < timedelta(seconds=5)
+    # The end date is inclusive
+    assert dashboard_callbacks.selected_range('custom', '2026-01-01', '2026-01-03') == (
+        datetime(2026, 1, 1), datetime(2026, 1, 4))
+    assert dashboard_callbacks.selected_range('custom', '2026-01-01', None) == (datetime(2026, 1, 1), None)
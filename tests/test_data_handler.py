@@ -0,0 +1,168 @@
+# tests/test_data_handler.py
+import csv
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.data.data_handler import DataHandler, SqliteDataHandler
+from monitoring.rollups import RollupAggregator, RollupStore
+from monitoring.samples import FIELDNAMES
+from monitoring.storage import SqliteSampleWriter
+
+
+def sample(i, host='HOST-1', **values):
+    return {name: None for name in FIELDNAMES} | {
+        'timestamp': f'2026-01-01T00:{i // 6:02d}:{i % 6 * 10:02d}', 'computer_name': host,
+        'cpu_usage': 10.0 + i, 'memory_usage': 50.0, 'disk_usage': 40.0,
+        'network_bytes_sent': 1_000_000 * i, 'network_bytes_recv': 2_000_000 * i,
+        'smartcare_status': 'Running', 'sql_server_status': 'Running', 'smartlink_status': 'Running',
+        'etims_status': 'Stopped', 'tims_status': 'Running'} | values
+
+
+def write_csv(path, rows, mode='w'):
+    with open(path, mode, newline='') as f:
+        writer = csv.DictWriter(f, FIELDNAMES)
+        if mode == 'w':
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def csv_handler(path, rows):
+    write_csv(path, rows)
+    handler = DataHandler(str(path))
+    handler.rollups = None
+    handler.data_store.min_interval = 0
+    return handler
+
+
+def test_csv_handler_picks_up_appended_rows(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    handler = csv_handler(path, [sample(0), sample(1, 'HOST-2')])
+    version = handler.data_version()
+    assert handler.get_computer_names() == ['HOST-1', 'HOST-2']
+
+    write_csv(path, [sample(2), sample(3)], 'a')
+    assert handler.changed_since(version)
+    assert handler.get_latest_metrics('HOST-1')['cpu_usage'] == 13.0
+    assert handler.get_previous_metrics('HOST-1')['cpu_usage'] == 12.0
+    assert handler.get_service_status('HOST-1')['etims'] == 'Stopped'
+    assert handler.data_store._reader.stats['full_reloads'] == 1
+
+
+def test_sqlite_handler_builds_no_csv_state(tmp_path):
+    db_path = str(tmp_path / 'server_data.db')
+    writer = SqliteSampleWriter(db_path)
+    writer.write_many([sample(0), sample(1), sample(2, 'HOST-2')])
+    writer.close()
+
+    handler = SqliteDataHandler(db_path)
+    assert not hasattr(handler, 'data_store')
+    assert not hasattr(handler, 'csv_path')
+    assert handler.rollups is None or handler.rollups.path == db_path
+    assert handler.get_computer_names() == ['HOST-1', 'HOST-2']
+    assert handler.get_latest_metrics('HOST-1')['cpu_usage'] == 11.0
+    assert handler.get_previous_metrics('HOST-1')['cpu_usage'] == 10.0
+    assert handler.data_version() == 3
+
+
+def at(i):
+    return datetime(2026, 1, 1) + timedelta(seconds=10 * i)
+
+
+def test_get_range_is_inclusive_and_may_be_open_ended(tmp_path):
+    handler = csv_handler(tmp_path / 'server_data.csv', [sample(i) for i in range(10)] + [sample(3, 'HOST-2')])
+    rows = handler.get_range('HOST-1', ['cpu_usage'], at(2), at(5))
+    assert list(rows.columns) == ['timestamp', 'cpu_usage']
+    assert list(rows['cpu_usage']) == [12.0, 13.0, 14.0, 15.0]
+    assert list(handler.get_range('HOST-1', ['cpu_usage'], at(8))['cpu_usage']) == [18.0, 19.0]
+    assert handler.get_range('HOST-1', ['cpu_usage'], at(20)).empty
+    assert handler.get_range('HOST-3', ['cpu_usage'], at(0)).empty
+
+
+def test_get_range_bounds_points_by_resolution_and_max_points(tmp_path):
+    handler = csv_handler(tmp_path / 'server_data.csv', [sample(i) for i in range(300)])
+    assert len(handler.get_range('HOST-1', ['cpu_usage'], at(0), at(299), max_points=50)) == 50
+    # 3000 seconds at one point per 100 seconds
+    assert len(handler.get_range('HOST-1', ['cpu_usage'], at(0), at(300), resolution=100)) == 30
+
+
+def test_sqlite_range_matches_csv(tmp_path):
+    rows = [sample(i) for i in range(20)]
+    db_path = str(tmp_path / 'server_data.db')
+    writer = SqliteSampleWriter(db_path)
+    writer.write_many(rows)
+    writer.close()
+    sqlite = SqliteDataHandler(db_path)
+    sqlite.rollups = None
+    handler = csv_handler(tmp_path / 'server_data.csv', rows)
+    for start, end in ((at(3), at(12)), (at(15), None)):
+        expected = handler.get_range('HOST-1', ['cpu_usage', 'memory_usage'], start, end)
+        result = sqlite.get_range('HOST-1', ['cpu_usage', 'memory_usage'], start, end)
+        assert result['timestamp'].tolist() == expected['timestamp'].tolist()
+        assert result['cpu_usage'].tolist() == expected['cpu_usage'].tolist()
+
+
+def test_ranges_past_raw_retention_come_from_a_rollup_tier(tmp_path):
+    handler = csv_handler(tmp_path / 'server_data.csv', [sample(0)])
+    handler.rollups = RollupStore(str(tmp_path / 'rollups.db'))
+    start = datetime.now().replace(microsecond=0) - timedelta(days=20)
+    aggregator = RollupAggregator(handler.rollups.tiers, handler.rollups.metrics)
+    for minute in range(180):
+        aggregator.add(sample(0, timestamp=(start + timedelta(minutes=minute)).isoformat(), cpu_usage=minute))
+    handler.rollups.upsert(aggregator.take())
+
+    rows = handler.get_range('HOST-1', ['cpu_usage'], start - timedelta(hours=1), start + timedelta(hours=3))
+    # The 1m tier holds 30 days, so it answers with one point per minute
+    assert len(rows) == 180
+    assert rows['cpu_usage'].iloc[-1] == 179
+    coarse = handler.get_range('HOST-1', ['cpu_usage'], start - timedelta(hours=1), start + timedelta(hours=3),
+                               max_points=5)
+    assert 3 <= len(coarse) <= 5
+
+
+def test_throughput_is_derived_from_the_counters(tmp_path):
+    # 1 MB sent / 2 MB received per 10 s: 0.8 and 1.6 Mbps; the host rebooted before row 6
+    rows = [sample(i) for i in range(6)] + [sample(6, network_bytes_sent=0, network_bytes_recv=0)]
+    rows += [sample(7, network_bytes_sent=1_000_000, network_bytes_recv=2_000_000)]
+    handler = csv_handler(tmp_path / 'server_data.csv', rows)
+    result = handler.get_range('HOST-1', ['upload_speed_mbps', 'download_speed_mbps'], at(2))
+    assert list(result.columns) == ['timestamp', 'upload_speed_mbps', 'download_speed_mbps']
+    # Read from one gap earlier, so the first row has a rate too
+    assert result['upload_speed_mbps'].tolist()[:4] == pytest.approx([0.8] * 4)
+    assert np.isnan(result['upload_speed_mbps'].iloc[4])
+    assert result['download_speed_mbps'].iloc[5] == pytest.approx(1.6)
+
+    latest = handler.get_latest_metrics('HOST-1')
+    assert latest['upload_speed_mbps'] == pytest.approx(0.8)
+    assert latest['download_speed_mbps'] == pytest.approx(1.6)
+    assert handler.get_latest_metrics('HOST-3') == {}
+
+
+def test_sqlite_latest_metrics_derive_throughput(tmp_path):
+    db_path = str(tmp_path / 'server_data.db')
+    writer = SqliteSampleWriter(db_path)
+    writer.write_many([sample(0), sample(1), sample(2, 'HOST-2')])
+    writer.close()
+    handler = SqliteDataHandler(db_path)
+    assert handler.get_latest_metrics('HOST-1')['upload_speed_mbps'] == pytest.approx(0.8)
+    # A single reading has no rate
+    assert handler.get_latest_metrics('HOST-2')['download_speed_mbps'] is None
+
+
+def test_rollup_throughput_uses_bucket_counters_or_the_stored_mean(tmp_path):
+    handler = csv_handler(tmp_path / 'server_data.csv', [sample(0)])
+    handler.rollups = RollupStore(str(tmp_path / 'rollups.db'))
+    start = datetime.now().replace(second=0, microsecond=0) - timedelta(days=20)
+    aggregator = RollupAggregator(handler.rollups.tiers, handler.rollups.metrics)
+    for minute in range(10):
+        timestamp = (start + timedelta(minutes=minute)).isoformat()
+        # Rolled up before counters were kept: only the stored speed
+        counters = ({'network_bytes_sent': None, 'network_bytes_recv': None} if minute < 5 else
+                    {'network_bytes_sent': 7_500_000 * minute, 'network_bytes_recv': None})
+        aggregator.add(sample(0, timestamp=timestamp, upload_speed_mbps=0.25, **counters))
+    handler.rollups.upsert(aggregator.take())
+
+    rows = handler.get_range('HOST-1', ['upload_speed_mbps'], start, start + timedelta(minutes=10))
+    # 7.5 MB per minute is 1 Mbps, from the second bucket with a counter on
+    assert rows['upload_speed_mbps'].tolist() == pytest.approx([0.25] * 6 + [1.0] * 4)
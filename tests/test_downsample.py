@@ -0,0 +1,80 @@
+# tests/test_downsample.py
+import numpy as np
+import pandas as pd
+
+from app.data.downsample import downsample, lttb_indices, minmax_indices
+
+
+def series(n, seed=0):
+    x = np.arange(n, dtype=np.float64)
+    y = np.random.default_rng(seed).normal(size=n).cumsum()
+    return x, y
+
+
+def test_lttb_keeps_the_ends_and_one_point_per_bucket():
+    x, y = series(1000)
+    picked = lttb_indices(x, y, 100)
+    assert len(picked) == 100
+    assert picked[0] == 0 and picked[-1] == 999
+    assert (np.diff(picked) > 0).all()
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[537] = 100
+    assert 537 in lttb_indices(x, y, 50)
+
+
+def test_lttb_matches_the_reference_loop():
+    x, y = series(500, seed=3)
+    threshold = 40
+    # Reference LTTB, one bucket at a time
+    every = (len(y) - 2) / (threshold - 2)
+    expected, a = [0], 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, len(y))
+        if i == threshold - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        areas = [abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        expected.append(a)
+    expected.append(len(y) - 1)
+    assert list(lttb_indices(x, y, threshold)) == expected
+
+
+def test_small_inputs_are_returned_whole():
+    x, y = series(10)
+    assert list(lttb_indices(x, y, 20)) == list(range(10))
+    assert list(minmax_indices(y, 20)) == list(range(10))
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    y = np.array([3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8], dtype=np.float64)
+    picked = minmax_indices(y, 6)
+    assert list(picked) == sorted(picked)
+    for bucket in np.split(np.arange(12), 3):
+        assert bucket[np.argmin(y[bucket])] in picked
+        assert bucket[np.argmax(y[bucket])] in picked
+
+
+def test_downsample_frame_splits_the_budget_and_skips_missing_values():
+    n = 2000
+    x, y = series(n)
+    frame = pd.DataFrame({
+        'timestamp': pd.date_range('2026-01-01', periods=n, freq='10s'),
+        'cpu_usage': y,
+        'memory_usage': np.where(np.arange(n) % 2, np.nan, y[::-1]),
+    })
+    result = downsample(frame, ['cpu_usage', 'memory_usage'], 200)
+    assert len(result) <= 200
+    assert result['timestamp'].is_monotonic_increasing
+    # Each metric gets 100 of its own non-missing points; the union may hold more
+    assert result['memory_usage'].notna().sum() >= 100
+    assert downsample(frame, ['cpu_usage'], None) is frame
+    small = frame.iloc[:100]
+    assert downsample(small, ['cpu_usage'], 200) is small
+    assert len(downsample(frame, ['cpu_usage'], 300, method='minmax')) <= 300
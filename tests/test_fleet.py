@@ -0,0 +1,58 @@
+# tests/test_fleet.py
+import csv
+
+import pandas as pd
+
+from app.data.data_handler import DataHandler
+from app.data.fleet import fleet_overview
+from monitoring.samples import FIELDNAMES
+
+STATUSES = ['smartcare_status', 'sql_server_status', 'smartlink_status', 'etims_status', 'tims_status']
+
+
+def latest_row(host, timestamp, cpu, stopped=()):
+    return {name: '' for name in FIELDNAMES} | {
+        'timestamp': timestamp, 'computer_name': host, 'cpu_usage': cpu, 'memory_usage': 50, 'disk_usage': 40,
+        **{status: 'Stopped' if status in stopped else 'Running' for status in STATUSES}}
+
+
+def test_overview_counts_services_and_sorts_by_name():
+    latest = pd.DataFrame([
+        latest_row('HOST-B', '2026-01-01T00:00:10', 20.0, stopped=('etims_status', 'tims_status')),
+        latest_row('HOST-A', '2026-01-01T00:00:00', 'bad'),
+    ])
+    overview = fleet_overview(latest)
+    assert list(overview['computer_name']) == ['HOST-A', 'HOST-B']
+    assert list(overview['services_running']) == [5, 3]
+    assert list(overview['services_down']) == ['', 'etims, tims']
+    assert pd.isna(overview['cpu_usage'].iloc[0]) and overview['cpu_usage'].iloc[1] == 20.0
+    assert overview['last_seen'].iloc[1] == pd.Timestamp('2026-01-01T00:00:10')
+
+
+def test_overview_of_no_computers_has_the_grid_columns():
+    overview = fleet_overview(pd.DataFrame())
+    assert overview.empty
+    assert {'computer_name', 'services_down', 'last_seen'} <= set(overview.columns)
+
+
+def test_handler_caches_the_overview_per_data_version(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, FIELDNAMES)
+        writer.writeheader()
+        writer.writerows([latest_row('HOST-1', '2026-01-01T00:00:00', 10),
+                          latest_row('HOST-2', '2026-01-01T00:00:00', 20),
+                          latest_row('HOST-1', '2026-01-01T00:00:10', 30)])
+    handler = DataHandler(str(path))
+    handler.rollups = None
+    handler.data_store.min_interval = 0
+
+    overview = handler.get_fleet_overview()
+    assert list(overview['cpu_usage']) == [30.0, 20.0]
+    assert handler.get_fleet_overview() is overview
+
+    with open(path, 'a', newline='') as f:
+        csv.DictWriter(f, FIELDNAMES).writerow(latest_row('HOST-2', '2026-01-01T00:00:10', 25, stopped=('tims_status',)))
+    updated = handler.get_fleet_overview()
+    assert updated is not overview
+    assert list(updated['services_down']) == ['', 'tims']
@@ -0,0 +1,156 @@
+# tests/test_ingest.py
+import asyncio
+import sqlite3
+import uuid
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from monitoring.ingest import IngestService, ValidationError, validate_batch
+from monitoring.rollups import RollupSink, RollupStore
+from monitoring.storage import SqliteSampleWriter
+
+
+def batch(n, start=0, host='HOST-1'):
+    return {'batch_id': str(uuid.uuid4()), 'rows': [{
+        'timestamp': f'2026-01-01T00:{(start + i) // 60:02d}:{(start + i) % 60:02d}',
+        'computer_name': host, 'cpu_usage': 10 + i, 'network_bytes_sent': 1000 * i
+    } for i in range(n)]}
+
+
+class FlakySqliteWriter(SqliteSampleWriter):
+    """SqliteSampleWriter whose next `failures` flushes raise."""
+
+    failures = 0
+
+    def flush(self):
+        if self.failures and self._buffer:
+            self.failures -= 1
+            self.healthy = False
+            raise sqlite3.OperationalError("database is locked")
+        super().flush()
+
+
+def serve(service, scenario):
+    """Run scenario(client) against the service, shutting it down (and draining) after."""
+    async def run():
+        async with TestClient(TestServer(service.create_app())) as client:
+            await scenario(client)
+    asyncio.run(run())
+
+
+async def wait_for_writer(service):
+    await asyncio.wait_for(service._queue.join(), timeout=5)
+
+
+def stored_rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+
+
+def rolled_up_rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT SUM(cpu_usage_count) FROM rollup_1m").fetchone()[0] or 0
+
+
+def test_validate_batch_keeps_known_columns_and_coerces_numbers():
+    rows = validate_batch({'rows': [{'timestamp': '2026-01-01T00:00:00', 'computer_name': 'HOST-1',
+                                     'cpu_usage': '12.5', 'unknown': 'x'}]})
+    assert rows[0]['cpu_usage'] == 12.5
+    assert 'unknown' not in rows[0]
+    assert rows[0]['memory_usage'] is None
+
+
+@pytest.mark.parametrize('payload', [
+    [],
+    {'rows': [{'timestamp': '2026-01-01T00:00:00'}]},
+    {'rows': [{'computer_name': 'HOST-1', 'timestamp': 'yesterday'}]},
+    {'rows': [{'computer_name': 'HOST-1', 'timestamp': '2026-01-01T00:00:00', 'cpu_usage': 'high'}]},
+])
+def test_validate_batch_rejects_bad_payloads(payload):
+    with pytest.raises(ValidationError):
+        validate_batch(payload)
+
+
+def test_ingest_commits_rows_and_ignores_duplicate_keys(tmp_path):
+    path = str(tmp_path / 'samples.db')
+    service = IngestService(SqliteSampleWriter(path))
+
+    async def scenario(client):
+        payload = batch(5)
+        headers = {'Idempotency-Key': payload['batch_id']}
+        first = await client.post('/ingest', json=payload, headers=headers)
+        again = await client.post('/ingest', json=payload, headers=headers)
+        invalid = await client.post('/ingest', data=b'not json')
+        assert (first.status, again.status, invalid.status) == (202, 200, 400)
+        assert (await again.json())['status'] == 'duplicate'
+        await wait_for_writer(service)
+
+    serve(service, scenario)
+    assert stored_rows(path) == 5
+    assert service.rows_committed.value() == 5
+    assert service.requests.value(('duplicate',)) == 1
+    assert service.requests.value(('rejected',)) == 1
+
+
+def test_ingest_throttles_when_the_queue_is_full(tmp_path):
+    service = IngestService(SqliteSampleWriter(str(tmp_path / 'samples.db')), max_queued_rows=5)
+
+    async def scenario(client):
+        # Hold the writer back so the first batch stays queued
+        service._writer_task.cancel()
+        assert (await client.post('/ingest', json=batch(5))).status == 202
+        busy = await client.post('/ingest', json=batch(5))
+        assert busy.status == 429
+        assert busy.headers['Retry-After'] == str(service.retry_after)
+        service._writer_task = asyncio.create_task(service._write_loop())
+        await wait_for_writer(service)
+
+    serve(service, scenario)
+    assert service.requests.value(('throttled',)) == 1
+    assert service.rows_committed.value() == 5
+
+
+def test_failed_commit_is_retried_and_rolled_up_once(tmp_path):
+    path = str(tmp_path / 'samples.db')
+    writer = FlakySqliteWriter(path)
+    writer.failures = 2
+    sink = RollupSink(writer, RollupStore(path))
+    service = IngestService(sink, commit_backoff=0)
+
+    async def scenario(client):
+        assert (await client.post('/ingest', json=batch(5))).status == 202
+        await wait_for_writer(service)
+        # A later batch must not carry the failed attempts' rows with it
+        assert (await client.post('/ingest', json=batch(3, start=5))).status == 202
+        await wait_for_writer(service)
+
+    serve(service, scenario)
+    assert writer.pending == 0
+    assert stored_rows(path) == 8
+    assert rolled_up_rows(path) == 8
+    assert service.rows_committed.value() == 8
+    assert service.commit_errors.value() == 2
+    assert service.rows_dropped.value() == 0
+
+
+def test_rows_are_dropped_and_not_rolled_up_when_every_attempt_fails(tmp_path):
+    path = str(tmp_path / 'samples.db')
+    writer = FlakySqliteWriter(path)
+    writer.failures = 3
+    sink = RollupSink(writer, RollupStore(path))
+    service = IngestService(sink, commit_attempts=3, commit_backoff=0)
+
+    async def scenario(client):
+        assert (await client.post('/ingest', json=batch(5))).status == 202
+        await wait_for_writer(service)
+        assert (await client.post('/ingest', json=batch(2, start=5))).status == 202
+        await wait_for_writer(service)
+
+    serve(service, scenario)
+    assert writer.pending == 0
+    assert stored_rows(path) == 2
+    assert rolled_up_rows(path) == 2
+    assert service.rows_committed.value() == 2
+    assert service.rows_dropped.value() == 5
+    assert service._queued_rows == 0
@@ -0,0 +1,105 @@
+# tests/test_metrics.py
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from monitoring.instrumentation import CollectorMetrics
+from monitoring.metrics import MetricsServer, Registry
+from monitoring.scheduler import Tick
+
+
+def types(text):
+    return dict(line.split()[2:4] for line in text.splitlines() if line.startswith('# TYPE'))
+
+
+def test_process_cpu_seconds_is_exposed_as_a_counter():
+    text = CollectorMetrics(['cpu']).registry.render()
+    assert types(text)['process_cpu_seconds_total'] == 'counter'
+    assert types(text)['process_resident_memory_bytes'] == 'gauge'
+    value = next(line for line in text.splitlines() if line.startswith('process_cpu_seconds_total '))
+    assert float(value.split()[1]) > 0
+
+
+def test_every_total_metric_is_a_counter():
+    class Sampler:
+        stats = {'samples': 3, 'cpu_seconds': 0.25}
+
+    metrics = CollectorMetrics(['cpu', 'memory'])
+    metrics.watch_sampler(Sampler())
+    for name, kind in types(metrics.registry.render()).items():
+        if name.endswith('_total'):
+            assert kind == 'counter', name
+
+
+def test_callback_counter_reads_its_value_at_scrape_time():
+    registry = Registry()
+    seconds = [1.5]
+    registry.counter('work_seconds_total', 'Work done', callback=lambda: [((), seconds[0])])
+    assert 'work_seconds_total 1.5' in registry.render()
+    seconds[0] = 2.0
+    assert 'work_seconds_total 2.0' in registry.render()
+
+
+def test_labelled_counter_and_gauge():
+    registry = Registry()
+    runs = registry.counter('runs_total', 'Runs', label_names=('outcome',), label_values=[('ok',), ('error',)])
+    depth = registry.gauge('depth', 'Queue depth')
+    runs.inc(labels=('ok',))
+    runs.inc(2, labels=('ok',))
+    depth.set(7)
+    text = registry.render()
+    assert 'runs_total{outcome="ok"} 3.0' in text
+    assert 'runs_total{outcome="error"} 0.0' in text
+    assert 'depth 7' in text
+    with pytest.raises(KeyError):
+        runs.inc(labels=('timeout',))
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 5):
+        latency.observe(value)
+    text = registry.render()
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert 'latency_seconds_count 4' in text
+    assert latency.sum() == pytest.approx(6.25)
+
+
+def test_collector_metrics_record_probes_cycles_and_sink_stats():
+    class Sink:
+        stats = {'rows_written': 12, 'flushes': 3}
+
+    metrics = CollectorMetrics(['cpu', 'ports'])
+    metrics.watch_sinks({'storage': Sink()})
+    metrics.probe_finished('ports', 0.2, 'timeout')
+    metrics.cycle_finished(Tick(4, 40.0, 0.03, 2), time.monotonic())
+    text = metrics.registry.render()
+    assert 'collector_probe_runs_total{probe="ports",outcome="timeout"} 1.0' in text
+    assert 'collector_probe_runs_total{probe="cpu",outcome="ok"} 0.0' in text
+    assert 'collector_missed_ticks_total 2.0' in text
+    assert 'collector_cycle_lateness_seconds_count 1' in text
+    assert 'collector_sink_stat{sink="storage",stat="rows_written"} 12' in text
+    with pytest.raises(KeyError):
+        metrics.probe_finished('disk', 0.1, 'ok')
+
+
+def test_metrics_server_serves_the_registry():
+    registry = Registry()
+    registry.counter('served_total', 'Served').inc(3)
+    server = MetricsServer(registry, port=0)
+    server.start()
+    try:
+        base = f"http://{server.address[0]}:{server.address[1]}"
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert 'served_total 3.0' in response.read().decode()
+        with pytest.raises(urllib.error.HTTPError) as missing:
+            urllib.request.urlopen(f"{base}/other", timeout=5)
+        assert missing.value.code == 404
+    finally:
+        server.stop()
@@ -0,0 +1,82 @@
+# tests/test_partitions.py
+import math
+
+import pandas as pd
+
+from app.data.partitions import MERGE_FANIN, HostPartitions
+from app.data.schema import apply_schema
+
+
+def frame(hosts, seconds, start=0):
+    """Rows for the given host names at the given seconds past midnight."""
+    return apply_schema(pd.DataFrame({
+        'timestamp': pd.Timestamp('2026-01-01') + pd.to_timedelta(seconds, unit='s'),
+        'computer_name': hosts,
+        'cpu_usage': [float(start + i) for i in range(len(hosts))],
+    }))
+
+
+def test_rows_are_routed_per_host_with_latest_and_previous():
+    partitions = HostPartitions().with_rows(frame(['A', 'B', 'A', 'B', 'A'], [0, 0, 10, 10, 20]))
+    assert partitions.hosts() == ['A', 'B']
+    assert list(partitions.between('A')['cpu_usage']) == [0.0, 2.0, 4.0]
+    assert partitions.latest('A')['cpu_usage'] == 4.0
+    assert partitions.previous('A')['cpu_usage'] == 2.0
+    assert partitions.latest('C') == {} and partitions.previous('C') == {}
+    assert sorted(partitions.latest_frame()['cpu_usage']) == [3.0, 4.0]
+
+
+def test_with_rows_shares_untouched_partitions_and_leaves_the_original_alone():
+    first = HostPartitions().with_rows(frame(['A', 'B'], [0, 0]))
+    second = first.with_rows(frame(['A'], [10], start=5))
+    assert second.get('B') is first.get('B')
+    assert len(first.get('A')) == 1 and len(second.get('A')) == 2
+    assert first.latest('A')['cpu_usage'] == 0.0
+    assert second.latest('A')['cpu_usage'] == 5.0
+
+
+def test_late_rows_are_sorted_into_place():
+    partitions = HostPartitions().with_rows(frame(['A', 'A'], [10, 30]))
+    # A spool replay delivers an older reading after newer ones
+    partitions = partitions.with_rows(frame(['A', 'A'], [40, 20], start=2))
+    assert list(partitions.between('A')['timestamp'].dt.second) == [10, 20, 30, 40]
+    assert partitions.latest('A')['cpu_usage'] == 2.0
+    assert partitions.previous('A')['cpu_usage'] == 1.0
+
+
+def test_between_is_inclusive():
+    partitions = HostPartitions().with_rows(frame(['A'] * 5, [0, 10, 20, 30, 40]))
+    base = pd.Timestamp('2026-01-01')
+    rows = partitions.between('A', base + pd.Timedelta(seconds=10), base + pd.Timedelta(seconds=30))
+    assert list(rows['cpu_usage']) == [1.0, 2.0, 3.0]
+    assert partitions.between('missing').empty
+
+
+def test_chunks_of_unread_hosts_are_merged_by_size():
+    partitions = HostPartitions()
+    for i in range(100):
+        partitions = partitions.with_rows(frame(['A'], [i], start=i))
+        sizes = [len(chunk) for chunk in partitions.get('A')._chunks]
+        # Every chunk outweighs the MERGE_FANIN - 1 newer ones after it
+        for j in range(len(sizes) - MERGE_FANIN + 1):
+            assert sizes[j] > sum(sizes[j + 1:j + MERGE_FANIN])
+        assert len(sizes) <= (MERGE_FANIN - 1) * (math.log(i + 1, MERGE_FANIN) + 1)
+    assert len(partitions.get('A')) == 100
+    assert list(partitions.between('A')['cpu_usage']) == [float(i) for i in range(100)]
+
+
+def test_appends_leave_a_large_history_chunk_alone():
+    partitions = HostPartitions().with_rows(frame(['A'] * 1000, list(range(1000))))
+    history = partitions.get('A')._chunks[0]
+    for i in range(1000, 1100):
+        partitions = partitions.with_rows(frame(['A'], [i], start=i))
+        assert partitions.get('A')._chunks[0] is history
+    assert list(partitions.between('A')['cpu_usage'][-2:]) == [1098.0, 1099.0]
+
+
+def test_frame_combines_hosts_in_timestamp_order():
+    partitions = HostPartitions().with_rows(frame(['B', 'A'], [10, 0]))
+    partitions = partitions.with_rows(frame(['A'], [20], start=2))
+    combined = partitions.frame()
+    assert list(combined['computer_name']) == ['A', 'B', 'A']
+    assert str(combined['computer_name'].dtype) == 'category'
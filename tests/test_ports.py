@@ -0,0 +1,99 @@
+# tests/test_ports.py
+import os
+import socket
+
+import psutil
+import pytest
+
+import collector
+from monitoring.ports import ListeningPorts
+from monitoring.processes import ProcessSnapshot
+
+PROC_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+
+APP = {'process_name': 'sqlservr', 'port': 1433}
+
+
+def snapshot(*processes):
+    return ProcessSnapshot([{'pid': pid, 'name': name} for pid, name in processes])
+
+
+def test_owners_by_port():
+    ports = ListeningPorts({1433: {812}, 8080: set()})
+    assert ports.is_listening(1433)
+    assert ports.owners(1433) == {812}
+    # Listening, but the owner could not be resolved
+    assert ports.is_listening(8080)
+    assert ports.owners(8080) == set()
+
+
+def test_port_nobody_listens_on():
+    ports = ListeningPorts({})
+    assert not ports.is_listening(8000)
+    assert ports.owners(8000) == set()
+
+
+@pytest.mark.parametrize('processes, owners, expected', [
+    ([(812, 'sqlservr.exe')], {1433: {812}}, 'Running'),
+    ([(812, 'sqlservr.exe')], {1433: {999}}, 'Port Held By Another Process'),
+    # Owner unknown (no permission to see it): trust the port
+    ([(812, 'sqlservr.exe')], {1433: set()}, 'Running'),
+    ([(812, 'sqlservr.exe')], {}, 'Process Running (Port Closed)'),
+    ([(999, 'other.exe')], {1433: {999}}, 'Port Active (Process Stopped)'),
+    ([], {}, 'Stopped'),
+])
+def test_status_from_the_socket_table(processes, owners, expected):
+    assert collector.check_application_status(APP, snapshot(*processes), ListeningPorts(owners)) == expected
+
+
+def test_status_falls_back_to_connecting(monkeypatch):
+    probed = []
+    monkeypatch.setattr(collector, 'check_port', lambda port: probed.append(port) or True)
+    assert collector.check_application_status(APP, snapshot((812, 'sqlservr.exe')), None) == 'Running'
+    assert probed == [1433]
+
+
+def test_check_port_connects_to_a_real_listener():
+    with socket.socket() as server:
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        assert collector.check_port(server.getsockname()[1])
+
+
+def proc_line(slot, address, port, state):
+    return f"   {slot}: {address}:{port:04X} 00000000:0000 {state} 00000000:00000000 00:00000000 00000000  0  0 1 1\n"
+
+
+def test_proc_tables_are_parsed_for_listening_sockets(tmp_path):
+    tcp = tmp_path / 'tcp'
+    tcp.write_text(PROC_HEADER + proc_line(0, '0100007F', 1433, '0A') + proc_line(1, '0100007F', 50000, '01'))
+    tcp6 = tmp_path / 'tcp6'
+    tcp6.write_text(PROC_HEADER + proc_line(0, '00000000000000000000000000000000', 8080, '0A'))
+    owners = ListeningPorts._from_proc((str(tcp), str(tcp6), str(tmp_path / 'missing')))
+    # /proc does not say who owns a socket
+    assert owners == {1433: set(), 8080: set()}
+    assert ListeningPorts._from_proc((str(tmp_path / 'missing'),)) is None
+
+
+def test_take_falls_back_to_proc_when_denied(monkeypatch):
+    def denied(kind):
+        raise psutil.AccessDenied()
+
+    monkeypatch.setattr(psutil, 'net_connections', denied)
+    monkeypatch.setattr(ListeningPorts, '_from_proc', staticmethod(lambda: {1433: set()}))
+    assert ListeningPorts.take().is_listening(1433)
+    monkeypatch.setattr(ListeningPorts, '_from_proc', staticmethod(lambda: None))
+    assert ListeningPorts.take() is None
+
+
+def test_take_sees_a_listener_in_this_process():
+    with socket.socket() as server:
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        port = server.getsockname()[1]
+        ports = ListeningPorts.take()
+    if ports is None:
+        pytest.skip("no readable socket table on this platform")
+    assert ports.is_listening(port)
+    # Owners may be unknown without privileges, but never someone else
+    assert ports.owners(port) <= {os.getpid()}
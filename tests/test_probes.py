@@ -0,0 +1,89 @@
+# tests/test_probes.py
+import asyncio
+import threading
+
+import pytest
+
+from monitoring.probes import Probe, ProbeRunner, TIMED_OUT
+
+
+class Recorder:
+    def __init__(self):
+        self.outcomes = {}
+
+    def probe_finished(self, name, seconds, outcome):
+        self.outcomes[name] = outcome
+
+
+@pytest.fixture
+def runner():
+    runner = ProbeRunner(observer=Recorder())
+    yield runner
+    runner.close()
+
+
+def test_probes_run_concurrently(runner):
+    barrier = threading.Barrier(2, timeout=2)
+
+    def meet():
+        # Deadlocks (and breaks the barrier) unless both probes run at once
+        barrier.wait()
+        return 'met'
+
+    results = runner.run([Probe('a', meet, 3), Probe('b', meet, 3)], now=0)
+    assert results == {'a': 'met', 'b': 'met'}
+
+
+def test_slow_probe_yields_its_default(runner):
+    release = threading.Event()
+    results = runner.run([
+        Probe('slow', lambda: release.wait(5), 0.05, default=TIMED_OUT),
+        Probe('fast', lambda: 1, 1),
+    ], now=0)
+    release.set()
+    assert results == {'slow': TIMED_OUT, 'fast': 1}
+    assert runner.observer.outcomes == {'slow': 'timeout', 'fast': 'ok'}
+
+
+def test_failing_probe_yields_its_default(runner):
+    def broken():
+        raise OSError("no such device")
+
+    assert runner.run([Probe('disk', broken, 1, default=None)], now=0) == {'disk': None}
+    assert runner.observer.outcomes['disk'] == 'error'
+
+
+def test_coroutine_probes_run_on_the_loop(runner):
+    async def lookup():
+        await asyncio.sleep(0)
+        return '192.0.2.1'
+
+    assert runner.run([Probe('ip', lookup, 1)], now=0) == {'ip': '192.0.2.1'}
+
+
+def test_probe_with_interval_reuses_its_last_good_value(runner):
+    calls = []
+
+    def count():
+        calls.append(1)
+        return len(calls)
+
+    probe = Probe('apps', count, 1, interval=30)
+    assert runner.run([probe], now=0)['apps'] == 1
+    assert runner.run([probe], now=10)['apps'] == 1
+    assert runner.run([probe], now=30)['apps'] == 2
+    assert len(calls) == 2
+
+
+def test_failed_probe_is_retried_next_cycle(runner):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("first call fails")
+        return 'ok'
+
+    probe = Probe('flaky', flaky, 1, default=None, interval=60)
+    assert runner.run([probe], now=0)['flaky'] is None
+    assert runner.run([probe], now=10)['flaky'] == 'ok'
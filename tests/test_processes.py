@@ -0,0 +1,102 @@
+# tests/test_processes.py
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+
+from monitoring.processes import ProcessSnapshot, ProcessTable, _ProcessEntry
+
+
+def snapshot(*names):
+    return ProcessSnapshot([{'pid': pid, 'name': name} for pid, name in enumerate(names, start=1)])
+
+
+def test_find_returns_exact_and_partial_matches_together():
+    processes = snapshot('sqlservr', 'sqlservr.exe', 'explorer.exe')
+    assert sorted(processes.find('sqlservr')) == [1, 2]
+
+
+def test_find_matches_substrings_case_insensitively():
+    processes = snapshot('SQLServr.exe', 'MsMpEng.exe', 'SmartLinkService.exe')
+    assert processes.find('sql') == [1]
+    assert processes.find('smartlink') == [3]
+    assert processes.is_running('mpeng')
+
+
+def test_find_collects_every_pid_of_a_name():
+    processes = snapshot('etims.exe', 'etims.exe', 'tims.exe')
+    assert sorted(processes.find('etims')) == [1, 2]
+    assert sorted(processes.find('tims')) == [1, 2, 3]
+
+
+def test_find_without_match_or_needle():
+    processes = snapshot('python.exe')
+    assert processes.find('smartcare') == []
+    assert not processes.is_running('smartcare')
+    assert processes.find('') == []
+
+
+def test_pids_by_exact_name_is_case_sensitive():
+    processes = snapshot('Tims.exe', 'tims.exe')
+    assert processes.pids_by_exact_name('tims.exe') == [2]
+
+
+def burn_cpu(seconds):
+    start = time.process_time()
+    while time.process_time() - start < seconds:
+        sum(i * i for i in range(10_000))
+
+
+def test_process_table_measures_cpu_between_cycles():
+    table = ProcessTable()
+    first = {proc['pid']: proc for proc in table.snapshot().processes}
+    assert first[os.getpid()]['cpu_percent'] is None
+    burn_cpu(0.1)
+    second = {proc['pid']: proc for proc in table.snapshot().processes}
+    assert second[os.getpid()]['cpu_percent'] > 0
+    assert second[os.getpid()]['rss_delta'] is not None
+
+
+class ExitedProcess:
+    """Stands in for a cached Process whose pid has since been reused."""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def create_time(self):
+        return 0.0
+
+    def name(self):
+        return 'exited'
+
+    def is_running(self):
+        return False
+
+
+def test_process_table_starts_over_when_a_pid_is_reused():
+    table = ProcessTable()
+    stale = _ProcessEntry(ExitedProcess(os.getpid()))
+    stale.cpu_time, stale.rss, stale.sampled_at = 0.0, 0, 0.0
+    table._entries[os.getpid()] = stale
+
+    mine = {proc['pid']: proc for proc in table.snapshot().processes}[os.getpid()]
+    entry = table._entries[os.getpid()]
+    assert entry is not stale
+    assert entry.key == (os.getpid(), psutil.Process().create_time())
+    # The new process has no baseline yet, so nothing is derived from the old one
+    assert mine['name'] != 'exited'
+    assert mine['cpu_percent'] is None
+    assert mine['rss_delta'] is None
+
+
+def test_process_table_evicts_exited_processes():
+    table = ProcessTable()
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        assert child.pid in {proc['pid'] for proc in table.snapshot().processes}
+    finally:
+        child.kill()
+        child.wait()
+    assert child.pid not in {proc['pid'] for proc in table.snapshot().processes}
@@ -0,0 +1,59 @@
+# tests/test_rates.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data.rates import counter_rates, latest_rates, with_rates
+
+
+def times(*seconds):
+    return pd.Timestamp('2026-01-01') + pd.to_timedelta(list(seconds), unit='s')
+
+
+def test_rates_are_decimal_megabits_per_second():
+    rates = counter_rates(times(0, 10, 20), [0, 1_250_000, 2_500_000])
+    assert np.isnan(rates[0])
+    assert rates[1:] == pytest.approx([1.0, 1.0])
+
+
+def test_resets_gaps_and_missing_readings_leave_holes():
+    rates = counter_rates(
+        times(0, 10, 20, 30, 1000, 1010, 1020, 1030),
+        pd.array([0, 1_250_000, 500, 1_250_500, 2_500_500, None, 3_750_500, 5_000_500], dtype='UInt64'),
+        max_gap=300)
+    # first reading, reset, gap, missing, next to missing
+    expected = [np.nan, 1.0, np.nan, 1.0, np.nan, np.nan, np.nan, 1.0]
+    np.testing.assert_allclose(rates, expected, equal_nan=True)
+
+
+def test_interleaved_hosts_are_diffed_separately():
+    hosts = ['A', 'B', 'A', 'B', 'A']
+    counters = [0, 10_000_000, 1_250_000, 10_000_000, 2_500_000]
+    rates = counter_rates(times(0, 0, 10, 10, 20), counters, hosts)
+    np.testing.assert_allclose(rates, [np.nan, np.nan, 1.0, 0.0, 1.0], equal_nan=True)
+
+
+def test_with_rates_replaces_stored_values_per_host():
+    frame = pd.DataFrame({
+        'timestamp': times(0, 0, 10, 10),
+        'computer_name': ['A', 'B', 'A', 'B'],
+        'network_bytes_sent': [0, 0, 1_250_000, 2_500_000],
+        'upload_speed_mbps': [9.0, 9.0, 9.0, 9.0],
+    })
+    result = with_rates(frame, ['upload_speed_mbps', 'download_speed_mbps'])
+    np.testing.assert_allclose(result['upload_speed_mbps'], [np.nan, np.nan, 1.0, 2.0], equal_nan=True)
+    assert 'download_speed_mbps' not in result.columns
+    assert frame['upload_speed_mbps'].tolist() == [9.0] * 4
+    assert with_rates(frame, ['cpu_usage']) is frame
+
+
+def test_latest_rates_from_the_previous_reading():
+    previous = {'timestamp': pd.Timestamp('2026-01-01T00:00:00'), 'network_bytes_sent': 0, 'network_bytes_recv': 0}
+    latest = {'timestamp': pd.Timestamp('2026-01-01T00:00:10'), 'network_bytes_sent': 1_250_000,
+              'network_bytes_recv': None}
+    assert latest_rates(latest, previous) == {'upload_speed_mbps': 1.0, 'download_speed_mbps': None}
+    assert latest_rates(latest, {}) == {'upload_speed_mbps': None, 'download_speed_mbps': None}
+    # SQLite rows hold ISO strings
+    iso = {'timestamp': '2026-01-01T00:00:20', 'network_bytes_sent': 3_750_000}
+    assert latest_rates(iso, {**latest, 'timestamp': '2026-01-01T00:00:10'}) == {'upload_speed_mbps': 2.0}
+    assert latest_rates({**iso, 'network_bytes_sent': 5}, latest) == {'upload_speed_mbps': None}
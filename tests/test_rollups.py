@@ -0,0 +1,185 @@
+# tests/test_rollups.py
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import collector
+from monitoring import rollups
+from monitoring.rollups import (
+    RollupSink, RollupStore, Tier, choose_tier, compact_csv, table_name
+)
+from monitoring.writer import CsvSampleWriter
+
+FIELDS = ['timestamp', 'computer_name', 'cpu_usage', 'network_bytes_sent']
+HOUR = 3600
+DAY = 86400
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def row(timestamp, cpu, host='HOST-1', sent=None):
+    return {'timestamp': timestamp.isoformat(), 'computer_name': host, 'cpu_usage': cpu, 'network_bytes_sent': sent}
+
+
+def buckets(store, tier_name='1m'):
+    tier = next(tier for tier in store.tiers if tier.name == tier_name)
+    sql, params = store.history_query(tier, 'HOST-1', ['cpu_usage'], '2000-01-01',
+                                      stats=('min', 'max', 'mean'), counters=['network_bytes_sent'])
+    return [dict(r) for r in store.connection().execute(sql, params)]
+
+
+def test_buckets_merge_across_flushes(tmp_path):
+    store = RollupStore(str(tmp_path / 'rollups.db'))
+    sink = RollupSink(CsvSampleWriter(str(tmp_path / 'server_data.csv'), FIELDS), store)
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    sink.write_many([row(start, 10, sent=100), row(start + timedelta(seconds=20), 30, sent=200)])
+    sink.flush()
+    # The same minute, completed by a later flush
+    sink.write_many([row(start + timedelta(seconds=40), 20, sent=300), row(start + timedelta(seconds=70), 50)])
+    sink.flush()
+
+    first, second = buckets(store)
+    assert first['timestamp'] == '2026-01-01T12:00:00'
+    assert (first['cpu_usage_min'], first['cpu_usage_max'], first['cpu_usage']) == (10, 30, 20)
+    assert first['network_bytes_sent'] == 300
+    assert first['last_timestamp'] == '2026-01-01T12:00:40.000000'
+    assert second['cpu_usage'] == 50 and second['network_bytes_sent'] is None
+    assert len(buckets(store, '1h')) == 1
+    sink.close()
+
+
+def test_failed_writes_are_not_rolled_up(tmp_path):
+    class BrokenWriter(CsvSampleWriter):
+        def write_many(self, rows):
+            raise OSError("disk full")
+
+    store = RollupStore(str(tmp_path / 'rollups.db'))
+    sink = RollupSink(BrokenWriter(str(tmp_path / 'server_data.csv'), FIELDS), store)
+    with pytest.raises(OSError):
+        sink.write_many([row(datetime(2026, 1, 1), 10)])
+    sink.flush_rollups()
+    assert store.empty()
+
+
+def test_choose_tier():
+    assert choose_tier(HOUR, 1) is None
+    assert choose_tier(HOUR, 60).name == '1m'
+    assert choose_tier(HOUR, 1000).name == '15m'
+    assert choose_tier(90 * DAY, 60).name == '15m'
+    assert choose_tier(300 * DAY, 60).name == '1h'
+    assert choose_tier(1000 * DAY, 60).name == '1h'
+    assert choose_tier(HOUR, 60, tiers=()) is None
+
+
+def test_store_compact_applies_each_tier_retention(tmp_path):
+    tiers = (Tier('1m', 60, DAY), Tier('1h', HOUR, 10 * DAY))
+    store = RollupStore(str(tmp_path / 'rollups.db'), tiers)
+    sink = RollupSink(CsvSampleWriter(str(tmp_path / 'server_data.csv'), FIELDS), store)
+    now = datetime(2026, 1, 10)
+    sink.write_many([row(now - timedelta(days=5), 10), row(now - timedelta(hours=1), 20)])
+    sink.flush()
+    assert store.compact(now) == 1
+    counts = [store.connection().execute(f"SELECT COUNT(*) FROM {table_name(tier)}").fetchone()[0] for tier in tiers]
+    assert counts == [1, 2]
+    sink.close()
+
+
+def write_csv(path, timestamps, partial=None):
+    with open(path, 'w') as f:
+        f.write(','.join(FIELDS) + '\n')
+        for timestamp in timestamps:
+            f.write(f"{timestamp.isoformat()},HOST-1,10,\n")
+        if partial:
+            f.write(partial)
+
+
+def test_compact_csv_drops_only_old_complete_rows(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    base = datetime(2026, 1, 1)
+    write_csv(path, [base + timedelta(hours=i) for i in range(5)])
+    assert compact_csv(str(path), base + timedelta(hours=3)) == 3
+    lines = path.read_text().splitlines()
+    assert lines[0] == ','.join(FIELDS)
+    assert [line[:19] for line in lines[1:]] == ['2026-01-01T03:00:00', '2026-01-01T04:00:00']
+    assert compact_csv(str(path), base) == 0
+    assert compact_csv(str(tmp_path / 'missing.csv'), base) == 0
+
+    # A row still being written is never dropped, even if old
+    write_csv(path, [base], partial='2026-01-01T00:10:00,HOST')
+    assert compact_csv(str(path), base + timedelta(days=1)) == 1
+    assert path.read_text().splitlines()[1:] == ['2026-01-01T00:10:00,HOST']
+
+
+def test_csv_compaction_runs_in_the_background_beside_writes(tmp_path):
+    path = str(tmp_path / 'server_data.csv')
+    now = datetime.now()
+    write_csv(path, [now - timedelta(days=10), now - timedelta(days=9)])
+    clock = FakeClock()
+    writer = CsvSampleWriter(path, FIELDS, flush_rows=1, clock=clock)
+    writer.write(row(now - timedelta(days=8), 1))
+    assert writer._file is not None
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_compact(cutoff):
+        def rewrite(path, cutoff):
+            started.set()
+            release.wait(5)
+            return compact_csv(path, cutoff)
+        return writer.rewrite(rewrite, cutoff)
+
+    sink = RollupSink(writer, RollupStore(str(tmp_path / 'rollups.db')), raw_retention=DAY,
+                      compact_raw=slow_compact, flush_interval=60, compact_interval=HOUR, clock=clock)
+    clock.now = 60
+    # Flushed, then compaction starts
+    sink.write(row(now - timedelta(minutes=2), 2))
+    assert started.wait(5)
+    # The sampling thread is not held up: the row waits in the buffer
+    sink.write(row(now - timedelta(minutes=1), 3))
+    assert writer.pending == 1
+    release.set()
+    sink._compaction.join(5)
+    assert sink.stats['raw_rows_compacted'] == 3
+    assert sink.stats['compactions'] == 1
+
+    sink.close()
+    lines = open(path).read().splitlines()
+    assert lines[0] == ','.join(FIELDS)
+    assert [line.split(',')[2] for line in lines[1:]] == ['2', '3']
+
+
+@pytest.fixture
+def csv_rollups(tmp_path, monkeypatch):
+    monkeypatch.setattr(collector, 'ROLLUPS', {'enabled': True, 'path': str(tmp_path / 'rollups.db')})
+    monkeypatch.setattr(collector, 'STORAGE', {'backend': 'csv'})
+    monkeypatch.setattr(collector, 'CSV_FILE_PATH', str(tmp_path / 'server_data.csv'))
+    write_csv(collector.CSV_FILE_PATH, [datetime(2026, 1, 1)])
+    return CsvSampleWriter(collector.CSV_FILE_PATH, FIELDS)
+
+
+def test_backfill_rolls_up_existing_rows_and_compacts_through_the_writer(csv_rollups):
+    sink = collector.with_rollups(csv_rollups, csv_rollups)
+    assert not sink.store.empty()
+    assert sink.compact_raw.func == csv_rollups.rewrite
+    sink.close()
+
+
+def test_raw_compaction_is_off_when_the_backfill_fails(csv_rollups, monkeypatch):
+    def broken_rebuild(rows, store):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(rollups, 'rebuild', broken_rebuild)
+    sink = collector.with_rollups(csv_rollups, csv_rollups)
+    assert sink.compact_raw is None
+    sink.compact()
+    assert sink.stats['raw_rows_compacted'] == 0
+    assert len(open(collector.CSV_FILE_PATH).read().splitlines()) == 2
+    sink.close()
@@ -0,0 +1,106 @@
+# tests/test_rules.py
+import json
+
+import pytest
+
+from monitoring.rules import DEFAULT_RULES, RuleEngine, RuleError, load_rules, rules_from_thresholds
+
+
+def feed(engine, values, metric, host='HOST-1', step=60, start=0):
+    """Alerts raised by feeding one value per step seconds."""
+    alerts = []
+    for i, value in enumerate(values):
+        alerts.extend(engine.evaluate(host, start + i * step, {metric: value}))
+    return alerts
+
+
+def test_threshold_fires_only_once_sustained_and_then_resolves():
+    engine = RuleEngine.from_config([{'name': 'high_cpu', 'metric': 'cpu_usage', 'op': '>', 'value': 80,
+                                      'for': 120, 'level': 'danger', 'label': 'CPU usage'}])
+    assert feed(engine, [90, 95], 'cpu_usage') == []
+    fired = engine.evaluate('HOST-1', 120, {'cpu_usage': 92})
+    assert [(a.rule, a.state, a.level) for a in fired] == [('high_cpu', 'firing', 'danger')]
+    assert fired[0].message == "CPU usage is 92.0 (> 80 for 2m)"
+    assert engine.active('HOST-1')[0].timestamp == 0
+    assert engine.evaluate('HOST-1', 180, {'cpu_usage': 95}) == []
+    resolved = engine.evaluate('HOST-1', 240, {'cpu_usage': 40})
+    assert [a.state for a in resolved] == ['resolved']
+    assert engine.active('HOST-1') == []
+
+
+def test_a_dip_restarts_the_sustain_window():
+    engine = RuleEngine.from_config([{'metric': 'cpu_usage', 'op': '>', 'value': 80, 'for': 120}])
+    assert feed(engine, [90, 90, 50, 90, 90], 'cpu_usage') == []
+    assert len(engine.evaluate('HOST-1', 300, {'cpu_usage': 90})) == 1
+
+
+def test_hosts_are_independent_and_old_samples_are_ignored():
+    engine = RuleEngine.from_config([{'metric': 'disk_usage', 'op': '>', 'value': 85}])
+    assert len(engine.evaluate('HOST-1', 100, {'disk_usage': 90})) == 1
+    assert engine.evaluate('HOST-2', 100, {'disk_usage': 50}) == []
+    # A replayed older sample does not resolve the alert
+    assert engine.evaluate('HOST-1', 50, {'disk_usage': 10}) == []
+    assert [a.host for a in engine.active('HOST-1')] == ['HOST-1']
+    engine.forget('HOST-1')
+    assert engine.active('HOST-1') == []
+    assert engine.last_seen('HOST-1') is None
+
+
+def test_gap_resets_a_pending_window():
+    engine = RuleEngine.from_config([{'metric': 'cpu_usage', 'op': '>', 'value': 80, 'for': 600}],
+                                    max_gap=300)
+    assert feed(engine, [90, 90], 'cpu_usage', step=240) == []
+    # 1000s later: the earlier readings no longer count towards 'for'
+    assert feed(engine, [90, 90, 90], 'cpu_usage', step=240, start=1240) == []
+    assert len(engine.evaluate('HOST-1', 1960, {'cpu_usage': 90})) == 1
+
+
+def test_rate_rule_compares_change_per_period():
+    engine = RuleEngine.from_config([{'type': 'rate', 'metric': 'disk_usage', 'op': '>',
+                                      'value': 5, 'per': 3600}])
+    # +1% every 10 minutes is 6% per hour
+    alerts = feed(engine, [50, 51, 52, 53, 54, 55, 56], 'disk_usage', step=600)
+    assert [a.state for a in alerts] == ['firing']
+    assert alerts[0].timestamp == 3600
+    assert "changed by 6.0 in 1h" in alerts[0].message
+
+
+def test_flapping_counts_decayed_changes():
+    engine = RuleEngine.from_config([{'type': 'flapping', 'metric': 'smartcare_status',
+                                      'changes': 3, 'window': 1800}])
+    steady = feed(engine, ['Running'] * 5, 'smartcare_status')
+    assert steady == []
+    flapping = feed(engine, ['Stopped', 'Running', 'Stopped', 'Running'], 'smartcare_status', start=300)
+    assert [a.state for a in flapping] == ['firing']
+    # Hours of stability decay the score away
+    calm = feed(engine, ['Running'] * 3, 'smartcare_status', step=7200, start=600)
+    assert [a.state for a in calm] == ['resolved']
+
+
+def test_string_threshold_and_missing_values_are_skipped():
+    engine = RuleEngine.from_config([{'metric': ['sql_server_status', 'etims_status'], 'op': '!=',
+                                      'value': 'Running', 'name': 'down'}])
+    assert [rule.name for rule in engine.rules] == ['down:sql_server_status', 'down:etims_status']
+    alerts = engine.evaluate('HOST-1', 0, {'sql_server_status': 'Stopped', 'etims_status': None})
+    assert [a.rule for a in alerts] == ['down:sql_server_status']
+
+
+@pytest.mark.parametrize('spec', [
+    {'name': 'x'},
+    {'metric': 'cpu_usage', 'type': 'median'},
+    {'metric': 'cpu_usage', 'op': '=>', 'value': 1},
+    {'metric': 'cpu_usage', 'value': 1, 'level': 'critical'},
+])
+def test_invalid_rules_are_rejected(spec):
+    with pytest.raises(RuleError):
+        RuleEngine.from_config([spec])
+
+
+def test_load_rules_falls_back_to_thresholds_and_defaults(tmp_path):
+    config = tmp_path / 'config.json'
+    config.write_text(json.dumps({'thresholds': {'cpu_percent': 70}}))
+    assert load_rules(str(config)) == rules_from_thresholds({'cpu_percent': 70})
+    assert load_rules(str(config))[0]['value'] == 70
+    config.write_text(json.dumps({'alert_rules': [{'metric': 'cpu_usage', 'value': 1}]}))
+    assert load_rules(str(config)) == [{'metric': 'cpu_usage', 'value': 1}]
+    assert load_rules(str(tmp_path / 'missing.json')) == DEFAULT_RULES
@@ -0,0 +1,57 @@
+# tests/test_sampler.py
+import time
+
+from monitoring.samples import SUMMARY_FIELDNAMES, sample_fieldnames
+from monitoring.sampler import SAMPLED_METRICS, RingBuffer, SubIntervalSampler, summarize
+
+
+def test_ring_buffer_keeps_the_newest_values_oldest_first():
+    buffer = RingBuffer(3)
+    for value in (1, 2):
+        buffer.append(value)
+    assert list(buffer.values()) == [1, 2]
+    for value in (3, 4, 5):
+        buffer.append(value)
+    assert len(buffer) == 3
+    assert list(buffer.values()) == [3, 4, 5]
+    buffer.clear()
+    assert len(buffer) == 0
+    assert list(buffer.values()) == []
+
+
+def test_summarize_uses_nearest_rank_p95():
+    stats = summarize(list(range(1, 101)))
+    assert stats == {'min': 1, 'mean': 50.5, 'max': 100, 'p95': 95}
+    assert summarize([7.0])['p95'] == 7.0
+    assert summarize([]) is None
+
+
+def test_drain_summarizes_and_empties_the_buffers():
+    sampler = SubIntervalSampler(capacity=10)
+    for value in (10.0, 90.0, 20.0):
+        sampler._buffers['cpu'].append(value)
+    summary = sampler.drain()
+    assert summary == {'cpu_min': 10.0, 'cpu_mean': 40.0, 'cpu_max': 90.0, 'cpu_p95': 90.0}
+    assert sampler.drain() == {}
+
+
+def test_sampler_thread_fills_every_summary_column():
+    sampler = SubIntervalSampler(period=0.01)
+    sampler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while sampler.stats['samples'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        sampler.stop(timeout=5)
+    assert not sampler.is_alive()
+    summary = sampler.drain()
+    assert set(summary) == set(SUMMARY_FIELDNAMES)
+    assert all(summary[f'{metric}_min'] <= summary[f'{metric}_max'] for metric in SAMPLED_METRICS)
+    assert sampler.stats['cpu_seconds'] >= 0
+
+
+
+def test_summary_columns_are_appended_only_when_sampling():
+    assert sample_fieldnames(True) == sample_fieldnames(False) + SUMMARY_FIELDNAMES
+    assert not set(SUMMARY_FIELDNAMES) & set(sample_fieldnames(False))
@@ -0,0 +1,85 @@
+# tests/test_scheduler.py
+import threading
+
+from monitoring.scheduler import FixedRateScheduler
+
+
+class FakeClocks:
+    """Monotonic and wall clocks that only move when the test says so."""
+
+    def __init__(self, wall_start):
+        self.mono = 1000.0
+        self.wall_offset = wall_start - self.mono
+
+    def monotonic(self):
+        return self.mono
+
+    def wall(self):
+        return self.mono + self.wall_offset
+
+
+class FakeStopEvent:
+    """Event whose wait() advances the fake clock instead of sleeping."""
+
+    def __init__(self, clocks, stop_after):
+        self.clocks = clocks
+        self.stop_after = stop_after
+        self.waits = 0
+
+    def wait(self, delay):
+        self.clocks.mono += delay
+        self.waits += 1
+        return self.is_set()
+
+    def is_set(self):
+        return self.waits > self.stop_after
+
+
+def collect(scheduler, stop_event, work):
+    ticks = []
+    for tick in scheduler.ticks(stop_event):
+        ticks.append(tick)
+        work(len(ticks))
+    return ticks
+
+
+def test_ticks_are_aligned_to_the_interval_grid():
+    clocks = FakeClocks(wall_start=1_700_000_003.5)
+    scheduler = FixedRateScheduler(10, clock=clocks.monotonic, wall_clock=clocks.wall)
+    ticks = collect(scheduler, FakeStopEvent(clocks, stop_after=3), lambda n: None)
+    assert [tick.timestamp for tick in ticks] == [1_700_000_010, 1_700_000_020, 1_700_000_030]
+    assert [tick.index for tick in ticks] == [0, 1, 2]
+    assert all(tick.lateness == 0 and tick.missed == 0 for tick in ticks)
+
+
+def test_work_duration_does_not_drift_the_cadence():
+    clocks = FakeClocks(wall_start=1_700_000_000)
+    scheduler = FixedRateScheduler(10, clock=clocks.monotonic, wall_clock=clocks.wall)
+
+    def work(n):
+        clocks.mono += 3.7
+
+    ticks = collect(scheduler, FakeStopEvent(clocks, stop_after=3), work)
+    assert [tick.timestamp - ticks[0].timestamp for tick in ticks] == [0, 10, 20, 30]
+    assert all(tick.lateness == 0 for tick in ticks)
+
+
+def test_overrun_skips_to_the_latest_grid_point():
+    clocks = FakeClocks(wall_start=1_700_000_000)
+    scheduler = FixedRateScheduler(10, clock=clocks.monotonic, wall_clock=clocks.wall)
+
+    def work(n):
+        if n == 1:
+            clocks.mono += 35  # misses the ticks at +10 and +20
+
+    ticks = collect(scheduler, FakeStopEvent(clocks, stop_after=2), work)
+    assert [tick.index for tick in ticks[:2]] == [0, 3]
+    assert ticks[1].missed == 2
+    assert ticks[1].lateness == 5
+    assert scheduler.missed_ticks == 2
+
+
+def test_stop_event_ends_the_ticks():
+    stop = threading.Event()
+    stop.set()
+    assert list(FixedRateScheduler(0.01).ticks(stop)) == []
@@ -0,0 +1,50 @@
+# tests/test_schema.py
+import io
+
+import numpy as np
+import pandas as pd
+
+from app.data.schema import apply_schema, concat_frames, read_samples, records
+
+CSV = (
+    "timestamp,computer_name,cpu_usage,network_bytes_sent,smartcare_status,local_ip\n"
+    "2026-01-01T00:00:00,HOST-1,9.8,123456789012,Running,10.0.0.5\n"
+    "2026-01-01T00:00:10.500000,HOST-1,12.5,,Stopped,10.0.0.5\n"
+)
+
+
+def test_read_samples_uses_compact_types():
+    df = read_samples(io.BytesIO(CSV.encode()))
+    assert str(df['timestamp'].dtype).startswith('datetime64')
+    assert df['cpu_usage'].dtype == np.float32
+    assert str(df['network_bytes_sent'].dtype) == 'UInt64'
+    assert df['network_bytes_sent'].iloc[0] == 123456789012
+    assert df['network_bytes_sent'].isna().iloc[1]
+    for column in ('computer_name', 'smartcare_status', 'local_ip'):
+        assert isinstance(df[column].dtype, pd.CategoricalDtype)
+
+
+def test_apply_schema_leaves_unknown_and_matching_columns_alone():
+    df = pd.DataFrame({'cpu_usage': [1.0], 'extra': ['x']})
+    typed = apply_schema(df)
+    assert typed['cpu_usage'].dtype == np.float32
+    assert typed['extra'].dtype == df['extra'].dtype
+    assert apply_schema(typed) is typed
+
+
+def test_concat_frames_keeps_categories():
+    first = apply_schema(pd.DataFrame({'computer_name': ['A'], 'cpu_usage': [1.0]}))
+    second = apply_schema(pd.DataFrame({'computer_name': ['B'], 'cpu_usage': [2.0]}))
+    combined = concat_frames([first, second])
+    assert isinstance(combined['computer_name'].dtype, pd.CategoricalDtype)
+    assert list(combined['computer_name']) == ['A', 'B']
+    assert list(combined.columns) == ['computer_name', 'cpu_usage']
+    assert concat_frames([first]) is first
+
+
+def test_records_returns_plain_values():
+    df = read_samples(io.BytesIO(CSV.encode()))
+    first, second = records(df)
+    assert first['cpu_usage'] == 9.8
+    assert second['network_bytes_sent'] is None
+    assert first['computer_name'] == 'HOST-1'
@@ -0,0 +1,128 @@
+# tests/test_shipper.py
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from monitoring.shipper import BatchShipper
+
+
+class IngestStub:
+    """HTTP endpoint that records batches and answers with queued status codes."""
+
+    def __init__(self):
+        self.requests = []
+        self.statuses = []
+        self.delay = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                stub.requests.append((self.headers['Idempotency-Key'], json.loads(gzip.decompress(body))))
+                time.sleep(stub.delay)
+                status = stub.statuses.pop(0) if stub.statuses else 200
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/ingest"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    stub = IngestStub()
+    yield stub
+    stub.close()
+
+
+def rows(n, start=0):
+    return [{'timestamp': f'2026-01-01T00:00:{i:02d}', 'computer_name': 'HOST-1', 'cpu_usage': i}
+            for i in range(start, start + n)]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+def test_rows_are_shipped_in_batches(stub):
+    shipper = BatchShipper(stub.url, batch_size=3)
+    for row in rows(7):
+        shipper.write(row)
+    shipper.close()
+    assert [len(batch['rows']) for _, batch in stub.requests] == [3, 3, 1]
+    assert [key for key, _ in stub.requests] == [batch['batch_id'] for _, batch in stub.requests]
+    assert shipper.stats['rows_sent'] == 7
+
+
+def test_retries_keep_the_idempotency_key(stub):
+    stub.statuses = [503, 503]
+    shipper = BatchShipper(stub.url, batch_size=2, backoff_base=0.01)
+    shipper.write_many(rows(2))
+    wait_for(lambda: shipper.stats['batches_sent'] == 1)
+    shipper.close()
+    assert len(stub.requests) == 3
+    assert len({key for key, _ in stub.requests}) == 1
+    assert shipper.stats['retries'] == 2
+
+
+def test_rejected_batch_goes_to_on_failure(stub):
+    stub.statuses = [400]
+    failed = []
+    shipper = BatchShipper(stub.url, batch_size=2, on_failure=lambda rows, batch_id: failed.append((batch_id, rows)))
+    shipper.write_many(rows(2))
+    shipper.close()
+    assert len(stub.requests) == 1
+    assert failed == [(stub.requests[0][0], rows(2))]
+
+
+def test_write_batches_keeps_known_batch_ids(stub):
+    shipper = BatchShipper(stub.url, batch_size=2)
+    shipper.write_batches([('spooled-batch-1', rows(2)), (None, rows(3, start=2))])
+    shipper.close()
+    keys = [key for key, _ in stub.requests]
+    assert keys[0] == 'spooled-batch-1'
+    assert len(keys) == 3 and len(set(keys)) == 3
+    assert [len(batch['rows']) for _, batch in stub.requests] == [2, 2, 1]
+
+
+def test_write_many_refuses_what_the_queue_cannot_hold(stub):
+    stub.delay = 0.5
+    shipper = BatchShipper(stub.url, batch_size=1, max_pending_batches=2)
+    with pytest.raises(RuntimeError):
+        shipper.write_many(rows(5))
+    shipper.close(timeout=2)
+
+
+def test_close_does_not_hang_with_a_full_queue_while_retrying(stub):
+    stub.statuses = [503] * 100
+    failed = []
+    shipper = BatchShipper(stub.url, batch_size=1, max_pending_batches=2, max_retries=100,
+                           backoff_base=30, backoff_max=30, timeout=1,
+                           on_failure=lambda rows, batch_id: failed.extend(rows))
+    shipper.write_many(rows(1))
+    wait_for(lambda: len(stub.requests) >= 1)
+    shipper.write_many(rows(2, start=1))
+    started = time.monotonic()
+    shipper.close(timeout=0.5)
+    assert time.monotonic() - started < 3
+    assert not shipper._thread.is_alive()
+    # Nothing is lost: the in-flight batch and the queued ones all reach on_failure
+    assert sorted(row['cpu_usage'] for row in failed) == [0, 1, 2]
@@ -0,0 +1,61 @@
+# tests/test_speedtest_worker.py
+import json
+import threading
+import time
+
+from monitoring.speedtest_worker import SpeedTestWorker
+
+
+def test_worker_publishes_results_in_the_background(tmp_path):
+    ran = threading.Event()
+
+    def fake_test(stop_event):
+        ran.set()
+        return 48.5, 9.25
+
+    state_path = str(tmp_path / 'speedtest_state.json')
+    worker = SpeedTestWorker(interval=60, startup_delay=0, state_path=state_path, test_func=fake_test)
+    assert worker.latest() == (0, 0)
+    worker.start()
+    assert ran.wait(2)
+    deadline = time.monotonic() + 2
+    while worker.latest() == (0, 0) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.stop(timeout=2)
+    assert worker.latest() == (48.5, 9.25)
+    with open(state_path) as f:
+        assert json.load(f)['download'] == 48.5
+
+
+def test_failed_test_keeps_the_last_result():
+    worker = SpeedTestWorker(startup_delay=0, test_func=lambda stop_event: None)
+    worker._publish(20.0, 5.0)
+    worker.start()
+    time.sleep(0.05)
+    worker.stop(timeout=2)
+    assert worker.latest() == (20.0, 5.0)
+
+
+def test_restart_resumes_the_schedule(tmp_path):
+    state_path = tmp_path / 'speedtest_state.json'
+    state_path.write_text(json.dumps({'download': 30.0, 'upload': 6.0, 'completed_at': time.time() - 100}))
+    worker = SpeedTestWorker(interval=600, jitter=0, startup_delay=10, state_path=str(state_path))
+    assert worker.latest() == (30.0, 6.0)
+    assert 490 <= worker._initial_delay() <= 500
+
+
+def test_unreadable_state_is_ignored(tmp_path):
+    state_path = tmp_path / 'speedtest_state.json'
+    state_path.write_text('{not json')
+    worker = SpeedTestWorker(jitter=0, startup_delay=10, state_path=str(state_path))
+    assert worker.latest() == (0, 0)
+    assert worker._initial_delay() == 10
+
+
+def test_stop_interrupts_the_wait():
+    worker = SpeedTestWorker(startup_delay=3600, test_func=lambda stop_event: (1, 1))
+    worker.start()
+    started = time.monotonic()
+    worker.stop(timeout=2)
+    assert not worker.is_alive()
+    assert time.monotonic() - started < 1
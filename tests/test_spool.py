@@ -0,0 +1,185 @@
+# tests/test_spool.py
+import csv
+import os
+
+import pytest
+
+from monitoring.spool import Spool, SpooledSink, TokenBucket
+from monitoring.writer import CsvSampleWriter
+
+FIELDS = ['timestamp', 'computer_name', 'cpu_usage']
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def rows(n, start=0):
+    return [{'timestamp': f'2026-01-01T00:00:{i:02d}', 'computer_name': 'HOST-1', 'cpu_usage': i}
+            for i in range(start, start + n)]
+
+
+def replay_all(spool, max_rows=1000):
+    delivered = []
+    spool.replay(delivered.extend, max_rows)
+    return delivered
+
+
+class FlakyCsvWriter(CsvSampleWriter):
+    """CsvSampleWriter whose flushes fail while failing is set."""
+
+    failing = False
+
+    def flush(self):
+        if self.failing and self._buffer:
+            self.healthy = False
+            raise OSError("disk unavailable")
+        super().flush()
+
+
+def written_values(path):
+    with open(path, newline='') as f:
+        return [int(row['cpu_usage']) for row in csv.DictReader(f)]
+
+
+def test_replay_delivers_oldest_first_and_removes_rows(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    spool.append(rows(2))
+    spool.append(rows(3, start=2), batch_id='batch-2')
+    assert len(spool) == 2
+    assert replay_all(spool) == [(None, rows(2)), ('batch-2', rows(3, start=2))]
+    assert len(spool) == 0
+    assert replay_all(spool) == []
+    assert spool.stats['replayed_rows'] == 5
+
+
+def test_failed_delivery_keeps_the_rows(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    spool.append(rows(2))
+
+    def fail(batches):
+        raise OSError("still down")
+
+    with pytest.raises(OSError):
+        spool.replay(fail, 100)
+    assert len(spool) == 1
+    assert replay_all(spool) == [(None, rows(2))]
+
+
+def test_replay_stops_at_max_rows_on_record_boundaries(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    for i in range(5):
+        spool.append(rows(2, start=2 * i))
+    first = replay_all(spool, max_rows=3)
+    assert [len(batch_rows) for _, batch_rows in first] == [2, 2]
+    assert len(spool) == 3
+
+
+def test_cursor_survives_a_restart(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    spool.append(rows(1))
+    spool.append(rows(1, start=1))
+    replay_all(spool, max_rows=1)
+    spool.close()
+
+    reopened = Spool(str(tmp_path), fsync=False)
+    assert len(reopened) == 1
+    assert replay_all(reopened) == [(None, rows(1, start=1))]
+
+
+def test_torn_record_is_skipped(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    spool.append(rows(1))
+    spool.append(rows(1, start=1))
+    spool.close()
+    segment = next(p for p in tmp_path.iterdir() if p.suffix == '.seg')
+    with open(segment, 'r+b') as f:
+        f.truncate(os.path.getsize(segment) - 5)
+
+    reopened = Spool(str(tmp_path), fsync=False)
+    assert replay_all(reopened) == [(None, rows(1))]
+    assert reopened.stats['corrupt_records'] == 1
+
+
+def test_size_cap_drops_the_oldest_segments(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=200, max_bytes=600, fsync=False)
+    for i in range(20):
+        spool.append(rows(1, start=i))
+    assert spool.stats['bytes'] <= 600
+    assert spool.stats['dropped_bytes'] > 0
+    replayed = [row['cpu_usage'] for _, batch_rows in replay_all(spool) for row in batch_rows]
+    assert replayed == list(range(20 - len(replayed), 20))
+
+
+def test_token_bucket_paces_replay():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=50, clock=clock)
+    assert bucket.available() == 50
+    bucket.consume(50)
+    assert bucket.available() == 0
+    clock.now = 2
+    assert bucket.available() == 20
+    clock.now = 100
+    assert bucket.available() == 50
+
+
+def test_failed_writes_are_spooled_and_replayed_once(tmp_path):
+    path = str(tmp_path / 'server_data.csv')
+    writer = FlakyCsvWriter(path, FIELDS, flush_rows=1, clock=FakeClock())
+    sink = SpooledSink(writer, Spool(str(tmp_path / 'spool'), fsync=False), replay_rows_per_second=1000)
+
+    writer.failing = True
+    for row in rows(4):
+        sink.write(row)
+    assert len(sink.spool) == 4
+    writer.failing = False
+    sink.write(rows(1, start=4)[0])
+    assert sorted(written_values(path)) == [0, 1, 2, 3, 4]
+    assert len(sink.spool) == 0
+
+
+def test_failed_replay_does_not_duplicate_rows(tmp_path):
+    path = str(tmp_path / 'server_data.csv')
+    writer = FlakyCsvWriter(path, FIELDS, flush_rows=1, clock=FakeClock())
+    sink = SpooledSink(writer, Spool(str(tmp_path / 'spool'), fsync=False), replay_rows_per_second=1000)
+    writer.failing = True
+    for row in rows(4):
+        sink.write(row)
+
+    # The disk comes back for one write, then fails again during the replay
+    writer.failing = False
+    writer.write(rows(1, start=4)[0])
+    writer.failing = True
+    assert sink.replay() == 0
+    assert writer.pending == 0
+    sink.write(rows(1, start=5)[0])
+
+    writer.failing = False
+    sink.write(rows(1, start=6)[0])
+    while len(sink.spool):
+        sink.replay()
+    assert sorted(written_values(path)) == list(range(7))
+
+
+def test_shipped_batches_are_replayed_under_their_batch_id(tmp_path):
+    class BatchSink:
+        healthy = True
+        pending = 0
+        stats = {}
+
+        def __init__(self):
+            self.batches = []
+
+        def write_batches(self, batches):
+            self.batches.extend(batches)
+
+    shipper = BatchSink()
+    sink = SpooledSink(shipper, Spool(str(tmp_path), fsync=False), replay_rows_per_second=1000)
+    # What BatchShipper reports through on_failure
+    sink.spool_rows(rows(2), 'batch-1')
+    sink.replay()
+    assert shipper.batches == [('batch-1', rows(2))]
@@ -0,0 +1,20 @@
+# tests/test_startup.py
+import pytest
+
+from benchmarks.bench_startup import ENTRY_POINTS, import_time_ms, loaded_after_import
+
+# Shared CI machines are noisy; the benchmark enforces the real budget,
+# this only catches an entry point that starts importing something heavy.
+BUDGET_SLACK = 4
+
+
+@pytest.mark.parametrize('module', sorted(ENTRY_POINTS))
+def test_entry_points_load_heavy_dependencies_lazily(module):
+    assert loaded_after_import(module, ENTRY_POINTS[module][1]) == []
+
+
+@pytest.mark.parametrize('module', sorted(ENTRY_POINTS))
+def test_entry_points_import_within_budget(module):
+    budget = ENTRY_POINTS[module][0] * BUDGET_SLACK
+    # Best of three, so one slow run on a busy machine does not fail the suite
+    assert min(import_time_ms(module) for _ in range(3)) <= budget
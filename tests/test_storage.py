@@ -0,0 +1,74 @@
+# tests/test_storage.py
+import csv
+import sqlite3
+
+import pytest
+
+from monitoring.samples import FIELDNAMES
+from monitoring.storage import SqliteSampleStore, SqliteSampleWriter, import_csv
+
+
+def sample(host, second, **values):
+    row = dict.fromkeys(FIELDNAMES, '')
+    row.update(timestamp=f'2026-01-01T00:00:{second:02d}', computer_name=host, cpu_usage=second, **values)
+    return row
+
+
+def test_writer_and_store_round_trip(tmp_path):
+    path = str(tmp_path / 'server_data.db')
+    writer = SqliteSampleWriter(path, flush_rows=2)
+    writer.write(sample('HOST-B', 1))
+    assert writer.pending == 1
+    writer.write(sample('HOST-A', 2))
+    writer.write(sample('HOST-A', 3))
+    writer.close()
+
+    store = SqliteSampleStore(path)
+    assert store.computer_names() == ['HOST-A', 'HOST-B']
+    assert store.latest('HOST-A')['cpu_usage'] == 3
+    assert store.latest('HOST-A', offset=1)['cpu_usage'] == 2
+    assert store.latest('HOST-C') == {}
+    # Blank CSV-style values are stored as NULL
+    assert store.latest('HOST-B')['upload_speed_mbps'] is None
+    assert store.last_id() == 3
+
+
+def test_latest_rows_has_one_row_per_host(tmp_path):
+    path = str(tmp_path / 'server_data.db')
+    writer = SqliteSampleWriter(path)
+    writer.write_many([sample('HOST-A', 1), sample('HOST-B', 2), sample('HOST-A', 5), sample('HOST-B', 4)])
+    writer.close()
+    latest = {row['computer_name']: row['cpu_usage'] for row in SqliteSampleStore(path).latest_rows()}
+    assert latest == {'HOST-A': 5, 'HOST-B': 4}
+
+
+def test_history_query_filters_by_host_and_time(tmp_path):
+    path = str(tmp_path / 'server_data.db')
+    writer = SqliteSampleWriter(path)
+    writer.write_many([sample('HOST-A', second) for second in range(10)] + [sample('HOST-B', 5)])
+    writer.close()
+    store = SqliteSampleStore(path)
+    sql, params = store.history_query('HOST-A', ['cpu_usage'], '2026-01-01T00:00:03', '2026-01-01T00:00:06')
+    assert [row['cpu_usage'] for row in store.connection().execute(sql, params)] == [3, 4, 5, 6]
+
+
+def test_import_csv(tmp_path):
+    csv_path = tmp_path / 'server_data.csv'
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(sample('HOST-A', second) for second in range(7))
+    db_path = str(tmp_path / 'server_data.db')
+    assert import_csv(str(csv_path), db_path, batch_size=3) == 7
+    assert SqliteSampleStore(db_path).last_id() == 7
+
+
+def test_failed_write_many_leaves_only_earlier_rows_buffered(tmp_path):
+    path = str(tmp_path / 'server_data.db')
+    writer = SqliteSampleWriter(path, flush_rows=10)
+    writer.write(sample('HOST-A', 1))
+    # computer_name is NOT NULL, so the whole transaction fails
+    with pytest.raises(sqlite3.IntegrityError):
+        writer.write_many([sample('HOST-A', 2), sample(None, 3)])
+    assert writer.take_pending() == [sample('HOST-A', 1)]
+    writer.close()
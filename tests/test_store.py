@@ -0,0 +1,77 @@
+# tests/test_store.py
+import threading
+import time
+
+from app.data.store import DataStore
+
+HEADER = 'timestamp,computer_name,cpu_usage\n'
+
+
+def append(path, *lines, mode='a'):
+    with open(path, mode) as f:
+        f.write(''.join(lines))
+
+
+def test_versions_advance_only_when_the_data_changes(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    append(path, HEADER, '2026-01-01T00:00:00,HOST-1,5\n', mode='w')
+    store = DataStore(str(path), min_interval=0)
+    first = store.refresh()
+    assert first.version == 1
+    assert store.refresh() is first
+    assert not store.changed_since(1)
+
+    append(path, '2026-01-01T00:00:10,HOST-1,6\n')
+    second = store.refresh()
+    assert second.version == 2 and store.changed_since(1)
+    assert second.partitions.latest('HOST-1')['cpu_usage'] == 6.0
+    # The old snapshot is untouched
+    assert first.partitions.latest('HOST-1')['cpu_usage'] == 5.0
+
+
+def test_polls_within_min_interval_reuse_the_snapshot(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    append(path, HEADER, '2026-01-01T00:00:00,HOST-1,5\n', mode='w')
+    store = DataStore(str(path), min_interval=60)
+    store.refresh()
+    append(path, '2026-01-01T00:00:10,HOST-1,6\n')
+    assert store.refresh().version == 1
+    store._checked_at -= 60
+    assert store.refresh().version == 2
+
+
+def test_missing_file_publishes_an_empty_snapshot(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    append(path, HEADER, '2026-01-01T00:00:00,HOST-1,5\n', mode='w')
+    store = DataStore(str(path), min_interval=0)
+    store.refresh()
+    path.unlink()
+    snapshot = store.refresh()
+    assert snapshot.version == 2 and snapshot.partitions.hosts() == []
+    assert store.refresh().version == 2
+
+
+def test_concurrent_refreshes_share_one_load(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    append(path, HEADER, '2026-01-01T00:00:00,HOST-1,5\n', mode='w')
+    store = DataStore(str(path), min_interval=0)
+    polls = []
+    release = threading.Event()
+    poll = store._reader.poll
+
+    def slow_poll():
+        polls.append(threading.current_thread().name)
+        release.wait(5)
+        return poll()
+
+    store._reader.poll = slow_poll
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.refresh())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(polls) == 1
+    assert {snapshot.version for snapshot in results} == {1}
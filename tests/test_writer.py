@@ -0,0 +1,114 @@
+# tests/test_writer.py
+import csv
+import os
+
+import pytest
+
+from monitoring.writer import CsvSampleWriter
+
+FIELDS = ['timestamp', 'computer_name', 'cpu_usage']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def row(i):
+    return {'timestamp': f'2026-01-01T00:00:{i:02d}', 'computer_name': 'HOST-1', 'cpu_usage': i}
+
+
+def read(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_rows_are_buffered_until_flush_rows(tmp_path):
+    path = str(tmp_path / 'server_data.csv')
+    writer = CsvSampleWriter(path, FIELDS, flush_rows=3, flush_interval=60, clock=FakeClock())
+    writer.write(row(1))
+    writer.write(row(2))
+    assert not os.path.exists(path)
+    writer.write(row(3))
+    assert read(path) == [FIELDS] + [[row(i)['timestamp'], 'HOST-1', str(i)] for i in (1, 2, 3)]
+    assert writer.stats['rows_written'] == 3
+    assert writer.stats['flushes'] == 1
+    writer.close()
+
+
+def test_rows_are_flushed_after_flush_interval(tmp_path):
+    path = str(tmp_path / 'server_data.csv')
+    clock = FakeClock()
+    writer = CsvSampleWriter(path, FIELDS, flush_rows=50, flush_interval=30, clock=clock)
+    writer.write(row(1))
+    clock.now = 30
+    writer.write(row(2))
+    assert len(read(path)) == 3
+    writer.close()
+
+
+def test_close_flushes_pending_rows(tmp_path):
+    path = str(tmp_path / 'server_data.csv')
+    writer = CsvSampleWriter(path, FIELDS, flush_rows=50, clock=FakeClock())
+    writer.write(row(1))
+    writer.close()
+    assert len(read(path)) == 2
+
+
+def test_rotated_file_is_reopened_with_a_header(tmp_path):
+    path = str(tmp_path / 'server_data.csv')
+    writer = CsvSampleWriter(path, FIELDS, flush_rows=1, clock=FakeClock())
+    writer.write(row(1))
+    os.replace(path, str(tmp_path / 'server_data.1.csv'))
+    writer.write(row(2))
+    assert read(path) == [FIELDS, [row(2)['timestamp'], 'HOST-1', '2']]
+    writer.close()
+
+
+def test_missing_trailing_columns_are_added_to_the_header(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    path.write_text('timestamp,computer_name\n2025-12-31T23:59:59,HOST-1\n')
+    writer = CsvSampleWriter(str(path), FIELDS, flush_rows=1, clock=FakeClock())
+    writer.write(row(1))
+    writer.close()
+    assert read(path) == [FIELDS, ['2025-12-31T23:59:59', 'HOST-1'], [row(1)['timestamp'], 'HOST-1', '1']]
+
+
+def test_incompatible_file_is_moved_aside(tmp_path):
+    path = tmp_path / 'server_data.csv'
+    path.write_text('something,else\n1,2\n')
+    writer = CsvSampleWriter(str(path), FIELDS, flush_rows=1, clock=FakeClock())
+    writer.write(row(1))
+    writer.close()
+    assert read(path)[0] == FIELDS
+    assert len(list(tmp_path.glob('server_data.*.csv'))) == 1
+
+
+def test_failed_flush_keeps_rows_buffered(tmp_path):
+    path = str(tmp_path / 'missing' / 'server_data.csv')
+    writer = CsvSampleWriter(path, FIELDS, flush_rows=1, clock=FakeClock())
+    with pytest.raises(OSError):
+        writer.write(row(1))
+    assert not writer.healthy
+    assert writer.pending == 1
+    os.makedirs(os.path.dirname(path))
+    writer.flush()
+    assert writer.healthy
+    assert len(read(path)) == 2
+
+
+def test_unknown_fsync_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        CsvSampleWriter(str(tmp_path / 'x.csv'), FIELDS, fsync='sometimes')
+
+
+def test_failed_write_many_takes_its_rows_back(tmp_path):
+    path = str(tmp_path / 'missing' / 'server_data.csv')
+    writer = CsvSampleWriter(path, FIELDS, flush_rows=10, clock=FakeClock())
+    writer.write(row(1))
+    with pytest.raises(OSError):
+        writer.write_many([row(2), row(3)])
+    assert writer.take_pending() == [row(1)]